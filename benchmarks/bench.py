@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+""" Throughput and latency benchmarks of the client against the in-process MockTCS.
+
+    Every scenario runs a fixed count of operations through the sync client (threads) and the async client (tasks)
+    for each pool size, the pool size being both max_connections and the count of operations in flight. Scenarios of
+    a bulk helper (listing, enroll) hand all operations to one call of it, with the pool size as its concurrency, and
+    time each of their requests instead of each operation. For each run it reports requests/sec, p50/p99 latency and
+    the peak of memory allocated by Python (tracemalloc, disable with --no-memory as it slows everything down).
+
+    Usage:
+        python benchmarks/bench.py --output results.json
+        python benchmarks/bench.py --scenario listing --mode async --pool 10 --pool 100 --latency 0.01
+
+    The JSON output has a 'meta' object (versions, platform, settings) and a 'results' list with one object per run;
+    compare two of them to spot regressions between releases.
+"""
+
+import abc
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "geant-tcs-client"))
+
+import httpx  # noqa: E402
+
+from concurrency import amap_unordered, map_unordered  # noqa: E402
+from credentials import Credentials  # noqa: E402
+from domain_control_validation_resource import DomainControlValidationResource  # noqa: E402
+from geant_tcs_client import AsyncGEANTTCSClient, GEANTTCSClient  # noqa: E402
+from mock_server import MockTCS  # noqa: E402
+from poller import CollectPoller  # noqa: E402
+from ssl_certificates import SSLCertificates, SSLEnrollmentSpec  # noqa: E402
+
+CREDENTIALS = Credentials(login="benchmark", password="benchmark", custom_uri="benchmark")
+PAGE_SIZE = 500
+# Seconds until the mock issues an enrolled certificate in the collect scenario, and the poller's first delay
+ISSUE_DELAY = 0.05
+POLL_DELAY = 0.01
+
+
+def percentile(values: list, share: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def enrollment(index: int) -> SSLEnrollmentSpec:
+    return SSLEnrollmentSpec(10557, "csr", 17945, 365, subj_alt_names=f"bench{index}.example.org")
+
+
+class RequestLatencies:
+    """ Client instrument recording the latency of every request. """
+
+    def __init__(self):
+        self.latencies = []
+
+    def start(self, client, method: str, url: str, kwargs: dict) -> float:
+        return time.perf_counter()
+
+    def finish(self, started: float, response: httpx.Response = None, error: BaseException = None, retries: int = 0):
+        self.latencies.append(time.perf_counter() - started)
+
+
+class Scenario(abc.ABC):
+    """ A benchmarked hot path: `run(resource, pool)` performs all operations, `mock` prepares the mock. """
+
+    name = None
+    resource = SSLCertificates
+    instruments = ()
+
+    def __init__(self, operations: int):
+        self.operations = operations
+
+    def mock(self, latency: float) -> MockTCS:
+        return MockTCS(ssl_certificates=1000, domains=self.operations, latency=latency, seed=1)
+
+    @abc.abstractmethod
+    def run(self, resource, pool: int) -> tuple:
+        """ All operations with the sync client, returns the latencies in seconds and the count of errors. """
+
+    @abc.abstractmethod
+    async def arun(self, resource, pool: int) -> tuple:
+        """ All operations with the async client, see run. """
+
+    @staticmethod
+    def check(response: httpx.Response, client):
+        response.raise_for_status()
+        return client.json(response) if response.content else None
+
+
+class OperationScenario(Scenario):
+    """ A scenario of independent operations: `operation(resource, index)` is run for every index, `pool` at a time,
+        and timed from start to end.
+    """
+
+    @abc.abstractmethod
+    def operation(self, resource, index: int):
+        """ One operation with the sync client. """
+
+    async def aoperation(self, resource, index: int):
+        return await self.operation(resource, index)
+
+    def run(self, resource, pool: int) -> tuple:
+        return _outcome(list(map_unordered(_timed(lambda index: self.operation(resource, index)),
+                                           range(self.operations), pool)))
+
+    async def arun(self, resource, pool: int) -> tuple:
+        return _outcome([result async for result in amap_unordered(
+            _atimed(lambda index: self.aoperation(resource, index)), range(self.operations), pool)])
+
+
+class BulkScenario(Scenario):
+    """ A scenario of one call to a bulk helper of the client covering every operation, each operation being one
+        request. `submit(resource, pool)` makes the call and returns the count of failed operations, the latencies
+        are those of the requests.
+    """
+
+    def __init__(self, operations: int):
+        super().__init__(operations)
+        self.requests = RequestLatencies()
+        self.instruments = (self.requests,)
+
+    @abc.abstractmethod
+    def submit(self, resource, pool: int) -> int:
+        """ The bulk call with the sync client. """
+
+    @abc.abstractmethod
+    async def asubmit(self, resource, pool: int) -> int:
+        """ The bulk call with the async client. """
+
+    def run(self, resource, pool: int) -> tuple:
+        errors = self.submit(resource, pool)
+        return self.requests.latencies, errors
+
+    async def arun(self, resource, pool: int) -> tuple:
+        errors = await self.asubmit(resource, pool)
+        return self.requests.latencies, errors
+
+
+class Listing(BulkScenario):
+    """ fetch_all_ssl_certificates of `operations` pages, `pool` pages requested at a time. """
+
+    name = "listing"
+
+    def mock(self, latency: float) -> MockTCS:
+        return MockTCS(ssl_certificates=self.operations * PAGE_SIZE, latency=latency, seed=1)
+
+    def missing_pages(self, records: list) -> int:
+        return self.operations - len(records) // PAGE_SIZE
+
+    def submit(self, resource, pool: int) -> int:
+        return self.missing_pages(resource.fetch_all_ssl_certificates(size=PAGE_SIZE, concurrency=pool))
+
+    async def asubmit(self, resource, pool: int) -> int:
+        return self.missing_pages(await resource.fetch_all_ssl_certificates(size=PAGE_SIZE, concurrency=pool))
+
+
+class IterListing(Listing):
+    """ iter_ssl_certificates over `operations` pages with prefetch, i.e. one page ahead whatever the pool size. """
+
+    name = "listing-iter"
+
+    def submit(self, resource, pool: int) -> int:
+        return self.missing_pages(list(resource.iter_ssl_certificates(size=PAGE_SIZE, prefetch=True)))
+
+    async def asubmit(self, resource, pool: int) -> int:
+        return self.missing_pages([record async for record in resource.iter_ssl_certificates(size=PAGE_SIZE,
+                                                                                              prefetch=True)])
+
+
+class Enroll(BulkScenario):
+    """ bulk_enroll_ssl_certificates of `operations` enrollments, `pool` in flight at a time. """
+
+    name = "enroll"
+
+    def specs(self):
+        return (enrollment(index) for index in range(self.operations))
+
+    def submit(self, resource, pool: int) -> int:
+        return sum(result.error is not None for result in resource.bulk_enroll_ssl_certificates(self.specs(), pool))
+
+    async def asubmit(self, resource, pool: int) -> int:
+        return sum([result.error is not None
+                    async for result in resource.bulk_enroll_ssl_certificates(self.specs(), pool)])
+
+
+class Collect(OperationScenario):
+    """ Enroll a certificate and collect it through CollectPoller. The mock issues it after ISSUE_DELAY seconds, so
+        every order is polled while pending and backs off a few times before it is collected.
+    """
+
+    name = "collect"
+
+    def mock(self, latency: float) -> MockTCS:
+        return MockTCS(ssl_certificates=1000, latency=latency, issue_delay=ISSUE_DELAY, seed=1)
+
+    @staticmethod
+    def _poller(resource) -> CollectPoller:
+        return CollectPoller(lambda ssl_id: resource.collect_ssl_certificate(ssl_id, "x509"), initial_delay=POLL_DELAY,
+                             timeout=60)
+
+    @staticmethod
+    def enroll(resource, index: int):
+        spec = enrollment(index)
+        return resource.enroll_ssl_certificate(spec.org_id, spec.csr, spec.subj_alt_names, spec.cert_type,
+                                               spec.number_servers, spec.server_type, spec.term, spec.comments, [],
+                                               spec.external_requester)
+
+    def operation(self, resource, index: int):
+        ssl_id = self.check(self.enroll(resource, index), resource.client)["sslId"]
+        for result in self._poller(resource).poll([ssl_id]):
+            if result.error is not None:
+                raise result.error
+
+    async def aoperation(self, resource, index: int):
+        ssl_id = self.check(await self.enroll(resource, index), resource.client)["sslId"]
+        async for result in self._poller(resource).apoll([ssl_id]):
+            if result.error is not None:
+                raise result.error
+
+
+class DCVStatus(OperationScenario):
+    """ get_validation_status for distinct domains. """
+
+    name = "dcv-status"
+    resource = DomainControlValidationResource
+
+    def operation(self, resource, index: int):
+        return self.check(resource.get_validation_status(f"domain{index + 1}.example.org"), resource.client)
+
+    async def aoperation(self, resource, index: int):
+        return self.check(await resource.get_validation_status(f"domain{index + 1}.example.org"), resource.client)
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (Listing, IterListing, Enroll, Collect, DCVStatus)}
+
+
+def _timed(func):
+    def timed(index: int):
+        started = time.perf_counter()
+        func(index)
+        return time.perf_counter() - started
+    return timed
+
+
+def _atimed(func):
+    async def timed(index: int):
+        started = time.perf_counter()
+        await func(index)
+        return time.perf_counter() - started
+    return timed
+
+
+def _outcome(results: list) -> tuple:
+    return [latency for _, latency, error in results if error is None], sum(error is not None for *_, error in results)
+
+
+def run_sync(scenario: Scenario, mock: MockTCS, pool: int) -> tuple:
+    with GEANTTCSClient(CREDENTIALS, max_connections=pool, max_keepalive_connections=pool,
+                        transport=mock.transport(), instruments=scenario.instruments) as client:
+        return scenario.run(scenario.resource(client), pool)
+
+
+def run_async(scenario: Scenario, mock: MockTCS, pool: int) -> tuple:
+    async def main():
+        async with AsyncGEANTTCSClient(CREDENTIALS, max_connections=pool, max_keepalive_connections=pool,
+                                       transport=mock.async_transport(), instruments=scenario.instruments) as client:
+            return await scenario.arun(scenario.resource(client), pool)
+
+    return asyncio.run(main())
+
+
+def benchmark(name: str, mode: str, pool: int, operations: int, latency: float, memory: bool) -> dict:
+    scenario = SCENARIOS[name](operations)
+    mock = scenario.mock(latency)
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    latencies, errors = (run_async if mode == "async" else run_sync)(scenario, mock, pool)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if memory else None
+    if memory:
+        tracemalloc.stop()
+    return {"scenario": name, "mode": mode, "pool": pool, "operations": operations, "errors": errors,
+            "requests": mock.requests, "seconds": round(seconds, 4),
+            "requests_per_second": round(mock.requests / seconds, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "peak_memory_bytes": peak}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0].strip())
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run, repeatable (default: all)")
+    parser.add_argument("--mode", action="append", choices=("sync", "async"), help="Client mode, repeatable "
+                                                                                     "(default: both)")
+    parser.add_argument("--pool", action="append", type=int, help="Pool size, repeatable (default: 10 and 50)")
+    parser.add_argument("--operations", type=int, default=500, help="Operations per run (default: 500)")
+    parser.add_argument("--latency", type=float, default=0.005, help="Mock latency in seconds (default: 0.005)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Don't trace memory allocations")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.scenario or sorted(SCENARIOS):
+        for mode in args.mode or ("sync", "async"):
+            for pool in args.pool or (10, 50):
+                result = benchmark(name, mode, pool, args.operations, args.latency, args.memory)
+                results.append(result)
+                print(f"{name:<12} {mode:<5} pool={pool:<4} {result['requests_per_second']:>9} req/s "
+                      f"p50={result['p50_ms']:>8} ms p99={result['p99_ms']:>8} ms errors={result['errors']}",
+                      file=sys.stderr)
+
+    report = {"meta": {"python": platform.python_version(), "httpx": httpx.__version__,
+                       "platform": platform.platform(), "time": time.time(), "operations": args.operations,
+                       "latency": args.latency, "memory": args.memory},
+              "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+""" Import time budget of the command line and the client, for commands run thousands of times from cron jobs and
+    monitoring checks.
+
+    Every case imports a module in a fresh interpreter, several times, and fails if the fastest import exceeds its
+    budget or if it pulled in a module which should only be loaded on first use (the resources, httpx, asyncio and
+    the optional dependencies orjson, pyarrow, cryptography and opentelemetry). The exit status is 1 on failure.
+
+    Usage:
+        python benchmarks/import_time.py
+        python benchmarks/import_time.py --scale 2 --repeat 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PACKAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "geant-tcs-client")
+
+OPTIONAL = ("orjson", "pyarrow", "cryptography", "opentelemetry")
+RESOURCES = ("ssl_certificates", "client_certificates", "device_certificates", "person_resource",
+             "domain_control_validation_resource", "acme_account_resource", "acme_server_resource",
+             "acme_ev_details_resource", "client_administrator_resource")
+
+# (module, budget in seconds, top level modules it must not import)
+CASES = (
+    ("main", 0.10, OPTIONAL + RESOURCES + ("httpx", "asyncio", "geant_tcs_client")),
+    ("geant_tcs_client", 0.25, OPTIONAL + RESOURCES),
+    ("ssl_certificates", 0.30, OPTIONAL),
+)
+
+PROBE = """
+import sys, time, json
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "modules": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+
+def measure(module: str, repeat: int) -> tuple:
+    """ Fastest import time of the module in `repeat` fresh interpreters and the top level modules loaded. """
+
+    timings, modules = [], set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], cwd=PACKAGE, check=True,
+                                stdout=subprocess.PIPE, env={**os.environ, "PYTHONPATH": PACKAGE}).stdout
+        result = json.loads(output)
+        timings.append(result["seconds"])
+        modules.update(result["modules"])
+    return min(timings), modules
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreters started per module (default: 5)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the budgets, e.g. for slow CI machines")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module, budget, forbidden in CASES:
+        seconds, modules = measure(module, args.repeat)
+        budget *= args.scale
+        loaded = sorted(modules.intersection(forbidden))
+        ok = seconds <= budget and not loaded
+        failed |= not ok
+        print(f"{'ok' if ok else 'FAIL':<4} {module:<18} {seconds * 1000:7.1f} ms (budget {budget * 1000:.0f} ms)"
+              + (f" eagerly imports {', '.join(loaded)}" if loaded else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,11 @@
 
-class ACMEAccountResource:
-    """ ACME account resource """
+from models import ACMEAccount
+from pagination import paginate, query
+from resource import Resource
+
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.username = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
+class ACMEAccountResource(Resource):
+    """ ACME account resource """
 
     def find_acme_account_by_id(self, id: int):
         """ Find ACME account by ID.
@@ -60,10 +58,8 @@ class ACMEAccountResource:
          """
 
         url = f"/acme/{self.version}/account/{id}"
-        headers = {"login": self.username, "Accept": "application/json;charset=UTF-8",  "customerUri": self.custom_uri,
-                  "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def create_new_acme_account(self, **parameter):
@@ -104,10 +100,8 @@ class ACMEAccountResource:
         data = parameter
 
         url = f"/acme/{self.version}/account/"
-        headers = {"login": self.username, "Accept": "application/json;charset=UTF-8", "customerUri": self.custom_uri,
-                   "password": self.password}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def update_acme_account(self, id: int):
@@ -125,10 +119,8 @@ class ACMEAccountResource:
         """
 
         url = f"/acme/{self.version}/account/{id}"
-        headers = {"Content-Type": "application/json;charset=UTF-8", "login": self.username,
-                   "customerUri": self.custom_uri, "password": self.password}
 
-        response = self.client.put(url, headers=headers)
+        response = self.client.put(url, headers=self.json_headers)
         return response
 
     def add_domains_to_acme_account(self, id: int, domains: list):
@@ -155,10 +147,8 @@ class ACMEAccountResource:
         data = {"domains": domains}
 
         url = f"/acme/{self.version}/account/{id}/domains"
-        headers = {"Content-Type": "application/json;charset=UTF-8", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def remove_domains_from_acme_account(self, id: int, domains: list):
@@ -185,10 +175,8 @@ class ACMEAccountResource:
         data = {"domains": domains}
 
         url = f"/acme/{self.version}/account/{id}/domains"
-        headers = {"Content-Type": "application/json;charset=UTF-8", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
 
-        response = self.client.delete(url, headers=headers, data=data)
+        response = self.client.delete(url, headers=self.json_headers, json=data)
         return response
 
     def delete_acme_account(self, id: int):
@@ -202,14 +190,14 @@ class ACMEAccountResource:
         """
 
         url = f"/acme/{self.version}/account/{id}"
-        headers = {"login": self.username, "password": self.password, "customerUri": self.custom_uri}
 
-        response = self.client.delete(url, headers=headers)
+        response = self.client.delete(url, headers=self.headers)
         return response
 
-    def list_acme_accounts(self, position: int, size: int, organization_id: int, name: str, acme_server: str,
-                           cert_validation_type: str, status: str):
-        """ Delete ACME account.
+    def list_acme_accounts(self, position: int = None, size: int = None, organization_id: int = None,
+                           name: str = None, acme_server: str = None, cert_validation_type: str = None,
+                           status: str = None):
+        """ List ACME accounts.
 
         Args:
             position (int): Position shift
@@ -246,9 +234,26 @@ class ACMEAccountResource:
 
         """
 
-        url = f"/acme/{self.version}/account?position={position}&size={size}&organizationID={organization_id}&" \
-              f"name={name}&acmeServer={acme_server}&certValidationType={cert_validation_type}&status={status}"
-        headers = {"login": self.username, "password": self.password, "customerUri": self.custom_uri}
+        url = f"/acme/{self.version}/account"
+        params = query(position=position, size=size, organizationID=organization_id, name=name,
+                       acmeServer=acme_server, certValidationType=cert_validation_type, status=status)
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.headers, params=params)
         return response
+
+    def iter_acme_accounts(self, size: int = 200, prefetch: bool = False, typed: bool = False, **filters):
+        """ Iterate over all ACME accounts matching the filters, fetching the pages lazily.
+
+        Args:
+            size (int): Count of entries per page
+            prefetch (bool): Request the next page while the current one is being consumed
+            typed (bool): Yield lazily decoded ACMEAccount models instead of dicts
+            **filters: Filters of list_acme_accounts, e.g. cert_validation_type='OV'
+
+        Returns:
+            Iterator of ACME account records (async iterator with AsyncGEANTTCSClient)
+        """
+
+        return paginate(self.client, lambda position, page_size: self.list_acme_accounts(
+            position=position, size=page_size, **filters), size, prefetch=prefetch,
+            model=ACMEAccount if typed else None)
@@ -1,14 +1,9 @@
 
+from resource import Resource
 
-class ACMEEVDetailsResource:
-    """ ACME EV details resource """
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.username = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
+class ACMEEVDetailsResource(Resource):
+    """ ACME EV details resource """
 
     def list_acme_servers(self, org_name: str, org_country: str, post_office_box: str, org_address_1: str,
                           org_address_2, org_address_3, org_locality: str, org_state_or_province: str,
@@ -1,16 +1,13 @@
 
-class ACMEServerResource:
-    """ ACME server resource """
+from pagination import paginate, query
+from resource import Resource
+
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.username = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
+class ACMEServerResource(Resource):
+    """ ACME server resource """
 
-    def list_acme_servers(self, position: int, size: int, active: str, name: str, url: str, cert_validation_type: str,
-                          ca_id: int):
+    def list_acme_servers(self, position: int = None, size: int = None, active: str = None, name: str = None,
+                          url: str = None, cert_validation_type: str = None, ca_id: int = None):
         """ List ACME servers.
 
         Args:
@@ -38,9 +35,24 @@ class ACMEServerResource:
             "singleProductId":66362,"multiProductId":23234,"wcProductId":14608,"certValidationType":"OV"}]
         """
 
-        url = f"/acme/{self.version}/server?postion={position}&size={size}&active={active}&name={name}&url={url}" \
-              f"&certValidationType={cert_validation_type}&caId={ca_id}"
-        headers = {"login": self.username, "password": self.password, "customerUri": self.custom_uri,}
+        params = query(position=position, size=size, active=active, name=name, url=url,
+                       certValidationType=cert_validation_type, caId=ca_id)
+        url = f"/acme/{self.version}/server"
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.headers, params=params)
         return response
+
+    def iter_acme_servers(self, size: int = 200, prefetch: bool = False, **filters):
+        """ Iterate over all ACME servers matching the filters, fetching the pages lazily.
+
+        Args:
+            size (int): Count of entries per page
+            prefetch (bool): Request the next page while the current one is being consumed
+            **filters: Filters of list_acme_servers, e.g. cert_validation_type='DV'
+
+        Returns:
+            Iterator of ACME server records (async iterator with AsyncGEANTTCSClient)
+        """
+
+        return paginate(self.client, lambda position, page_size: self.list_acme_servers(
+            position=position, size=page_size, **filters), size, prefetch=prefetch)
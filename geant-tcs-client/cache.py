@@ -0,0 +1,270 @@
+
+import fnmatch
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import httpx
+
+# Seconds a response is served from the cache, keyed by a glob of the resource URL
+CATALOG_TTLS = {
+    "/ssl/*/types": 24 * 3600,
+    "/ssl/*/customFields": 3600,
+    "/smime/*/types": 24 * 3600,
+    "/smime/*/customFields": 3600,
+    "/device/*/types": 24 * 3600,
+    "/device/*/customFields": 3600,
+    "/admin/*/roles": 24 * 3600,
+    "/admin/*/privileges": 24 * 3600,
+    "/acme/*/server": 3600,
+}
+
+# Headers describing the transfer of a response; they don't apply to its decoded content
+TRANSFER_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+CacheEntry = namedtuple("CacheEntry", ["url", "status_code", "headers", "content", "expires", "etag",
+                                       "last_modified"])
+
+
+def stored_headers(headers) -> list:
+    """ Headers of a response without TRANSFER_HEADERS, for rebuilding it from its decoded content. """
+
+    return [(name, value) for name, value in headers.items() if name.lower() not in TRANSFER_HEADERS]
+
+
+class MemoryBackend:
+    """ Thread safe in-process storage for ResponseCache. """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def default_cache_path() -> str:
+    """ Path of the shared on-disk cache: $XDG_CACHE_HOME/geant-tcs-client/responses.sqlite, ~/.cache by default. """
+
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "geant-tcs-client", "responses.sqlite")
+
+
+class SQLiteBackend:
+    """ On-disk storage for ResponseCache, shared by the threads of a process and by concurrent processes, e.g. cron
+        jobs running the command line. Entries beyond `max_size` bytes of content are evicted least recently used
+        first; expired entries are kept for revalidation until they are evicted.
+
+        SQLite's write-ahead log lets readers and one writer work at the same time, writers of other processes wait
+        up to `timeout` seconds for their turn.
+
+    Args:
+        path (str): Database file, defaults to default_cache_path(). Its directory is created if needed.
+        max_size (int): Upper bound of the cached content in bytes
+        timeout (float): Seconds to wait for a lock held by another process
+
+    Example:
+        client = GEANTTCSClient(credentials, cache=ResponseCache(backend=SQLiteBackend(max_size=16 * 1024 * 1024)))
+    """
+
+    def __init__(self, path: str = None, max_size: int = 64 * 1024 * 1024, timeout: float = 30.0):
+        self.path = path if path is not None else default_cache_path()
+        self.max_size = max_size
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT NOT NULL, "
+                                "status_code INTEGER NOT NULL, headers TEXT NOT NULL, content BLOB NOT NULL, "
+                                "expires REAL NOT NULL, etag TEXT, last_modified TEXT, size INTEGER NOT NULL, "
+                                "accessed REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key: str):
+        with self._lock:
+            row = self.connection.execute("SELECT url, status_code, headers, content, expires, etag, last_modified "
+                                          "FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        url, status_code, headers, content, expires, etag, last_modified = row
+        return CacheEntry(url, status_code, [tuple(header) for header in json.loads(headers)], bytes(content),
+                          expires, etag, last_modified)
+
+    def set(self, key: str, entry: CacheEntry):
+        size = len(entry.content)
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                        (key, entry.url, entry.status_code, json.dumps(entry.headers),
+                                         entry.content, entry.expires, entry.etag, entry.last_modified, size,
+                                         time.time()))
+                self._evict()
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def _evict(self):
+        """ Delete the least recently used entries until the content fits into max_size. """
+
+        excess = self.connection.execute("SELECT TOTAL(size) FROM responses").fetchone()[0] - self.max_size
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def keys(self) -> list:
+        with self._lock:
+            return [key for key, in self.connection.execute("SELECT key FROM responses")]
+
+    def clear(self):
+        with self._lock:
+            self.connection.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+class CacheLookup:
+    """ State of one cacheable GET between looking it up and storing the server's answer. """
+
+    def __init__(self, cache, key: str, ttl: float, entry):
+        self.cache = cache
+        self.key = key
+        self.ttl = ttl
+        self.entry = entry
+
+    @property
+    def fresh(self) -> bool:
+        return self.entry is not None and self.entry.expires > time.time()
+
+    def conditional_headers(self, headers) -> dict:
+        """ Request headers extended by If-None-Match/If-Modified-Since to revalidate a stale entry. """
+
+        headers = dict(headers or {})
+        if self.entry is not None:
+            if self.entry.etag:
+                headers["If-None-Match"] = self.entry.etag
+            if self.entry.last_modified:
+                headers["If-Modified-Since"] = self.entry.last_modified
+        return headers
+
+    def response(self) -> httpx.Response:
+        """ The cached response. """
+
+        entry = self.entry
+        return httpx.Response(entry.status_code, headers=entry.headers, content=entry.content,
+                              request=httpx.Request("GET", entry.url))
+
+    def update(self, response: httpx.Response) -> httpx.Response:
+        """ Store a fresh response, or renew the cached one if the server answered 304 Not Modified. """
+
+        if response.status_code == 304 and self.entry is not None:
+            self.entry = self.entry._replace(expires=time.time() + self.ttl)
+            self.cache.backend.set(self.key, self.entry)
+            return self.response()
+
+        if response.status_code == 200 and "no-store" not in response.headers.get("Cache-Control", ""):
+            response.read()
+            # the content is stored decoded, so the transfer headers of the original response don't apply to it
+            self.entry = CacheEntry(str(response.request.url), response.status_code,
+                                    stored_headers(response.headers), response.content,
+                                    time.time() + self.ttl, response.headers.get("ETag"),
+                                    response.headers.get("Last-Modified"))
+            self.cache.backend.set(self.key, self.entry)
+        return response
+
+
+class ResponseCache:
+    """ Cache for GET responses of endpoints whose data rarely changes (certificate types, custom fields, roles).
+        Stale entries are revalidated with ETag/If-Modified-Since when the server sent validators.
+
+    Args:
+        ttls (dict): Seconds to keep a response, keyed by a glob of the resource URL like '/ssl/*/types'.
+                     Responses of other URLs are not cached. Defaults to CATALOG_TTLS.
+        backend: Storage with get/set/delete/keys/clear, defaults to an in-memory MemoryBackend. SQLiteBackend
+                 shares the cache between processes.
+
+    Example:
+        client = GEANTTCSClient(cache=ResponseCache({**CATALOG_TTLS, "/ssl/*/types": 600}))
+        client.cache.invalidate("/ssl/*")
+    """
+
+    def __init__(self, ttls: dict = None, backend=None):
+        self.ttls = dict(CATALOG_TTLS if ttls is None else ttls)
+        self.backend = backend if backend is not None else MemoryBackend()
+
+    def ttl(self, url: str):
+        """ TTL for the resource URL, None if it is not cached. """
+
+        path = url.split("?", 1)[0]
+        for pattern, ttl in self.ttls.items():
+            if fnmatch.fnmatchcase(path, pattern):
+                return ttl
+        return None
+
+    @staticmethod
+    def key(url: str, params, headers, credentials=None) -> str:
+        """ Cache key of a request. It includes the account so customers sharing a cache don't see each other's
+            data. Credentials in the request headers take precedence over the client's.
+        """
+
+        headers = {**(credentials.headers() if credentials is not None else {}), **(headers or {})}
+        query = str(httpx.QueryParams(params)) if params else ""
+        return f"{headers.get('customerUri')}|{headers.get('login')}|{url}?{query}"
+
+    def lookup(self, method: str, url: str, kwargs: dict, credentials=None):
+        """ CacheLookup for a cacheable request, None if the request bypasses the cache. """
+
+        if method != "GET":
+            return None
+        ttl = self.ttl(url)
+        if ttl is None:
+            return None
+        key = self.key(url, kwargs.get("params"), kwargs.get("headers"), credentials)
+        return CacheLookup(self, key, ttl, self.backend.get(key))
+
+    def invalidate(self, pattern: str = None):
+        """ Drop the cached responses whose resource URL matches the glob, or all of them. """
+
+        if pattern is None:
+            self.backend.clear()
+            return
+        for key in self.backend.keys():
+            url = key.split("|", 2)[2].split("?", 1)[0]
+            if fnmatch.fnmatchcase(url, pattern):
+                self.backend.delete(key)
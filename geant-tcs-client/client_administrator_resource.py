@@ -1,13 +1,9 @@
 
+from pagination import paginate, query
+from resource import Resource
 
-class ClientAdministratorResource:
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.login = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
+class ClientAdministratorResource(Resource):
 
     def create_client_admin(self, email: str):
         """ Create client admin’s account.
@@ -41,9 +37,7 @@ class ClientAdministratorResource:
         """
 
         url = f"/person/{self.version}/id/byEmail/{email}"
-        headers = {"Accept": "application/json", "customerUri": self.custom_uri,
-                   "login": self.username, "Content-Type": "application/json;charset=utf-8", "password": self.password}
-        response = self.client.post(url, headers=headers)
+        response = self.client.post(url, headers=self.json_headers)
         return response
 
     def update_client_admin(self, id, login: str, email: str, forename: str, surname: str, title: str, telephone: str,
@@ -81,14 +75,12 @@ class ClientAdministratorResource:
         """
 
         url = f"/admin/{self.version}/{id}"
-        headers = {"customerUri": self.custom_uri, "Accept": "application/json", "login": self.username,
-                   "Content-Type": "application/json;charset=utf-8", "password": self.password}
 
         credentials = [{"role": credentials_role, "orgId": credentials_org_id}]
         data = {"login": login, "email": email, "forename": forename, "surname": surname, "telephone": telephone,
                 "password": password, "privileges": privileges, "credentials": credentials}
 
-        response = self.client.put(url, headers=headers, data=data)
+        response = self.client.put(url, headers=self.json_headers, json=data)
         return response
 
     def delete_client_admin(self, id: int):
@@ -99,10 +91,8 @@ class ClientAdministratorResource:
         """
 
         url = f"/admin/{self.version}/{id}"
-        headers = {"login": self.username, "Content-Type": "application/json;charset=utf-8",
-                   "customerUri": self.custom_uri, "password": self.password, "Accept": "application/json"}
 
-        response = self.client.delete(url, headers=headers)
+        response = self.client.delete(url, headers=self.json_headers)
         return response
 
     def get_client_admins_list(self, size: int, **parameter):
@@ -134,17 +124,25 @@ class ClientAdministratorResource:
         """
 
         url = f"/admin/{self.version}/"
-        if parameter:
-            key, value = parameter.popitem()
-            url = f"{url}?{key}={value}"
-            for para in parameter:
-                url = f"{url}&{para}={parameter[para]}"
 
-        headers = {"login": self.username, "customerUri": self.custom_uri, "password": self.password}
-
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.headers, params=query(size=size, **parameter))
         return response
 
+    def iter_client_admins(self, size: int = 200, prefetch: bool = False, **filters):
+        """ Iterate over all Client Administrators matching the filters, fetching the pages lazily.
+
+        Args:
+            size (int): Count of entries per page
+            prefetch (bool): Request the next page while the current one is being consumed
+            **filters: Filters of get_client_admins_list, e.g. status='ACTIVE'
+
+        Returns:
+            Iterator of client admin records (async iterator with AsyncGEANTTCSClient)
+        """
+
+        return paginate(self.client, lambda position, page_size: self.get_client_admins_list(
+            page_size, position=position, **filters), size, prefetch=prefetch)
+
     def get_client_admin_details(self, id: int):
         """ Get client admin’s details
 
@@ -180,10 +178,8 @@ class ClientAdministratorResource:
         """
 
         url = f"/admin/{self.version}/{id}/"
-        headers = {"Accept": "application/json", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def get_client_admin_roles(self):
@@ -198,10 +194,8 @@ class ClientAdministratorResource:
         """
 
         url = f"/admin/{self.version}/roles"
-        headers = {"customerUri": self.custom_uri, "Accept": "application/json", "login": self.username,
-                   "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def get_client_admin_privileges(self, **role):
@@ -227,11 +221,9 @@ class ClientAdministratorResource:
         """
 
         url = f"/admin/{self.version}/privileges"
-        if role:
-            key, value = role.popitem()
-            url = f"{url}?{key}={value}"
-            for para in role:
-                url = f"{url}&{para}={role[para]}"
+
+        response = self.client.get(url, headers=self.json_headers, params=query(**role))
+        return response
 
     def get_password_state(self, state: str, expiration_date: str):
         """ State of Client Admin’s password
@@ -245,10 +237,8 @@ class ClientAdministratorResource:
         """
 
         url = f"/admin/{self.version}/password"
-        headers = {"Accept": "application/json", "login": self.username, "customerUri": self.custom_uri,
-                   "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def change_password(self, password: str):
@@ -266,10 +256,7 @@ class ClientAdministratorResource:
         """
 
         url = f"/admin/{self.version}/changepassword"
-        headers = {"Accept": "application/json", "customerUri": self.custom_uri,
-                   "Content-Type": "application/json;charset=UTF-8", "login": self.username,
-                   "password": self.password}
         data = {"newPassword": password}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
@@ -1,16 +1,15 @@
 
 import urllib.parse
 
+from concurrency import run_unordered
+from downloads import CHUNK_SIZE, download
+from models import ClientCertificate
+from pagination import page_records
+from resource import Resource
 
-class ClientCertificates:
-    """ Client resource is used to perform operation on Client Certificates """
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.login = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
+class ClientCertificates(Resource):
+    """ Client resource is used to perform operation on Client Certificates """
 
     def listing_client_certificate_types(self):
         """ A GET request will list all of SSL types.
@@ -27,10 +26,8 @@ class ClientCertificates:
          """
 
         url = f"/smime/{self.version}/types"
-        headers = {"login": self.username, "Accept": "application/json",  "customerUri": self.custom_uri,
-                  "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def custom_fields_for_client_certificate(self):
@@ -48,9 +45,7 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/customFields"
-        headers = {"Accept": "application/json", "customerUri": self.custom_uri, "login": self.username,
-                   "password": self.password}
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def enroll_client_certificate(self, org_id: int, csr: str, cert_type: int, term: int, email: str, phone: str,
@@ -83,13 +78,11 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/enroll"
-        headers = {"login": self.username, "Content-Type": "application/json;charset=utf-8",
-                   "customerUri": self.custom_uri, "password": self.password}
         data = {"orgId": org_id, "csr": csr, "certType": cert_type, "term": term, "email": email, "phone": phone,
                 "secondaryEmails": secondary_emails, "firstName": first_name, "middleName": middle_name,
                 "lastName": last_name, "customFields": custom_fields}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def collect_client_certificate(self, order_number: int):
@@ -100,11 +93,25 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/collect/{order_number}"
-        headers = {"login": self.username, "customerUri": self.custom_uri, "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.headers)
         return response
 
+    def download_client_certificate(self, order_number: int, destination, chunk_size: int = CHUNK_SIZE):
+        """ Collect a Client certificate like collect_client_certificate, streaming it into a file or sink.
+
+        Args:
+            order_number (int): Order number
+            destination: Path of the file, replaced atomically once complete, or an object with a write(bytes) method
+            chunk_size (int): Bytes written at a time
+
+        Returns:
+            Count of bytes written (awaitable with AsyncGEANTTCSClient)
+        """
+
+        url = f"/smime/{self.version}/collect/{order_number}"
+        return download(self.client, "GET", url, destination, chunk_size, headers=self.headers)
+
     def renew_client_certificate_by_order_number(self, order_number: int):
         """ Submission of a request for a new Client certificate using the CSR and parameters of the initial Client
             certificate. The initial certificate is defined by its order number.
@@ -114,9 +121,7 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/renew/order/{order_number}"
-        headers = {"Accept": "application/json", "login": self.username, "customerUri": self.custom_uri,
-                   "password": self.password}
-        response = self.client.get(url, headers=headers)
+        response = self.client.post(url, headers=self.json_headers)
         return response
 
     def renew_client_certificate_by_serial_number(self, serial: int):
@@ -128,10 +133,8 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/renew/serial/{serial}"
-        headers = {"Accept": "application/json", "customerUri": self.custom_uri, "login": self.username,
-                   "password": self.password}
 
-        response = self.client.post(url, headers=headers)
+        response = self.client.post(url, headers=self.json_headers)
         return response
 
     def replace_client_certificate_by_order_number(self, order_number: int, csr: str, reason: str, revoke: bool):
@@ -147,11 +150,9 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/replace/order/{order_number}"
-        headers = {"customerUri": self.custom_uri,  "Content-Type": "application/json;charset=utf-8",
-                   "login": self.username, "password": self.password}
         data = {"csr": csr, "reason": reason, "revoke": revoke}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def revoke_client_certificate_by_order_number(self, order_number: int, reason: str):
@@ -163,11 +164,9 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/revoke/order/{order_number}"
-        headers = {"Accept": "application/json", "customerUri": self.custom_uri, "login": self.username,
-                   "password": self.password}
         data = {"reason": reason}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def revoke_client_certificate_by_serial_number(self, serial_number: int, reason: str):
@@ -180,11 +179,9 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/revoke/serial/{serial_number}"
-        headers = {"Accept": "application/json", "login": self.username, "customerUri": self.custom_uri,
-                   "password": self.password}
         data = {"reason": reason}
 
-        response = self.client.get(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def revoke_all_client_certificate_related_to_email(self, reason: str, email: str):
@@ -197,11 +194,9 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/revoke"
-        headers = {"Accept": "application/json", "customerUri": self.custom_uri,
-                   "Content-Type": "application/json;charset=utf-8", "login": self.username, "password": self.password}
         data = {"email": email, "reason": reason}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def list_client_certificates_by_person_id(self, pid: int):
@@ -233,10 +228,8 @@ class ClientCertificates:
         """
 
         url = f"/smime/{self.version}/byPersonId/{pid}"
-        headers = {"Accept": "application/json", "login": self.username, "customerUri": self.custom_uri,
-                   "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def list_client_certificates_by_person_email(self, email: str):
@@ -274,8 +267,47 @@ class ClientCertificates:
         email = email.replace("-", "%2D").replace(".", "%2E").replace("_", "%5F").replace("~", "%7E")
 
         url = f"/smime/{self.version}/byPersonEmail/{email}"
-        headers = {"Accept": "application/json", "login": self.username, "customerUri": self.custom_uri,
-                   "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
+
+    def _list_client_certificates(self, person):
+        if isinstance(person, int):
+            return self.list_client_certificates_by_person_id(person)
+        return self.list_client_certificates_by_person_email(person)
+
+    def iter_client_certificates(self, persons, typed: bool = False, concurrency: int = 10):
+        """ List the Client certificates of many persons with up to `concurrency` requests in parallel.
+
+        Args:
+            persons (Iterable): Person IDs (int) or e-mails (str), consumed lazily
+            typed (bool): Yield lazily decoded ClientCertificate models instead of dicts
+            concurrency (int): Count of persons fetched in parallel
+
+        Returns:
+            Iterator of (person, certificates) in order of completion (async iterator with AsyncGEANTTCSClient)
+
+        Raises:
+            httpx.HTTPStatusError: The certificates of a person could not be fetched
+        """
+
+        model = ClientCertificate if typed else None
+        loads = self.client.serializer.loads
+        results = run_unordered(self.client, self._list_client_certificates, persons, concurrency)
+        if self.client.is_async:
+            return self._aiter_client_certificates(results, loads, model)
+        return self._iter_client_certificates(results, loads, model)
+
+    @staticmethod
+    def _iter_client_certificates(results, loads, model):
+        for person, response, error in results:
+            if error is not None:
+                raise error
+            yield person, page_records(response, loads, model)
+
+    @staticmethod
+    async def _aiter_client_certificates(results, loads, model):
+        async for person, response, error in results:
+            if error is not None:
+                raise error
+            yield person, page_records(response, loads, model)
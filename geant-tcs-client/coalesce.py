@@ -0,0 +1,153 @@
+
+import asyncio
+import fnmatch
+import functools
+import hashlib
+import threading
+import time
+
+import httpx
+
+from cache import ResponseCache, stored_headers
+from retry import IDEMPOTENT_POST_URLS
+
+
+def _copy(response: httpx.Response) -> httpx.Response:
+    """ Independent copy of a read response, so callers sharing a result can't affect each other. """
+
+    return httpx.Response(response.status_code, headers=stored_headers(response.headers), content=response.content,
+                          request=response.request)
+
+
+class _Call:
+    """ A request in flight which other callers wait for. """
+
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class SingleFlight:
+    """ Deduplicates identical concurrent requests: while a GET (or a read-only POST such as the DCV status check) is
+        in flight, further callers with the same method, URL, query, body and account wait for it and get a copy of
+        its response instead of sending their own request. Errors are shared the same way.
+
+        Finished responses can additionally be kept for a few seconds: successful ones for `ttl`, client errors like
+        404 for `negative_ttl`. Server errors and 429 are never kept. The default of 0 only joins requests which are
+        actually in flight at the same time.
+
+    Args:
+        ttl (float): Seconds a successful response is reused
+        negative_ttl (float): Seconds a 4xx response is reused
+        idempotent_urls (tuple): Globs of POST resource URLs which are safe to share
+
+    Example:
+        client = AsyncGEANTTCSClient(credentials, single_flight=SingleFlight(ttl=2, negative_ttl=5))
+    """
+
+    def __init__(self, ttl: float = 0.0, negative_ttl: float = 0.0, idempotent_urls: tuple = IDEMPOTENT_POST_URLS):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.idempotent_urls = idempotent_urls
+        self._calls = {}
+        self._futures = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def applies(self, method: str, url: str) -> bool:
+        if method == "GET":
+            return True
+        path = url.split("?", 1)[0]
+        return method == "POST" and any(fnmatch.fnmatchcase(path, glob) for glob in self.idempotent_urls)
+
+    @staticmethod
+    def key(method: str, url: str, kwargs: dict, credentials=None) -> str:
+        """ Key of a request: method, account, URL with query and a digest of the body. """
+
+        body = kwargs.get("content") or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest() if body else ""
+        return f"{method}|{ResponseCache.key(url, kwargs.get('params'), kwargs.get('headers'), credentials)}|{digest}"
+
+    def _cached(self, key: str):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires <= time.monotonic():
+            del self._results[key]
+            return None
+        return _copy(response)
+
+    def _store(self, key: str, response: httpx.Response):
+        if response.status_code == 429 or response.status_code >= 500:
+            return
+        ttl = self.negative_ttl if response.status_code >= 400 else self.ttl
+        if ttl > 0:
+            self._results[key] = (time.monotonic() + ttl, response)
+
+    def clear(self):
+        """ Drop the kept responses. """
+
+        with self._lock:
+            self._results.clear()
+
+    def run(self, key: str, send):
+        """ Response of send() for the key, shared with every caller asking for the same key meanwhile. """
+
+        with self._lock:
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return _copy(call.response)
+
+        try:
+            call.response = send()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._store(key, call.response)
+            call.done.set()
+        return call.response
+
+    async def arun(self, key: str, send):
+        """ Async twin of run, send() returns an awaitable. It runs in a task of its own which every caller only
+            waits for, so a caller which is cancelled or times out leaves the request to the others.
+        """
+
+        with self._lock:
+            cached = self._cached(key)
+        if cached is not None:
+            return cached
+        task = self._futures.get(key)
+        if task is not None:
+            return _copy(await asyncio.shield(task))
+
+        task = self._futures[key] = asyncio.get_running_loop().create_task(send())
+        task.add_done_callback(functools.partial(self._finished, key))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._futures.get(key) is task:
+            del self._futures[key]
+        # retrieve the outcome even if no caller is waiting for it anymore
+        if not task.cancelled() and task.exception() is None:
+            with self._lock:
+                self._store(key, task.result())
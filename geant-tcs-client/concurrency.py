@@ -0,0 +1,61 @@
+
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def map_unordered(func, items, concurrency: int = 10):
+    """ Call func for every item with up to `concurrency` calls running in threads and yield (item, result, error)
+        tuples as the calls complete. The items are consumed lazily, so it can be fed by a generator.
+
+    Args:
+        func (Callable): Called with one item
+        items (Iterable): Arguments for func
+        concurrency (int): Maximum count of calls running at the same time
+    """
+
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        while True:
+            for item in items:
+                pending[executor.submit(func, item)] = item
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                yield item, None if error else future.result(), error
+
+
+async def amap_unordered(func, items, concurrency: int = 10):
+    """ Async twin of map_unordered. func returns an awaitable; the calls run as tasks on the event loop. """
+
+    items = iter(items)
+    pending = {}
+    try:
+        while True:
+            for item in items:
+                pending[asyncio.ensure_future(func(item))] = item
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                error = task.exception()
+                yield item, None if error else task.result(), error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def run_unordered(client, func, items, concurrency: int = 10):
+    """ map_unordered for GEANTTCSClient, amap_unordered (async iterator) for AsyncGEANTTCSClient. """
+
+    if client.is_async:
+        return amap_unordered(func, items, concurrency)
+    return map_unordered(func, items, concurrency)
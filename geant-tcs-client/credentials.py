@@ -0,0 +1,27 @@
+
+from typing import NamedTuple
+
+
+class Credentials(NamedTuple):
+    """ Login of a client admin at a GÉANT TCS customer.
+
+    Args:
+        login (str): Client admin login
+        password (str): Client admin password
+        custom_uri (str): Customer URI
+    """
+
+    login: str
+    password: str
+    custom_uri: str
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """ Credentials from a config dict with the keys 'username', 'password' and 'custom_uri'. """
+
+        return cls(config.get("username"), config.get("password"), config.get("custom_uri"))
+
+    def headers(self) -> dict:
+        """ Authentication headers expected by every API endpoint. """
+
+        return {"login": self.login, "password": self.password, "customerUri": self.custom_uri}
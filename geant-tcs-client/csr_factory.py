@@ -0,0 +1,230 @@
+
+import asyncio
+import functools
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import httpx
+
+from concurrency import amap_unordered, map_unordered
+from optional import require
+
+CRYPTOGRAPHY_MISSING = "CSRFactory requires the 'cryptography' package (pip install geant-tcs-client[keygen])"
+
+
+class KeyRequest(NamedTuple):
+    """ Key and CSR to generate: the subject is CN=common_name, the DNS names and the e-mail (for Client certificates)
+        go into the subject alternative names. `name` is the file name of the key in the keystore, defaults to the
+        common name.
+    """
+
+    common_name: str
+    subject_alt_names: tuple = ()
+    email: str = None
+    name: str = None
+
+
+class GeneratedCSR(NamedTuple):
+    """ PEM encoded CSR of a KeyRequest and the keystore file holding its encrypted private key. """
+
+    request: KeyRequest
+    csr: str
+    key_path: str
+
+
+class KeyEnrollmentResult(NamedTuple):
+    """ Outcome of one key generation and enrollment: `generated` is None if the key generation failed, `response`
+        the enrollment response on success, `error` the error of whichever step failed.
+    """
+
+    request: KeyRequest
+    generated: GeneratedCSR = None
+    response: httpx.Response = None
+    error: Exception = None
+
+
+def key_file_name(request: KeyRequest) -> str:
+    """ Keystore file name of a request, e.g. '_wildcard.example.org.key.pem' for '*.example.org'. """
+
+    name = (request.name or request.common_name).replace("*", "_wildcard")
+    return re.sub(r"[^A-Za-z0-9._@-]", "_", name).lstrip(".") + ".key.pem"
+
+
+def _write_private(path: str, content: bytes, overwrite: bool):
+    """ Write a file readable by the owner only, atomically: the file appears complete or not at all. Without
+        overwrite, an existing file is never replaced, not even by a concurrent writer.
+    """
+
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        if overwrite:
+            os.replace(temporary, path)
+        else:
+            try:
+                os.link(temporary, path)
+            except FileExistsError:
+                raise FileExistsError(f"{path} exists, refusing to overwrite a private key") from None
+    finally:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+
+
+def generate_key(request: KeyRequest, keystore: str, passphrase: bytes, key_size: int = 4096,
+                 overwrite: bool = False) -> GeneratedCSR:
+    """ Generate an RSA key and its CSR, and store the key encrypted with the passphrase in the keystore directory.
+        Runs in the worker processes of CSRFactory; the private key never leaves the process that generated it.
+
+    Args:
+        request (KeyRequest): Subject of the key
+        keystore (str): Directory of the encrypted keys
+        passphrase (bytes): Passphrase the keys are encrypted with (PKCS#8, best available encryption)
+        key_size (int): RSA key size in bits
+        overwrite (bool): Replace an existing key file of the same name instead of failing
+    """
+
+    x509 = require("cryptography.x509", CRYPTOGRAPHY_MISSING)
+    hashes = require("cryptography.hazmat.primitives.hashes", CRYPTOGRAPHY_MISSING)
+    serialization = require("cryptography.hazmat.primitives.serialization", CRYPTOGRAPHY_MISSING)
+    rsa = require("cryptography.hazmat.primitives.asymmetric.rsa", CRYPTOGRAPHY_MISSING)
+    oid = require("cryptography.x509.oid", CRYPTOGRAPHY_MISSING)
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    builder = x509.CertificateSigningRequestBuilder().subject_name(
+        x509.Name([x509.NameAttribute(oid.NameOID.COMMON_NAME, request.common_name)]))
+    names = [x509.DNSName(name) for name in request.subject_alt_names]
+    if request.email:
+        names.append(x509.RFC822Name(request.email))
+    if names:
+        builder = builder.add_extension(x509.SubjectAlternativeName(names), critical=False)
+    csr = builder.sign(key, hashes.SHA256())
+
+    key_path = os.path.join(keystore, key_file_name(request))
+    _write_private(key_path, key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                               serialization.BestAvailableEncryption(passphrase)), overwrite)
+    return GeneratedCSR(request, csr.public_bytes(serialization.Encoding.PEM).decode("ascii"), key_path)
+
+
+def _enrollment_result(generated: GeneratedCSR, response, error: Exception) -> KeyEnrollmentResult:
+    if error is None and response.is_error:
+        error = httpx.HTTPStatusError(f"Enrolling {generated.request.common_name} failed with status "
+                                      f"{response.status_code}", request=response.request, response=response)
+    return KeyEnrollmentResult(generated.request, generated, response, error)
+
+
+class CSRFactory:
+    """ Generates private keys and CSRs in a pool of processes, so a rollout of thousands of certificates uses every
+        core instead of generating keys one after another under the GIL. Keys are written encrypted to the keystore
+        directory as '<name>.key.pem', only the CSRs come back to the caller.
+
+        enroll() streams every CSR into an enrollment request as soon as it is ready, so key generation and
+        enrollment overlap. generate() works on at most twice as many keys as there are processes at a time, enroll()
+        on at most `concurrency` requests, each being generated or enrolled.
+
+    Args:
+        keystore (str): Directory of the encrypted private keys, created with mode 0700 if needed
+        passphrase (bytes): Passphrase the private keys are encrypted with
+        processes (int): Worker processes, defaults to the count of CPUs
+        key_size (int): RSA key size in bits
+        overwrite (bool): Replace existing key files instead of failing the request
+
+    Example:
+        factory = CSRFactory("keys", passphrase=os.environb[b"KEYSTORE_PASSPHRASE"])
+        requests = (KeyRequest(host, (host,)) for host in hosts)
+        submit = lambda generated: ssl_certs.enroll_ssl_certificate(10557, generated.csr,
+                                                                    generated.request.common_name, 17945, 0, -1,
+                                                                    365, "", [], "")
+        for result in factory.enroll(client, requests, submit, concurrency=20):
+            print(result.request.common_name, result.error or client.json(result.response)["sslId"])
+    """
+
+    def __init__(self, keystore: str, passphrase: bytes, processes: int = None, key_size: int = 4096,
+                 overwrite: bool = False):
+        if not passphrase:
+            raise ValueError("An empty passphrase would store the private keys unencrypted")
+        require("cryptography", CRYPTOGRAPHY_MISSING)
+        self.keystore = keystore
+        self.passphrase = passphrase
+        self.processes = processes or os.cpu_count() or 1
+        self.key_size = key_size
+        self.overwrite = overwrite
+        os.makedirs(keystore, mode=0o700, exist_ok=True)
+
+    def _generate(self, processes, request: KeyRequest) -> GeneratedCSR:
+        """ Generate the key of a request in the process pool, waiting for it in the calling thread. """
+
+        return processes.submit(generate_key, request, self.keystore, self.passphrase, self.key_size,
+                                self.overwrite).result()
+
+    def generate(self, requests):
+        """ Generate keys and CSRs.
+
+        Args:
+            requests (Iterable[KeyRequest]): Keys to generate, consumed lazily
+
+        Returns:
+            Iterator of (request, GeneratedCSR, error) in order of completion; GeneratedCSR is None if the
+            generation failed.
+        """
+
+        with ProcessPoolExecutor(self.processes) as processes:
+            yield from map_unordered(functools.partial(self._generate, processes), requests, 2 * self.processes)
+
+    def enroll(self, client, requests, submit, concurrency: int = 20):
+        """ Generate keys and CSRs and enroll each one as soon as its CSR is ready.
+
+        Args:
+            client (GEANTTCSClient): Client of the resource used by submit, also accepts an AsyncGEANTTCSClient
+            requests (Iterable[KeyRequest]): Keys to generate, consumed lazily
+            submit (Callable): Called with a GeneratedCSR, returns the enrollment response (an awaitable with
+                               AsyncGEANTTCSClient), e.g. a lambda calling enroll_ssl_certificate,
+                               enroll_client_certificate or enroll_device_certificate
+            concurrency (int): Maximum count of requests being generated or enrolled at the same time
+
+        Returns:
+            Iterator of KeyEnrollmentResult in order of completion (async iterator with AsyncGEANTTCSClient). A failed
+            generation or enrollment is reported with its error and does not stop the others.
+        """
+
+        if client.is_async:
+            return self._aenroll(requests, submit, concurrency)
+        return self._enroll(requests, submit, concurrency)
+
+    def _enroll(self, requests, submit, concurrency: int):
+        def generate_and_enroll(request: KeyRequest) -> KeyEnrollmentResult:
+            try:
+                generated = self._generate(processes, request)
+            except Exception as error:
+                return KeyEnrollmentResult(request, error=error)
+            try:
+                return _enrollment_result(generated, submit(generated), None)
+            except Exception as error:
+                return _enrollment_result(generated, None, error)
+
+        with ProcessPoolExecutor(self.processes) as processes:
+            for request, result, error in map_unordered(generate_and_enroll, requests, concurrency):
+                yield result if error is None else KeyEnrollmentResult(request, error=error)
+
+    async def _aenroll(self, requests, submit, concurrency: int):
+        loop = asyncio.get_running_loop()
+
+        async def generate_and_enroll(request: KeyRequest) -> KeyEnrollmentResult:
+            try:
+                generated = await loop.run_in_executor(processes, generate_key, request, self.keystore,
+                                                       self.passphrase, self.key_size, self.overwrite)
+            except Exception as error:
+                return KeyEnrollmentResult(request, error=error)
+            try:
+                return _enrollment_result(generated, await submit(generated), None)
+            except Exception as error:
+                return _enrollment_result(generated, None, error)
+
+        with ProcessPoolExecutor(self.processes) as processes:
+            async for request, result, error in amap_unordered(generate_and_enroll, requests, concurrency):
+                yield result if error is None else KeyEnrollmentResult(request, error=error)
@@ -0,0 +1,196 @@
+
+import asyncio
+import inspect
+import time
+
+from concurrency import amap_unordered
+
+# States of a domain in a bulk validation. FAILED and VALIDATED are final.
+PENDING = "PENDING"
+STARTED = "STARTED"
+PUBLISHED = "PUBLISHED"
+SUBMITTED = "SUBMITTED"
+VALIDATED = "VALIDATED"
+FAILED = "FAILED"
+
+TRANSITIONS = {
+    PENDING: (STARTED, FAILED),
+    STARTED: (PUBLISHED, FAILED),
+    PUBLISHED: (SUBMITTED, VALIDATED, FAILED),
+    SUBMITTED: (VALIDATED, FAILED),
+    VALIDATED: (),
+    FAILED: (),
+}
+
+# DCV order statuses after which a submitted validation won't succeed any more
+FAILED_ORDER_STATUSES = ("FAILED", "EXPIRED", "REJECTED")
+
+METHODS = ("http", "https", "cname")
+
+
+class DomainValidation:
+    """ Progress of the validation of one domain.
+
+    Attributes:
+        domain (str): Domain being validated
+        state (str): PENDING, STARTED, PUBLISHED, SUBMITTED, VALIDATED or FAILED
+        challenge (dict): Answer of the start call: url/firstLine/secondLine for HTTP(S), host/point for CNAME
+        status (str): Last DCV status reported by the API
+        order_status (str): Last DCV order status reported by the API
+        error (Exception): Reason of the failure
+    """
+
+    __slots__ = ("domain", "state", "challenge", "status", "order_status", "error")
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.state = PENDING
+        self.challenge = None
+        self.status = None
+        self.order_status = None
+        self.error = None
+
+    def move(self, state: str, error: Exception = None):
+        if state not in TRANSITIONS[self.state]:
+            raise ValueError(f"{self.domain}: no transition from {self.state} to {state}")
+        self.state = state
+        self.error = error
+
+    def __repr__(self):
+        return f"DomainValidation({self.domain!r}, {self.state})"
+
+
+async def _call(hook, *args):
+    result = hook(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def _batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkDCV:
+    """ Domain Control Validation of many domains at once.
+
+        Every batch of domains goes through the state machine PENDING -> STARTED -> PUBLISHED -> SUBMITTED ->
+        VALIDATED: the validations are started concurrently, the collected challenges are handed to the `publish`
+        hook which puts the validation file or CNAME record in place, and the domains are submitted. Afterwards the
+        status of all submitted domains is polled until each one is validated, failed or timed out.
+
+    Args:
+        dcv (DomainControlValidationResource): Resource on an AsyncGEANTTCSClient
+        publish (Callable): Called with a list of STARTED DomainValidation of one batch, may be a coroutine
+                            function. Raising fails the whole batch.
+        method (str): Validation method, one of 'http', 'https' or 'cname'
+        unpublish (Callable): Optionally called with the list of finished DomainValidation to remove the challenges
+        concurrency (int): Maximum count of API calls in flight
+        batch_size (int): Count of domains started, published and submitted together
+        poll_interval (float): Seconds between two status checks of the submitted domains
+        timeout (float): Seconds after the submission a domain is given up if it is not validated
+
+    Example:
+        def publish(validations):
+            for validation in validations:
+                write_file(validation.challenge["url"], validation.challenge["firstLine"],
+                           validation.challenge["secondLine"])
+
+        results = asyncio.run(BulkDCV(dcv, publish).run(domains))
+    """
+
+    def __init__(self, dcv, publish, method: str = "http", unpublish=None, concurrency: int = 20,
+                 batch_size: int = 100, poll_interval: float = 60.0, timeout: float = 3600.0):
+        if method not in METHODS:
+            raise ValueError(f"Unsupported DCV method {method!r}, expected one of {METHODS}")
+        self.dcv = dcv
+        self.publish = publish
+        self.method = method
+        self.unpublish = unpublish
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._start = getattr(dcv, f"start_validation_{method}")
+        self._submit = getattr(dcv, f"submit_validation_{method}")
+
+    def _json(self, response):
+        response.raise_for_status()
+        return self.dcv.client.json(response)
+
+    async def _each(self, call, validations: list):
+        """ Call the API for every validation concurrently and yield (validation, decoded answer, error). """
+
+        async for validation, response, error in amap_unordered(lambda v: call(v.domain), validations,
+                                                                self.concurrency):
+            answer = None
+            if error is None:
+                try:
+                    answer = self._json(response)
+                except Exception as exception:
+                    error = exception
+            yield validation, answer, error
+
+    def _record_status(self, validation: DomainValidation, answer: dict):
+        validation.status = answer.get("status")
+        validation.order_status = answer.get("orderStatus")
+        if validation.status == "VALIDATED":
+            validation.move(VALIDATED)
+        elif validation.order_status in FAILED_ORDER_STATUSES:
+            validation.move(FAILED, RuntimeError(answer.get("message") or f"DCV order {validation.order_status}"))
+
+    async def _run_batch(self, batch: list):
+        async for validation, answer, error in self._each(self._start, batch):
+            if error is not None:
+                validation.move(FAILED, error)
+            else:
+                validation.challenge = answer
+                validation.move(STARTED)
+
+        started = [validation for validation in batch if validation.state == STARTED]
+        if not started:
+            return
+        try:
+            await _call(self.publish, started)
+        except Exception as error:
+            for validation in started:
+                validation.move(FAILED, error)
+            return
+        for validation in started:
+            validation.move(PUBLISHED)
+
+        async for validation, answer, error in self._each(self._submit, started):
+            if error is not None:
+                validation.move(FAILED, error)
+                continue
+            validation.move(SUBMITTED)
+            self._record_status(validation, answer)
+
+    async def _track(self, validations: list):
+        deadline = time.monotonic() + self.timeout
+        submitted = [validation for validation in validations if validation.state == SUBMITTED]
+        while submitted:
+            if time.monotonic() >= deadline:
+                for validation in submitted:
+                    validation.move(FAILED, TimeoutError(f"{validation.domain} not validated after "
+                                                         f"{self.timeout} seconds"))
+                return
+            await asyncio.sleep(self.poll_interval)
+            async for validation, answer, error in self._each(self.dcv.get_validation_status, submitted):
+                # a failed status check is retried with the next round
+                if error is None:
+                    self._record_status(validation, answer)
+            submitted = [validation for validation in submitted if validation.state == SUBMITTED]
+
+    async def run(self, domains) -> list:
+        """ Validate the domains and return a DomainValidation for each, in input order. """
+
+        validations = [DomainValidation(domain) for domain in domains]
+        for batch in _batches(validations, self.batch_size):
+            await self._run_batch(batch)
+        await self._track(validations)
+
+        if self.unpublish is not None:
+            await _call(self.unpublish, [validation for validation in validations if validation.challenge])
+        return validations
@@ -1,16 +1,12 @@
 
 import urllib.parse
 
+from downloads import CHUNK_SIZE, download
+from resource import Resource
 
-class DeviceCertificates:
-    """ Client resource is used to perform operation on Client Certificates """
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.login = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
+class DeviceCertificates(Resource):
+    """ Client resource is used to perform operation on Client Certificates """
 
     def device_certificate_types(self, ):
         """ The certain combinations of certificate parameters such as key usage, extended key usage, certificate term
@@ -30,10 +26,8 @@ class DeviceCertificates:
          """
 
         url = f"/device/{self.version}/types"
-        headers = {"login": self.username, "Accept": "application/json",  "customerUri": self.custom_uri,
-                  "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def custom_fields_for_device_certificate(self):
@@ -51,14 +45,12 @@ class DeviceCertificates:
         """
 
         url = f"/device/{self.version}/customFields"
-        headers = {"Accept": "application/json", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
-    def enroll_device_certificate(self, org_id: int, csr: str, cert_type: int, **custom_fields: dict,
-                                  **optional_fields: dict):
+    def enroll_device_certificate(self, org_id: int, csr: str, cert_type: int, custom_fields: list,
+                                  optional_fields: list):
         """ Creation and submission of a request for a new Device certificate.
 
         Args:
@@ -86,13 +78,11 @@ class DeviceCertificates:
         """
 
         url = f"/device/{self.version}/enroll"
-        headers = {"customerUri": self.custom_uri, "login": self.username,
-        "Content-Type": "application/json;charset=utf-8", "password": self.password}
 
         data = {"orgId": org_id, "csr": csr, "certType": cert_type, "customFields": custom_fields,
                 "optionalFields": optional_fields}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def collect_device_certificate(self, order_number: int, format_type: str):
@@ -109,11 +99,27 @@ class DeviceCertificates:
         """
 
         url = f"/device/{self.version}/collect/{order_number}/{format_type}"
-        headers = {"customerUri": self.custom_uri, "login": self.username, "password": self.password}
 
-        response = self.client.post(url, headers=headers)
+        response = self.client.post(url, headers=self.headers)
         return response
 
+    def download_device_certificate(self, order_number: int, format_type: str, destination,
+                                    chunk_size: int = CHUNK_SIZE):
+        """ Collect a Device certificate like collect_device_certificate, streaming it into a file or sink.
+
+        Args:
+            order_number (int): Certificate ID
+            format_type (str): Format type name for certificate, see collect_device_certificate
+            destination: Path of the file, replaced atomically once complete, or an object with a write(bytes) method
+            chunk_size (int): Bytes written at a time
+
+        Returns:
+            Count of bytes written (awaitable with AsyncGEANTTCSClient)
+        """
+
+        url = f"/device/{self.version}/collect/{order_number}/{format_type}"
+        return download(self.client, "POST", url, destination, chunk_size, headers=self.headers)
+
     def revoke_device_certificate_by_order_number(self, order_number: int, reason: str):
         """ Sending a request to CA to add the Device certificate under the particular order number to certificate
             revocation list.
@@ -126,11 +132,9 @@ class DeviceCertificates:
         """
 
         url = f"/device/{self.version}/revoke/order/{order_number}"
-        headers = {"customerUri": self.custom_uri, "Content-Type": "application/json;charset=utf-8",
-                   "login": self.username, "password": self.password}
         data = {"reason": reason}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def revoke_device_certificate_by_serial_number(self, serial_number: int, reason: str):
@@ -143,11 +147,9 @@ class DeviceCertificates:
         """
 
         url = f"/device/{self.version}/revoke/serial/{serial_number}"
-        headers = {"login": self.username, "Content-Type": "application/json;charset=utf-8",
-                   "customerUri": self.custom_uri, "password": self.password}
         data = {"reason": reason}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def renew_device_certificate_by_order_number(self, order_number: int):
@@ -162,10 +164,8 @@ class DeviceCertificates:
         """
 
         url = f"/device/{self.version}/renew/order/{order_number}"
-        headers = {"Content-Type": "application/json;charset=utf-8", "customerUri": self.custom_uri,
-                   "login": self.username, "password": self.password}
 
-        response = self.client.post(url, headers=headers)
+        response = self.client.post(url, headers=self.json_headers)
         return response
 
     def renew_device_certificate_by_serial_number(self, serial_number: int):
@@ -180,10 +180,8 @@ class DeviceCertificates:
         """
 
         url = f"/device/{self.version}/renew/serial/{serial_number}"
-        headers = {"login": self.username, "Content-Type": "application/json;charset=utf-8",
-                   "customerUri": self.custom_uri, "password": self.password}
 
-        response = self.client.post(url, headers=headers)
+        response = self.client.post(url, headers=self.json_headers)
         return response
 
     def replace_device_certificate_by_order_number(self, order_number: int, csr: str, reason: str, revoke: bool):
@@ -199,9 +197,7 @@ class DeviceCertificates:
         """
 
         url = f"/device/{self.version}/replace/order/{order_number}"
-        headers = {"login": self.username, "Content-Type": "application/json;charset=utf-8",
-                   "customerUri": self.custom_uri, "password": self.password}
         data = {"csr": csr, "reason": reason, "revoke": revoke}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
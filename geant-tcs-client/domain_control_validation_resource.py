@@ -1,17 +1,15 @@
 
-class DomainControlValidationResource:
+from models import DCVDomain
+from pagination import fetch_all, paginate, query
+from resource import Resource
+
+
+class DomainControlValidationResource(Resource):
     """ Any domain added to SCM must pass Domain Control Validation (DCV) before Sectigo can issue certificates to it.
         DCV is a procedure of validation of the Applicant’s control of the domain which needs to appear in the subject
         of the certificate. This resource is used to perform DCV.
     """
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.login = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
-
     def start_validation_http(self, domains: str):
         """ Start Domain Control Validation using HTTP method.
 
@@ -31,10 +29,8 @@ class DomainControlValidationResource:
         data = {"domain": domains}
 
         url = f"/dcv/{self.version}/validation/start/domain/http"
-        headers = {"Content-Type": "application/json;charset=utf-8", "login": self.username,
-                   "customerUri": self.custom_uri, "password": self.password}
 
-        response = self.client.post(url, headers=headers)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def start_validation_https(self, domains: str):
@@ -56,10 +52,8 @@ class DomainControlValidationResource:
         data = {"domain": domains}
 
         url = f"/dcv/{self.version}/validation/start/domain/https"
-        headers = {"Content-Type": "application/json;charset=utf-8", "login": self.username,
-                   "customerUri": self.custom_uri, "password": self.password}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def start_validation_cname(self, domains: str):
@@ -79,11 +73,9 @@ class DomainControlValidationResource:
          """
         data = {"domain": domains}
 
-        url = f"/dcv/{self.version}/validation/start/domain/https"
-        headers = {"Content-Type": "application/json;charset=utf-8", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
+        url = f"/dcv/{self.version}/validation/start/domain/cname"
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def submit_validation_http(self, domain: str):
@@ -107,11 +99,9 @@ class DomainControlValidationResource:
          """
         data = {"domain": domain}
 
-        url = f"/dcv/{self.version}/validation/submit/domain/https"
-        headers = {"Content-Type": "application/json;charset=utf-8", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
+        url = f"/dcv/{self.version}/validation/submit/domain/http"
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def submit_validation_https(self, domain: str):
@@ -136,10 +126,8 @@ class DomainControlValidationResource:
         data = {"domain": domain}
 
         url = f"/dcv/{self.version}/validation/submit/domain/https"
-        headers = {"Content-Type": "application/json;charset=utf-8", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def submit_validation_cname(self, domain: str):
@@ -164,10 +152,8 @@ class DomainControlValidationResource:
         data = {"domain": domain}
 
         url = f"/dcv/{self.version}/validation/submit/domain/cname"
-        headers = {"Content-Type": "application/json;charset=utf-8", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def submit_validation_email(self, domain: str):
@@ -192,10 +178,8 @@ class DomainControlValidationResource:
         data = {"domain": domain}
 
         url = f"/dcv/{self.version}/validation/submit/domain/email"
-        headers = {"Content-Type": "application/json;charset=utf-8", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def get_validation_status(self, domain: str):
@@ -211,7 +195,6 @@ class DomainControlValidationResource:
             orderStatus (str): Validation order status
             expiration_date (str): Validation expiration date
 
-
         Example:
             HTTP/1.1 200 OK
             Content-Type: application/json
@@ -223,21 +206,20 @@ class DomainControlValidationResource:
         data = {"domain": domain}
 
         url = f"/dcv/{self.version}/validation/status"
-        headers = {"Content-Type": "application/json;charset=utf-8", "login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
-    def search_domains(self, position: int, size: int, domain: str, org: int, department: int, dcv_status: str,
-                       order_status: str, expires_in: int):
+    def search_domains(self, position: int = None, size: int = None, domain: str = None, org: int = None,
+                       department: int = None, dcv_status: str = None, order_status: str = None,
+                       expires_in: int = None):
         """ Obtain the result of Domain Control Validation procedure as a validation statuses.
 
         Args:
             position (int): Position shift
             size (int): Count of entries
             domain (str): Count of entries
-            org (int): Organization ID # TODO could be empty? See org=&
+            org (int): Organization ID
             department (int): Department ID
             dcv_status (str): DCV Status
             order_status (str): DCV Order status
@@ -258,10 +240,43 @@ class DomainControlValidationResource:
             [{"domain":"ccmqa.com","dcvStatus":"NOT_VALIDATED","dcvOrderStatus":"NOT_INITIATED","dcvMethod":null}]
          """
 
-        url = f"/dcv/{self.version}/validation?size={size}&position={position}&domain={domain}&org={org}&" \
-              f"department={department}&dcvStatus={dcv_status}&orderStatus={order_status}&expiresIn={expires_in}"
-        headers = {"login": self.username, "password": self.password,
-                   "customerUri": self.custom_uri, "Accept": "application/json"}
+        url = f"/dcv/{self.version}/validation"
+        params = query(size=size, position=position, domain=domain, org=org, department=department,
+                       dcvStatus=dcv_status, orderStatus=order_status, expiresIn=expires_in)
+
+        response = self.client.get(url, headers=self.json_headers, params=params)
+        return response
+
+    def iter_domains(self, size: int = 200, prefetch: bool = False, typed: bool = False, **filters):
+        """ Iterate over all DCV domains matching the filters, fetching the pages lazily.
+
+        Args:
+            size (int): Count of entries per page
+            prefetch (bool): Request the next page while the current one is being consumed
+            typed (bool): Yield lazily decoded DCVDomain models instead of dicts
+            **filters: Filters of search_domains, e.g. dcv_status='VALIDATED'
+
+        Returns:
+            Iterator of DCV domain records (async iterator with AsyncGEANTTCSClient)
+        """
+
+        return paginate(self.client, lambda position, page_size: self.search_domains(
+            position=position, size=page_size, **filters), size, prefetch=prefetch,
+            model=DCVDomain if typed else None)
+
+    def fetch_all_domains(self, size: int = 500, concurrency: int = 8, typed: bool = False, **filters):
+        """ Fetch all DCV domains matching the filters with `concurrency` pages requested in parallel.
+
+        Args:
+            size (int): Count of entries per page
+            concurrency (int): Count of pages fetched in parallel, bounded by the connection pool of the client
+            typed (bool): Return lazily decoded DCVDomain models instead of dicts
+            **filters: Filters of search_domains
+
+        Returns:
+            List of DCV domain records in listing order (awaitable with AsyncGEANTTCSClient)
+        """
 
-        response = self.client.get(url, headers=headers)
-        return response
\ No newline at end of file
+        return fetch_all(self.client, lambda position, page_size: self.search_domains(
+            position=position, size=page_size, **filters), size, concurrency,
+            model=DCVDomain if typed else None)
@@ -0,0 +1,214 @@
+
+import contextlib
+import os
+import tempfile
+from typing import NamedTuple
+
+import httpx
+
+from concurrency import run_unordered
+
+CHUNK_SIZE = 64 * 1024
+
+# File extension of a collect or keystore format
+EXTENSIONS = {
+    "x509": "crt",
+    "x509CO": "crt",
+    "x509IO": "crt",
+    "x509IOR": "crt",
+    "base64": "p7b",
+    "bin": "p7b",
+    "pem": "pem",
+    "pemco": "pem",
+    "p12": "p12",
+    "key": "key",
+}
+
+
+class DownloadResult(NamedTuple):
+    """ Outcome of one download: the file and its size on success, otherwise the error. """
+
+    id: object
+    path: str = None
+    size: int = 0
+    error: Exception = None
+
+
+def default_layout(kind: str, id, format_type: str = None) -> str:
+    """ Path of a download relative to the target directory, e.g. 'ssl/2414.crt' or 'keystore/2414.p12'.
+
+    Args:
+        kind (str): 'ssl', 'smime', 'device' or 'keystore'
+        id: SSL ID or order number
+        format_type (str): Collect or keystore format, None for Client certificates (PKCS#7)
+    """
+
+    extension = EXTENSIONS.get(format_type, format_type) if format_type else "p7b"
+    return os.path.join(kind, f"{id}.{extension}")
+
+
+@contextlib.contextmanager
+def atomic_file(path: str):
+    """ Binary file object which replaces `path` only once the block completes, so readers never see a partial
+        download and a failed one leaves any previous file in place.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+
+
+def _sink(destination):
+    """ Context of the file object to write to: a caller-provided sink as is, a path as atomic_file. """
+
+    if hasattr(destination, "write"):
+        return contextlib.nullcontext(destination)
+    return atomic_file(os.fspath(destination))
+
+
+def _status_error(response: httpx.Response) -> httpx.HTTPStatusError:
+    return httpx.HTTPStatusError(f"Download of {response.request.url} failed with status {response.status_code}: "
+                                 f"{response.text[:200]}", request=response.request, response=response)
+
+
+def _download(client, method: str, url: str, destination, chunk_size: int, kwargs: dict) -> int:
+    size = 0
+    with client.stream(method, url, **kwargs) as response:
+        if response.status_code != 200:
+            response.read()
+            raise _status_error(response)
+        with _sink(destination) as sink:
+            for chunk in response.iter_bytes(chunk_size):
+                sink.write(chunk)
+                size += len(chunk)
+    return size
+
+
+async def _adownload(client, method: str, url: str, destination, chunk_size: int, kwargs: dict) -> int:
+    size = 0
+    async with client.stream(method, url, **kwargs) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise _status_error(response)
+        with _sink(destination) as sink:
+            async for chunk in response.aiter_bytes(chunk_size):
+                sink.write(chunk)
+                size += len(chunk)
+    return size
+
+
+def download(client, method: str, url: str, destination, chunk_size: int = CHUNK_SIZE, **kwargs):
+    """ Stream a response body into a file or sink without holding it in memory. Anything but 200 is an error, in
+        particular a collect of a certificate which isn't issued yet.
+
+    Args:
+        client (GEANTTCSClient): Client to send the request with, also accepts an AsyncGEANTTCSClient
+        method (str): HTTP method
+        url (str): Resource URL or absolute URL
+        destination: Path of the file, written atomically, or an object with a write(bytes) method
+        chunk_size (int): Bytes written at a time
+        **kwargs: Arguments of the request, e.g. headers
+
+    Returns:
+        Count of bytes written (awaitable with AsyncGEANTTCSClient)
+    """
+
+    if client.is_async:
+        return _adownload(client, method, url, destination, chunk_size, kwargs)
+    return _download(client, method, url, destination, chunk_size, kwargs)
+
+
+def keystore_link(client, response: httpx.Response) -> str:
+    """ Download link of a link_to_download_private_key_or_whole_certificate response. """
+
+    response.raise_for_status()
+    try:
+        return client.json(response)["link"]
+    except (ValueError, KeyError, TypeError):
+        return response.text.strip()
+
+
+class Downloader:
+    """ Downloads many certificates or keystores in parallel into a directory tree, each streamed to its own file
+        with atomic rename, so bulk collection doesn't hold the bodies in memory and never leaves partial files.
+
+    Args:
+        directory (str): Root of the downloads, see default_layout for the files below it
+        ssl_certs (SSLCertificates): Resource for ssl_certificates and keystores
+        client_certs (ClientCertificates): Resource for client_certificates
+        device_certs (DeviceCertificates): Resource for device_certificates
+        concurrency (int): Maximum count of downloads in flight
+        chunk_size (int): Bytes written at a time
+        layout (Callable): Called with (kind, id, format_type), returns the path relative to directory
+
+    Example:
+        downloader = Downloader("certificates", ssl_certs=SSLCertificates(client), concurrency=20)
+        for result in downloader.ssl_certificates(ssl_ids, "x509"):
+            print(result.id, result.path if result.error is None else result.error)
+    """
+
+    def __init__(self, directory: str, ssl_certs=None, client_certs=None, device_certs=None, concurrency: int = 10,
+                 chunk_size: int = CHUNK_SIZE, layout=default_layout):
+        self.directory = directory
+        self.ssl_certs = ssl_certs
+        self.client_certs = client_certs
+        self.device_certs = device_certs
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.layout = layout
+
+    def _run(self, resource, ids, download, kind: str, format_type: str = None):
+        """ DownloadResult of every ID in order of completion (async iterator with AsyncGEANTTCSClient). """
+
+        if resource is None:
+            raise ValueError(f"Downloader needs the {kind} resource for this download")
+
+        def path(id) -> str:
+            return os.path.join(self.directory, self.layout(kind, id, format_type))
+
+        results = run_unordered(resource.client, lambda id: download(id, path(id)), ids, self.concurrency)
+        if resource.client.is_async:
+            return self._aresults(results, path)
+        return (DownloadResult(id, path(id), size) if error is None else DownloadResult(id, error=error)
+                for id, size, error in results)
+
+    @staticmethod
+    async def _aresults(results, path):
+        async for id, size, error in results:
+            yield DownloadResult(id, path(id), size) if error is None else DownloadResult(id, error=error)
+
+    def ssl_certificates(self, ssl_ids, format_type: str = "x509"):
+        """ Collect SSL certificates into '<directory>/ssl/'. """
+
+        return self._run(self.ssl_certs, ssl_ids, lambda ssl_id, path: self.ssl_certs.download_ssl_certificate(
+            ssl_id, format_type, path, self.chunk_size), "ssl", format_type)
+
+    def client_certificates(self, order_numbers):
+        """ Collect Client certificates into '<directory>/smime/'. """
+
+        return self._run(self.client_certs, order_numbers, lambda order_number, path:
+                         self.client_certs.download_client_certificate(order_number, path, self.chunk_size), "smime")
+
+    def device_certificates(self, order_numbers, format_type: str = "x509"):
+        """ Collect Device certificates into '<directory>/device/'. """
+
+        return self._run(self.device_certs, order_numbers, lambda order_number, path:
+                         self.device_certs.download_device_certificate(order_number, format_type, path,
+                                                                       self.chunk_size), "device", format_type)
+
+    def keystores(self, ssl_ids, format_type: str = "p12"):
+        """ Download private keys or PKCS#12 bundles from the Private Key Store into '<directory>/keystore/'. """
+
+        return self._run(self.ssl_certs, ssl_ids, lambda ssl_id, path:
+                         self.ssl_certs.download_private_key_or_whole_certificate(ssl_id, format_type, path,
+                                                                                  self.chunk_size),
+                         "keystore", format_type)
@@ -0,0 +1,201 @@
+
+import csv
+import itertools
+import json
+
+from concurrency import map_unordered
+from inventory import SSL_STATUSES
+from models import Model
+from optional import require
+
+PYARROW_MISSING = "Parquet export requires the 'pyarrow' package (pip install geant-tcs-client[parquet])"
+
+# Fixed column schemas of the exports: (API field, type) with the types 'int', 'str' and 'list' (of strings).
+# The SSL listing only returns the first four fields, the status is the one the certificates were listed under and
+# the expiry comes from the details (details=True of export_ssl_certificates).
+SSL_CERTIFICATE_SCHEMA = (
+    ("sslId", "int"),
+    ("commonName", "str"),
+    ("subjectAlternativeNames", "list"),
+    ("serialNumber", "str"),
+    ("status", "str"),
+    ("expires", "str"),
+)
+
+PERSON_SCHEMA = (
+    ("id", "int"),
+    ("organizationId", "int"),
+    ("email", "str"),
+    ("firstName", "str"),
+    ("middleName", "str"),
+    ("lastName", "str"),
+    ("validationType", "str"),
+    ("phone", "str"),
+    ("commonName", "str"),
+    ("secondaryEmails", "list"),
+)
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+def _coerce(value, kind: str):
+    if value is None or value == "":
+        return None
+    if kind == "int":
+        return int(value)
+    if kind == "list":
+        return [str(item) for item in value] if isinstance(value, list) else \
+            [item.strip() for item in str(value).split(",")]
+    return str(value)
+
+
+def _rows(records, schema: tuple):
+    """ Records (dicts or models) reduced and coerced to the schema, one dict per record. """
+
+    for record in records:
+        if isinstance(record, Model):
+            record = record.to_dict()
+        yield {name: _coerce(record.get(name), kind) for name, kind in schema}
+
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _write_csv(rows, path: str, schema: tuple) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, [name for name, _ in schema])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({name: ",".join(value) if isinstance(value, list) else value
+                             for name, value in row.items()})
+            count += 1
+    return count
+
+
+def _write_jsonl(rows, path: str, schema: tuple) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for row in rows:
+            file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def arrow_schema(schema: tuple):
+    """ pyarrow schema of an export schema. """
+
+    pyarrow = require("pyarrow", PYARROW_MISSING)
+    types = {"int": pyarrow.int64(), "str": pyarrow.string(), "list": pyarrow.list_(pyarrow.string())}
+    return pyarrow.schema([(name, types[kind]) for name, kind in schema])
+
+
+def _write_parquet(rows, path: str, schema: tuple, batch_size: int) -> int:
+    table_schema = arrow_schema(schema)
+    pyarrow = require("pyarrow", PYARROW_MISSING)
+    parquet = require("pyarrow.parquet", PYARROW_MISSING)
+    count = 0
+    writer = parquet.ParquetWriter(path, table_schema)
+    try:
+        for batch in _batches(rows, batch_size):
+            columns = {name: [row[name] for row in batch] for name, _ in schema}
+            writer.write_table(pyarrow.Table.from_pydict(columns, schema=table_schema))
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
+
+
+def export_records(records, path: str, schema: tuple, format: str = None, batch_size: int = 10000) -> int:
+    """ Stream records to a CSV, JSON lines or Parquet file. Only one record (one batch of `batch_size` records for
+        Parquet) is held in memory at a time, so pass a lazy iterator such as iter_ssl_certificates.
+
+    Args:
+        records (Iterable): Records as dicts or models
+        path (str): Output file
+        schema (tuple): Columns as (API field, type) pairs, e.g. SSL_CERTIFICATE_SCHEMA. Other fields are dropped,
+                        missing ones are empty.
+        format (str): 'csv', 'jsonl' or 'parquet', defaults to the file extension
+        batch_size (int): Rows per Parquet record batch
+
+    Returns:
+        Count of exported records
+    """
+
+    format = format or path.rsplit(".", 1)[-1].lower()
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported export format {format!r}, expected one of {FORMATS}")
+    rows = _rows(records, schema)
+    if format == "csv":
+        return _write_csv(rows, path, schema)
+    if format == "jsonl":
+        return _write_jsonl(rows, path, schema)
+    return _write_parquet(rows, path, schema, batch_size)
+
+
+def _ssl_records(ssl_certs, size: int, filters: dict):
+    """ Listing rows of the SSL certificates with the status they were listed under, status by status unless the
+        filters restrict it.
+    """
+
+    statuses = (filters.pop("status"),) if "status" in filters else SSL_STATUSES
+    return itertools.chain.from_iterable(
+        (dict(record, status=status) for record in ssl_certs.iter_ssl_certificates(size=size, prefetch=True,
+                                                                                   status=status, **filters))
+        for status in statuses)
+
+
+def _with_details(ssl_certs, records, concurrency: int):
+    """ Records completed with the fields of ssl_certificate_details, in order of completion. """
+
+    loads = ssl_certs.client.serializer.loads
+    for record, response, error in map_unordered(lambda record: ssl_certs.ssl_certificate_details(record["sslId"]),
+                                                 records, concurrency):
+        if error is not None:
+            raise error
+        response.raise_for_status()
+        yield dict(record, **loads(response.content))
+
+
+def export_ssl_certificates(ssl_certs, path: str, format: str = None, size: int = 500, details: bool = False,
+                            concurrency: int = 10, **filters) -> int:
+    """ Export the SSL certificates matching the filters page by page, see export_records. The columns are those of
+        SSL_CERTIFICATE_SCHEMA: the listing fields, the status the certificates were listed under (every status is
+        listed separately unless filtered) and, with details, the expiry.
+
+    Args:
+        ssl_certs (SSLCertificates): Resource on a GEANTTCSClient
+        path (str): Output file
+        format (str): 'csv', 'jsonl' or 'parquet', defaults to the file extension
+        size (int): Count of entries per page
+        details (bool): Fetch the details of every certificate for the expiry, one request per certificate
+        concurrency (int): Count of details fetched in parallel
+        **filters: Filters of listing_ssl_certificates
+    """
+
+    records = _ssl_records(ssl_certs, size, filters)
+    if details:
+        records = _with_details(ssl_certs, records, concurrency)
+    return export_records(records, path, SSL_CERTIFICATE_SCHEMA, format)
+
+
+def export_persons(persons, path: str, format: str = None, size: int = 500, **filters) -> int:
+    """ Export the persons matching the filters page by page, see export_records.
+
+    Args:
+        persons (PersonResource): Resource on a GEANTTCSClient
+        path (str): Output file
+        format (str): 'csv', 'jsonl' or 'parquet', defaults to the file extension
+        size (int): Count of entries per page
+        **filters: Filters of list_persons
+    """
+
+    return export_records(persons.iter_persons(size=size, prefetch=True, **filters), path, PERSON_SCHEMA, format)
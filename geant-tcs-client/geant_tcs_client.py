@@ -1,11 +1,333 @@
 
+import asyncio
+import contextlib
+import time
+
 import httpx
 
+from credentials import Credentials
+from retry import RetryPolicy
+from serializers import default_serializer
+
+BASE_URL = "https://cert-manager.com/api"
+
+
+def _client_options(credentials: Credentials, base_url: str, max_connections: int, max_keepalive_connections: int,
+                    keepalive_expiry: float, timeout: float, connect_timeout: float, http2: bool, transport) -> dict:
+    """ Keyword arguments shared by the sync and the async httpx client. """
+
+    headers = credentials.headers() if credentials is not None else {}
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections,
+                          keepalive_expiry=keepalive_expiry)
+    timeout = httpx.Timeout(timeout, connect=connect_timeout)
+    options = {"base_url": base_url, "headers": headers, "limits": limits, "timeout": timeout, "http2": http2}
+    if transport is not None:
+        options["transport"] = transport
+    return options
+
+
+def _encode_json(serializer, kwargs: dict):
+    """ Replace a json= request body by its serialized content, so all bodies go through the configured serializer. """
+
+    if "json" not in kwargs:
+        return
+    kwargs["content"] = serializer.dumps(kwargs.pop("json"))
+    headers = kwargs.get("headers") or {}
+    if not any(name.lower() == "content-type" for name in headers):
+        kwargs["headers"] = {**headers, "Content-Type": "application/json"}
+
+
+def _finish(started: list, response: httpx.Response = None, error: BaseException = None, retries: int = 0):
+    """ Report the outcome of a request to the instruments which saw it start. """
+
+    for instrument, request in started:
+        instrument.finish(request, response, error, retries)
+
 
 class GEANTTCSClient:
+    """ Synchronous client for the GÉANT TCS API. All resource objects share one instance of it and therefore one
+        connection pool, so consecutive calls reuse open TLS connections instead of doing a new handshake.
+
+    Args:
+        credentials (Credentials): Sent as default headers with every request of every resource sharing the client
+        base_url (str): API root the resource URLs (e.g. '/ssl/v1/types') are resolved against
+        max_connections (int): Maximum number of concurrent connections in the pool
+        max_keepalive_connections (int): Maximum number of idle connections kept open for reuse
+        keepalive_expiry (float): Seconds an idle connection is kept open
+        timeout (float): Default read/write/pool timeout in seconds
+        connect_timeout (float): Timeout in seconds for establishing a connection
+        http2 (bool): Use HTTP/2 if the server supports it. Requires the 'h2' package (pip install httpx[http2])
+        cache (ResponseCache): Serves GETs of rarely changing endpoints (types, custom fields, roles) from a cache
+        retry (RetryPolicy): Retries of failed requests, defaults to RetryPolicy(). RetryPolicy(max_retries=0)
+                             disables them.
+        rate_limit (TokenBucket): Limits the request rate of every resource sharing this client
+        serializer: Encodes json= request bodies and decodes JSON responses (see json()). Defaults to orjson if it
+                    is installed and to the standard library json module otherwise.
+        single_flight (SingleFlight): Lets identical concurrent GETs share one request and its response
+        transport (httpx.BaseTransport): Replaces the network transport, e.g. MockTCS().transport() for tests
+        instruments (Iterable): Hooks called around every request sent to the network, see metrics.Metrics and
+                                metrics.OpenTelemetryTracer
+    """
+
+    is_async = False
+
+    def __init__(self, credentials: Credentials = None, base_url: str = BASE_URL, max_connections: int = 100,
+                 max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0, timeout: float = 30.0,
+                 connect_timeout: float = 10.0, http2: bool = False, cache=None, retry: RetryPolicy = None,
+                 rate_limit=None, serializer=None, single_flight=None, transport=None, instruments=()):
+        self.client = httpx.Client(**_client_options(credentials, base_url, max_connections,
+                                                     max_keepalive_connections, keepalive_expiry, timeout,
+                                                     connect_timeout, http2, transport))
+        self.credentials = credentials
+        self.cache = cache
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limit = rate_limit
+        self.serializer = serializer if serializer is not None else default_serializer()
+        self.single_flight = single_flight
+        self.max_connections = max_connections
+        self.instruments = tuple(instruments)
+
+    def connect(self):
+        return self.client
+
+    def json(self, response: httpx.Response):
+        """ Decoded JSON body of a response, using the serializer of the client. """
+
+        return self.serializer.loads(response.content)
+
+    def request(self, method: str, url: str, **kwargs):
+        _encode_json(self.serializer, kwargs)
+        if self.single_flight is not None and self.single_flight.applies(method, url):
+            key = self.single_flight.key(method, url, kwargs, self.credentials)
+            return self.single_flight.run(key, lambda: self._request(method, url, **kwargs))
+        return self._request(method, url, **kwargs)
+
+    def _request(self, method: str, url: str, **kwargs):
+        lookup = self.cache.lookup(method, url, kwargs, self.credentials) if self.cache is not None else None
+        if lookup is None:
+            return self._send(method, url, **kwargs)
+        if lookup.fresh:
+            return lookup.response()
+
+        kwargs["headers"] = lookup.conditional_headers(kwargs.get("headers"))
+        return lookup.update(self._send(method, url, **kwargs))
+
+    def _send(self, method: str, url: str, **kwargs):
+        def send():
+            return self.client.request(method, url, **kwargs)
+
+        if not self.instruments:
+            return self._attempts(method, url, send, [0])
+        started = [(instrument, instrument.start(self, method, url, kwargs)) for instrument in self.instruments]
+        attempts = [0]
+        try:
+            response = self._attempts(method, url, send, attempts)
+        except BaseException as error:
+            _finish(started, error=error, retries=attempts[0])
+            raise
+        _finish(started, response, retries=attempts[0])
+        return response
+
+    def _attempts(self, method: str, url: str, send, attempts: list):
+        while True:
+            attempt = attempts[0]
+            if self.rate_limit is not None:
+                self.rate_limit.acquire()
+            try:
+                response = send()
+            except httpx.TransportError as error:
+                if not self.retry.should_retry(method, url, attempt, error=error):
+                    raise
+                response = None
+            else:
+                if not self.retry.should_retry(method, url, attempt, response):
+                    return response
+                response.close()
+            time.sleep(self.retry.delay(attempt, response))
+            attempts[0] += 1
+
+    @contextlib.contextmanager
+    def stream(self, method: str, url: str, **kwargs):
+        """ Send a request and hand over its response before the body is read, for iterating over large bodies with
+            response.iter_bytes() instead of holding them in memory. Retries, the rate limit and the instruments
+            apply as for request(), the cache and SingleFlight don't.
+
+        Example:
+            with client.stream("GET", "/ssl/v1/collect/2414/bin") as response:
+                for chunk in response.iter_bytes():
+                    file.write(chunk)
+        """
+
+        def send():
+            return self.client.send(self.client.build_request(method, url, **kwargs), stream=True)
+
+        _encode_json(self.serializer, kwargs)
+        started = [(instrument, instrument.start(self, method, url, kwargs)) for instrument in self.instruments]
+        attempts = [0]
+        response = None
+        try:
+            response = self._attempts(method, url, send, attempts)
+            try:
+                yield response
+            finally:
+                response.close()
+        except BaseException as error:
+            _finish(started, response, error, attempts[0])
+            raise
+        _finish(started, response, retries=attempts[0])
 
-    def __init__(self):
-        self.client = httpx.Client()
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class AsyncGEANTTCSClient:
+    """ Asynchronous client for the GÉANT TCS API built on httpx.AsyncClient. Takes the same arguments as
+        GEANTTCSClient.
+
+        The resource classes are transport agnostic: given this client instead of GEANTTCSClient every resource
+        method keeps its signature but returns an awaitable, so many requests can be in flight from one event loop.
+        The number of requests actually on the wire is bounded by max_connections.
+
+    Example:
+        async with AsyncGEANTTCSClient(credentials) as client:
+            ssl_certs = SSLCertificates(client)
+            responses = await asyncio.gather(*(ssl_certs.collect_ssl_certificate(i, "x509") for i in ids))
+    """
+
+    is_async = True
+
+    def __init__(self, credentials: Credentials = None, base_url: str = BASE_URL, max_connections: int = 100,
+                 max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0, timeout: float = 30.0,
+                 connect_timeout: float = 10.0, http2: bool = False, cache=None, retry: RetryPolicy = None,
+                 rate_limit=None, serializer=None, single_flight=None, transport=None, instruments=()):
+        self.client = httpx.AsyncClient(**_client_options(credentials, base_url, max_connections,
+                                                          max_keepalive_connections, keepalive_expiry, timeout,
+                                                          connect_timeout, http2, transport))
+        self.credentials = credentials
+        self.cache = cache
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limit = rate_limit
+        self.serializer = serializer if serializer is not None else default_serializer()
+        self.single_flight = single_flight
+        self.max_connections = max_connections
+        self.instruments = tuple(instruments)
 
     def connect(self):
         return self.client
+
+    def json(self, response: httpx.Response):
+        """ Decoded JSON body of a response, using the serializer of the client. """
+
+        return self.serializer.loads(response.content)
+
+    async def request(self, method: str, url: str, **kwargs):
+        _encode_json(self.serializer, kwargs)
+        if self.single_flight is not None and self.single_flight.applies(method, url):
+            key = self.single_flight.key(method, url, kwargs, self.credentials)
+            return await self.single_flight.arun(key, lambda: self._request(method, url, **kwargs))
+        return await self._request(method, url, **kwargs)
+
+    async def _request(self, method: str, url: str, **kwargs):
+        lookup = self.cache.lookup(method, url, kwargs, self.credentials) if self.cache is not None else None
+        if lookup is None:
+            return await self._send(method, url, **kwargs)
+        if lookup.fresh:
+            return lookup.response()
+
+        kwargs["headers"] = lookup.conditional_headers(kwargs.get("headers"))
+        return lookup.update(await self._send(method, url, **kwargs))
+
+    async def _send(self, method: str, url: str, **kwargs):
+        def send():
+            return self.client.request(method, url, **kwargs)
+
+        if not self.instruments:
+            return await self._attempts(method, url, send, [0])
+        started = [(instrument, instrument.start(self, method, url, kwargs)) for instrument in self.instruments]
+        attempts = [0]
+        try:
+            response = await self._attempts(method, url, send, attempts)
+        except BaseException as error:
+            _finish(started, error=error, retries=attempts[0])
+            raise
+        _finish(started, response, retries=attempts[0])
+        return response
+
+    async def _attempts(self, method: str, url: str, send, attempts: list):
+        while True:
+            attempt = attempts[0]
+            if self.rate_limit is not None:
+                await self.rate_limit.aacquire()
+            try:
+                response = await send()
+            except httpx.TransportError as error:
+                if not self.retry.should_retry(method, url, attempt, error=error):
+                    raise
+                response = None
+            else:
+                if not self.retry.should_retry(method, url, attempt, response):
+                    return response
+                await response.aclose()
+            await asyncio.sleep(self.retry.delay(attempt, response))
+            attempts[0] += 1
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """ Async twin of GEANTTCSClient.stream, iterate with response.aiter_bytes(). """
+
+        def send():
+            return self.client.send(self.client.build_request(method, url, **kwargs), stream=True)
+
+        _encode_json(self.serializer, kwargs)
+        started = [(instrument, instrument.start(self, method, url, kwargs)) for instrument in self.instruments]
+        attempts = [0]
+        response = None
+        try:
+            response = await self._attempts(method, url, send, attempts)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+        except BaseException as error:
+            _finish(started, response, error, attempts[0])
+            raise
+        _finish(started, response, retries=attempts[0])
+
+    async def get(self, url: str, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
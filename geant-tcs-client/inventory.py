@@ -0,0 +1,335 @@
+
+import json
+import sqlite3
+import time
+
+from concurrency import map_unordered
+
+# Status filter values of the SSL listing. The listing rows carry no status, so a sync lists every status separately
+# and stores the one it queried with.
+SSL_STATUSES = ("Invalid", "Requested", "Approved", "Declined", "Applied", "Issued", "Revoked", "Expired", "Replaced",
+                "Rejected", "Unmanaged", "SAApproved", "Init")
+# Statuses a certificate moves out of on its own; an incremental sync only re-lists these
+VOLATILE_STATUSES = ("Init", "Requested", "Approved", "SAApproved", "Applied")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ssl_certificates (
+    ssl_id INTEGER PRIMARY KEY,
+    common_name TEXT,
+    serial_number TEXT,
+    status TEXT,
+    expires TEXT,
+    record TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ssl_certificates_serial_number ON ssl_certificates (serial_number);
+CREATE INDEX IF NOT EXISTS ssl_certificates_common_name ON ssl_certificates (common_name);
+CREATE INDEX IF NOT EXISTS ssl_certificates_expires ON ssl_certificates (expires);
+CREATE TABLE IF NOT EXISTS ssl_subject_alternative_names (
+    ssl_id INTEGER NOT NULL REFERENCES ssl_certificates (ssl_id) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ssl_subject_alternative_names_name ON ssl_subject_alternative_names (name);
+CREATE INDEX IF NOT EXISTS ssl_subject_alternative_names_ssl_id ON ssl_subject_alternative_names (ssl_id);
+CREATE TABLE IF NOT EXISTS client_certificates (
+    id INTEGER PRIMARY KEY,
+    person_id INTEGER,
+    subject TEXT,
+    state TEXT,
+    serial_number TEXT,
+    order_number INTEGER,
+    record TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS client_certificates_serial_number ON client_certificates (serial_number);
+CREATE INDEX IF NOT EXISTS client_certificates_person_id ON client_certificates (person_id);
+CREATE TABLE IF NOT EXISTS dcv_domains (
+    domain TEXT PRIMARY KEY,
+    dcv_status TEXT,
+    dcv_order_status TEXT,
+    dcv_method TEXT,
+    expires TEXT,
+    record TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+def _batches(records, size: int):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Inventory:
+    """ Local SQLite index of SSL certificates, Client certificates and DCV domains, so lookups by ID, serial number,
+        common name, SAN or expiry don't need an API round trip.
+
+        A sync fills the index from the listing endpoints through a GEANTTCSClient. The SSL listing only returns ID,
+        common name, SANs and serial number, so the certificates are listed status by status and indexed with the
+        status they were listed under; their expiry comes from the details, see sync_ssl_expiry. The first SSL sync
+        (or one with full=True) lists every status and drops the certificates the API no longer returns. Later syncs
+        are incremental and only re-list VOLATILE_STATUSES, which covers new orders and orders being issued; an
+        indexed order no longer listed under its status is updated from its details. Schedule a full sync now and
+        then to pick up revocations.
+
+    Args:
+        path (str): Database file, ':memory:' for a throwaway index
+
+    Example:
+        inventory = Inventory("tcs-inventory.sqlite")
+        inventory.sync_ssl_certificates(SSLCertificates(client))
+        inventory.ssl_by_subject_alternative_name("www.example.org")
+    """
+
+    def __init__(self, path: str = "tcs-inventory.sqlite"):
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def last_sync(self, name: str):
+        """ Time of the last sync of the given kind ('ssl', 'smime', 'dcv'), None if there was none. """
+
+        row = self.connection.execute("SELECT synced_at FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row["synced_at"] if row else None
+
+    def _mark_synced(self, name: str, synced_at: float):
+        self.connection.execute("INSERT OR REPLACE INTO sync_state (name, synced_at) VALUES (?, ?)",
+                                (name, synced_at))
+
+    def sync_ssl_certificates(self, ssl_certs, full: bool = None, size: int = 500, concurrency: int = 10,
+                              **filters) -> int:
+        """ Index the SSL certificates returned by listing_ssl_certificates.
+
+        Args:
+            ssl_certs (SSLCertificates): Resource on a GEANTTCSClient
+            full (bool): List every certificate; defaults to True for the first sync and False afterwards
+            size (int): Count of entries per page
+            concurrency (int): Count of details fetched in parallel for orders which left their status
+            **filters: Additional listing filters, a status filter restricts the sync to that status
+
+        Returns:
+            Count of indexed certificates
+        """
+
+        if full is None:
+            full = self.last_sync("ssl") is None
+        started = time.time()
+        restricted = bool(filters)
+        if "status" in filters:
+            statuses = (filters.pop("status"),)
+        else:
+            statuses = SSL_STATUSES if full else VOLATILE_STATUSES
+
+        count = 0
+        with self.connection:
+            for status in statuses:
+                records = ssl_certs.iter_ssl_certificates(size=size, prefetch=True, status=status, **filters)
+                for batch in _batches(records, size):
+                    self._upsert_ssl(batch, status, started)
+                    count += len(batch)
+            if not full and not filters:
+                # orders which left their status aren't listed under it anymore, their details tell the new one
+                placeholders = ", ".join("?" * len(statuses))
+                left = [row["ssl_id"] for row in self.connection.execute(
+                    f"SELECT ssl_id FROM ssl_certificates WHERE status IN ({placeholders}) AND synced_at < ?",
+                    (*statuses, started))]
+                self._refresh_ssl(ssl_certs, left, started, concurrency)
+            if full and not restricted:
+                self.connection.execute("DELETE FROM ssl_certificates WHERE synced_at < ?", (started,))
+            self._mark_synced("ssl", started)
+        return count
+
+    def _refresh_ssl(self, ssl_certs, ssl_ids: list, synced_at: float, concurrency: int):
+        """ Update status, serial number and expiry of indexed certificates from their details, drop the ones the
+            API doesn't know anymore.
+        """
+
+        loads = ssl_certs.client.serializer.loads
+        for ssl_id, response, error in map_unordered(ssl_certs.ssl_certificate_details, ssl_ids, concurrency):
+            if error is not None:
+                raise error
+            if response.status_code == 404:
+                self.connection.execute("DELETE FROM ssl_certificates WHERE ssl_id = ?", (ssl_id,))
+                continue
+            response.raise_for_status()
+            details = loads(response.content)
+            row = self.connection.execute("SELECT record FROM ssl_certificates WHERE ssl_id = ?", (ssl_id,)).fetchone()
+            record = dict(json.loads(row["record"]), serialNumber=details.get("serialNumber"))
+            self.connection.execute(
+                "UPDATE ssl_certificates SET status = ?, serial_number = ?, expires = ?, record = ?, synced_at = ? "
+                "WHERE ssl_id = ?", (details.get("status"), details.get("serialNumber"), details.get("expires"),
+                                     json.dumps(record), synced_at, ssl_id))
+
+    @staticmethod
+    def _subject_alternative_names(record: dict) -> list:
+        names = record.get("subjectAlternativeNames") or ()
+        return names.split(",") if isinstance(names, str) else names
+
+    def _upsert_ssl(self, records: list, status: str, synced_at: float):
+        ids = [(record["sslId"],) for record in records]
+        # the expiry of a certificate doesn't change, so keep the one sync_ssl_expiry stored unless it moved on
+        # from a status without expiry, like Requested
+        self.connection.executemany(
+            "INSERT INTO ssl_certificates (ssl_id, common_name, serial_number, status, record, synced_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (ssl_id) DO UPDATE SET common_name = excluded.common_name, "
+            "serial_number = excluded.serial_number, status = excluded.status, record = excluded.record, "
+            "synced_at = excluded.synced_at, expires = CASE WHEN serial_number IS excluded.serial_number "
+            "THEN expires END",
+            [(record["sslId"], record.get("commonName"), record.get("serialNumber"), status, json.dumps(record),
+              synced_at) for record in records])
+        self.connection.executemany("DELETE FROM ssl_subject_alternative_names WHERE ssl_id = ?", ids)
+        self.connection.executemany(
+            "INSERT INTO ssl_subject_alternative_names (ssl_id, name) VALUES (?, ?)",
+            [(record["sslId"], name.strip()) for record in records
+             for name in self._subject_alternative_names(record)])
+
+    def sync_ssl_expiry(self, ssl_certs, status: str = "Issued", concurrency: int = 10) -> int:
+        """ Fetch the expiry of the indexed SSL certificates with the given status from ssl_certificate_details, for
+            the certificates which don't have one yet. Run it after sync_ssl_certificates to use ssl_expiring.
+
+        Args:
+            ssl_certs (SSLCertificates): Resource on a GEANTTCSClient
+            status (str): Status of the certificates to complete, None for all
+            concurrency (int): Count of details fetched in parallel
+
+        Returns:
+            Count of certificates updated
+        """
+
+        sql = "SELECT ssl_id FROM ssl_certificates WHERE expires IS NULL"
+        parameters = ()
+        if status is not None:
+            sql += " AND status = ?"
+            parameters = (status,)
+        ssl_ids = [row["ssl_id"] for row in self.connection.execute(sql, parameters)]
+
+        count = 0
+        loads = ssl_certs.client.serializer.loads
+        with self.connection:
+            for ssl_id, response, error in map_unordered(ssl_certs.ssl_certificate_details, ssl_ids, concurrency):
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+                details = loads(response.content)
+                if details.get("expires"):
+                    self.connection.execute("UPDATE ssl_certificates SET expires = ? WHERE ssl_id = ?",
+                                            (details["expires"], ssl_id))
+                    count += 1
+        return count
+
+    def sync_client_certificates(self, client_certs, person_ids, concurrency: int = 10) -> int:
+        """ Index the Client certificates of the given persons through list_client_certificates_by_person_id.
+
+        Args:
+            client_certs (ClientCertificates): Resource on a GEANTTCSClient
+            person_ids (Iterable[int]): Persons to index, e.g. (p["id"] for p in persons.iter_persons())
+            concurrency (int): Count of persons fetched in parallel
+
+        Returns:
+            Count of indexed certificates
+        """
+
+        started = time.time()
+        count = 0
+        loads = client_certs.client.serializer.loads
+        with self.connection:
+            for person_id, response, error in map_unordered(client_certs.list_client_certificates_by_person_id,
+                                                            person_ids, concurrency):
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+                records = loads(response.content)
+                self.connection.execute("DELETE FROM client_certificates WHERE person_id = ?", (person_id,))
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO client_certificates (id, person_id, subject, state, serial_number, "
+                    "order_number, record, synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(record["id"], person_id, record.get("subject"), record.get("state"),
+                      record.get("serialNumber"), record.get("orderNumber"), json.dumps(record), started)
+                     for record in records])
+                count += len(records)
+            self._mark_synced("smime", started)
+        return count
+
+    def sync_domains(self, dcv, size: int = 500, **filters) -> int:
+        """ Index the DCV domains returned by search_domains.
+
+        Args:
+            dcv (DomainControlValidationResource): Resource on a GEANTTCSClient
+            size (int): Count of entries per page
+            **filters: Filters of search_domains
+
+        Returns:
+            Count of indexed domains
+        """
+
+        started = time.time()
+        count = 0
+        with self.connection:
+            for batch in _batches(dcv.iter_domains(size=size, prefetch=True, **filters), size):
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO dcv_domains (domain, dcv_status, dcv_order_status, dcv_method, expires, "
+                    "record, synced_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(record["domain"], record.get("dcvStatus"), record.get("dcvOrderStatus"),
+                      record.get("dcvMethod"), record.get("expirationDate"), json.dumps(record), started)
+                     for record in batch])
+                count += len(batch)
+            if not filters:
+                self.connection.execute("DELETE FROM dcv_domains WHERE synced_at < ?", (started,))
+            self._mark_synced("dcv", started)
+        return count
+
+    def _records(self, sql: str, parameters: tuple = ()) -> list:
+        return [json.loads(row["record"]) for row in self.connection.execute(sql, parameters)]
+
+    def ssl_by_id(self, ssl_id: int):
+        records = self._records("SELECT record FROM ssl_certificates WHERE ssl_id = ?", (ssl_id,))
+        return records[0] if records else None
+
+    def ssl_by_serial_number(self, serial_number: str) -> list:
+        return self._records("SELECT record FROM ssl_certificates WHERE serial_number = ?", (serial_number,))
+
+    def ssl_by_common_name(self, common_name: str) -> list:
+        return self._records("SELECT record FROM ssl_certificates WHERE common_name = ?", (common_name,))
+
+    def ssl_by_subject_alternative_name(self, name: str) -> list:
+        return self._records("SELECT record FROM ssl_certificates WHERE ssl_id IN "
+                             "(SELECT ssl_id FROM ssl_subject_alternative_names WHERE name = ?)", (name,))
+
+    def ssl_expiring(self, before: str, status: str = "Issued") -> list:
+        """ SSL certificates with the given status expiring before the date (YYYY-MM-DD), soonest first. Only
+            covers certificates whose expiry was fetched with sync_ssl_expiry.
+        """
+
+        return self._records("SELECT record FROM ssl_certificates WHERE expires < ? AND status = ? ORDER BY expires",
+                             (before, status))
+
+    def client_certificates_by_serial_number(self, serial_number: str) -> list:
+        return self._records("SELECT record FROM client_certificates WHERE serial_number = ?", (serial_number,))
+
+    def client_certificates_by_person_id(self, person_id: int) -> list:
+        return self._records("SELECT record FROM client_certificates WHERE person_id = ?", (person_id,))
+
+    def domains(self, dcv_status: str = None) -> list:
+        if dcv_status is None:
+            return self._records("SELECT record FROM dcv_domains ORDER BY domain")
+        return self._records("SELECT record FROM dcv_domains WHERE dcv_status = ? ORDER BY domain", (dcv_status,))
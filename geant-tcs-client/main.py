@@ -1,13 +1,676 @@
 #!/usr/bin/env python
+""" Command line interface for the GÉANT TCS API.
+
+    Credentials come from the --login, --password and --customer-uri options or the TCS_LOGIN, TCS_PASSWORD and
+    TCS_CUSTOMER_URI environment variables. Every command writes one JSON object per line to stdout, batch commands
+    read their items from arguments or from a CSV or JSON lines file (--input, '-' for stdin) and exit with status 1
+    if any item failed.
+
+    Examples:
+        geant-tcs-client ssl list --filter status=Issued > issued.jsonl
+        geant-tcs-client ssl enroll --input orders.csv --concurrency 20
+        geant-tcs-client ssl collect --input enrolled.jsonl --format pem --wait 3600
+        geant-tcs-client dcv status example.org example.com
+        geant-tcs-client person list --filter organizationId=10406
+        geant-tcs-client person list | geant-tcs-client smime list --input - > smime.jsonl
+        geant-tcs-client smime revoke 16190 16191 --reason "Key compromise"
+        geant-tcs-client device collect --input devices.csv --format pem
+        geant-tcs-client acme list --filter cert_validation_type=OV
+        geant-tcs-client admin list --filter status=ACTIVE
+        geant-tcs-client inventory sync --database tcs-inventory.sqlite --expiry
+        geant-tcs-client export ssl issued.parquet --filter status=Issued --details
+"""
+
+import csv
+import json
+import sys
 
 import click
 
+from credentials import Credentials
+
+# The client, the resources and their dependencies (httpx, asyncio, orjson) are imported by the commands using them,
+# so `--help` and short commands like `dcv status` don't pay for the others. Keep it that way, see
+# benchmarks/import_time.py.
+
+
+def read_rows(file, input_format: str = None):
+    """ Rows of a CSV (with header) or JSON lines file as dicts. The format defaults to CSV for '.csv' files and JSON
+        lines otherwise.
+
+    Args:
+        file (TextIO): Open input file
+        input_format (str): 'csv' or 'jsonl'
+    """
+
+    if input_format is None:
+        input_format = "csv" if getattr(file, "name", "").endswith(".csv") else "jsonl"
+    if input_format == "csv":
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _items(arguments: tuple, file, input_format: str, column: str):
+    """ Command line arguments followed by the `column` of every input row. """
+
+    yield from arguments
+    if file is not None:
+        for row in read_rows(file, input_format):
+            if row.get(column) in (None, ""):
+                raise click.UsageError(f"Input row without {column!r}: {row}")
+            yield row[column]
+
+
+def _filters(filters: tuple) -> dict:
+    parsed = {}
+    for item in filters:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise click.BadParameter(f"{item!r} is not key=value", param_hint="--filter")
+        parsed[key] = value
+    return parsed
+
+
+def _emit(record):
+    click.echo(json.dumps(record, ensure_ascii=False, default=str))
+
+
+def _decoded(client, response):
+    try:
+        return client.json(response)
+    except ValueError:
+        return response.text
+
+
+def _response_record(client, response) -> dict:
+    """ status_code and body (decoded JSON if possible) of a response. """
+
+    record = {"status_code": response.status_code}
+    if response.content:
+        record["body"] = _decoded(client, response)
+    return record
+
+
+def _order_number(value) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise click.BadParameter(f"{value!r} is not an order number") from None
+
+
+def _person(value):
+    """ Person ID (int) or e-mail of an argument or input row. """
+
+    return int(value) if str(value).isdigit() else value
+
+
+class Settings:
+    """ Connection settings of the command line, given to every command. """
+
+    def __init__(self, credentials: Credentials, base_url: str, version: str, cache: bool = False,
+                 cache_path: str = None):
+        self.credentials = credentials
+        self.base_url = base_url
+        self.version = version
+        self.cache = cache or cache_path is not None
+        self.cache_path = cache_path
+        self.failed = 0
+
+    def _check(self):
+        missing = [option for option, value in zip(("--login", "--password", "--customer-uri"), self.credentials)
+                   if not value]
+        if missing:
+            raise click.UsageError(f"Missing {', '.join(missing)} (or the matching TCS_* environment variables)")
+
+    def _options(self, concurrency: int) -> dict:
+        self._check()
+        options = {"max_connections": concurrency, "max_keepalive_connections": concurrency}
+        if self.base_url:
+            options["base_url"] = self.base_url
+        if self.cache:
+            from cache import ResponseCache, SQLiteBackend
+
+            options["cache"] = ResponseCache(backend=SQLiteBackend(self.cache_path))
+        return options
+
+    def client(self, concurrency: int = 10):
+        from geant_tcs_client import GEANTTCSClient
+
+        return GEANTTCSClient(self.credentials, **self._options(concurrency))
+
+    def async_client(self, concurrency: int = 10):
+        from geant_tcs_client import AsyncGEANTTCSClient
+
+        return AsyncGEANTTCSClient(self.credentials, **self._options(concurrency))
+
+    def emit(self, record: dict, error=None):
+        if error is not None:
+            self.failed += 1
+            record["error"] = str(error)
+        _emit(record)
+
 
-@click.command()
+def _finish(settings: Settings):
+    if settings.failed:
+        click.echo(f"{settings.failed} item(s) failed", err=True)
+        sys.exit(1)
+
+
+def _emit_results(settings: Settings, client, key: str, results, certificate: bool = False):
+    """ Emit the (item, response, error) results of map_unordered, a response with an error status being a failure.
+
+    Args:
+        settings (Settings): Settings counting the failures
+        client: Client which sent the requests
+        key (str): Name of the item in the records
+        results (Iterable): Results of map_unordered
+        certificate (bool): Emit the body of a successful response as text under 'certificate'
+    """
+
+    for item, response, error in results:
+        record = {key: item}
+        if response is not None:
+            if certificate and not response.is_error:
+                record.update(status_code=response.status_code, certificate=response.text)
+            else:
+                record.update(_response_record(client, response))
+            if error is None and response.is_error:
+                error = f"Request failed with status {response.status_code}"
+        settings.emit(record, error)
+
+
+input_option = click.option("--input", "input_file", type=click.File("r", encoding="utf-8"),
+                            help="CSV or JSON lines file with one item per row, '-' for stdin")
+input_format_option = click.option("--input-format", type=click.Choice(["csv", "jsonl"]),
+                                   help="Format of --input, by default CSV for *.csv and JSON lines otherwise")
+concurrency_option = click.option("--concurrency", default=10, show_default=True,
+                                  help="Requests in flight at the same time")
+filter_option = click.option("--filter", "filters", multiple=True, metavar="KEY=VALUE",
+                             help="Listing filter, repeatable")
+database_option = click.option("--database", default="tcs-inventory.sqlite", show_default=True,
+                               help="Inventory database")
+format_option = click.option("--format", "format_type", type=click.Choice(["csv", "jsonl", "parquet"]),
+                             help="File format, by default taken from the extension of PATH")
+
+
+@click.group()
 @click.version_option()
-def main():
+@click.option("--login", envvar="TCS_LOGIN", help="Client admin login [env: TCS_LOGIN]")
+@click.option("--password", envvar="TCS_PASSWORD", help="Client admin password [env: TCS_PASSWORD]")
+@click.option("--customer-uri", envvar="TCS_CUSTOMER_URI", help="Customer URI [env: TCS_CUSTOMER_URI]")
+@click.option("--base-url", envvar="TCS_BASE_URL", help="API root [default: https://cert-manager.com/api]")
+@click.option("--api-version", default="v1", show_default=True, help="API version of the resources")
+@click.option("--cache/--no-cache", envvar="TCS_CACHE", default=False,
+              help="Share catalog responses (types, custom fields, roles...) between runs [env: TCS_CACHE]")
+@click.option("--cache-path", envvar="TCS_CACHE_PATH",
+              help="Cache database [env: TCS_CACHE_PATH, default: ~/.cache/geant-tcs-client/responses.sqlite]")
+@click.pass_context
+def main(ctx, login, password, customer_uri, base_url, api_version, cache, cache_path):
+    """ Client for the GÉANT Trusted Certificate Service API. """
+
+    ctx.obj = Settings(Credentials(login, password, customer_uri), base_url, api_version, cache, cache_path)
+
+
+@main.group()
+def ssl():
+    """ SSL certificates. """
+
+
+@ssl.command("list")
+@filter_option
+@click.option("--size", default=200, show_default=True, help="Entries per page")
+@click.pass_obj
+def ssl_list(settings: Settings, filters, size):
+    """ List SSL certificates, one JSON object per certificate. """
+
+    from ssl_certificates import SSLCertificates
+
+    with settings.client() as client:
+        for record in SSLCertificates(client, version=settings.version).iter_ssl_certificates(
+                size, prefetch=True, **_filters(filters)):
+            _emit(record)
+
+
+@ssl.command("types")
+@click.pass_obj
+def ssl_types(settings: Settings):
+    """ List the SSL certificate types. """
+
+    from ssl_certificates import SSLCertificates
+
+    with settings.client() as client:
+        response = SSLCertificates(client, version=settings.version).listing_ssl_types()
+        response.raise_for_status()
+        for record in client.json(response):
+            _emit(record)
+
+
+# Columns of the enrollment input besides the ones of SSLEnrollmentSpec
+CSR_FILE_COLUMN = "csr_file"
+
+
+def _enrollment_spec(row: dict):
+    """ SSLEnrollmentSpec of an input row: columns named like its fields (org_id, csr, cert_type, term,
+        subj_alt_names, ...) and csr_file as alternative to csr.
+    """
+
+    from ssl_certificates import SSLEnrollmentSpec
+
+    row = {key: value for key, value in row.items() if value not in (None, "")}
+    if CSR_FILE_COLUMN in row:
+        with open(row.pop(CSR_FILE_COLUMN), encoding="ascii") as file:
+            row["csr"] = file.read()
+    unknown = set(row) - set(SSLEnrollmentSpec._fields)
+    if unknown:
+        raise click.UsageError(f"Unknown enrollment column(s): {', '.join(sorted(unknown))}")
+    missing = [field for field in ("org_id", "csr", "cert_type", "term") if field not in row]
+    if missing:
+        raise click.UsageError(f"Enrollment row without {', '.join(missing)}: {row.get('subj_alt_names', row)}")
+    for field in ("org_id", "cert_type", "term", "number_servers", "server_type"):
+        if field in row:
+            row[field] = int(row[field])
+    if isinstance(row.get("custom_fields"), str):
+        row["custom_fields"] = json.loads(row["custom_fields"])
+    return SSLEnrollmentSpec(**row)
+
+
+@ssl.command("enroll")
+@input_option
+@input_format_option
+@concurrency_option
+@click.pass_obj
+def ssl_enroll(settings: Settings, input_file, input_format, concurrency):
+    """ Enroll SSL certificates from --input rows with the columns org_id, csr (or csr_file with the path of a PEM
+        CSR), cert_type, term and optionally subj_alt_names, custom_fields (JSON), number_servers, server_type,
+        comments and external_requester. Outputs ssl_id and renew_id per row in order of completion.
+    """
+
+    from ssl_certificates import SSLCertificates
+
+    if input_file is None:
+        raise click.UsageError("Missing --input")
+    specs = (_enrollment_spec(row) for row in read_rows(input_file, input_format))
+    with settings.client(concurrency) as client:
+        ssl_certs = SSLCertificates(client, version=settings.version)
+        for result in ssl_certs.bulk_enroll_ssl_certificates(specs, concurrency):
+            settings.emit({"subj_alt_names": result.spec.subj_alt_names, "ssl_id": result.ssl_id,
+                           "renew_id": result.renew_id}, result.error)
+    _finish(settings)
+
+
+@ssl.command("collect")
+@click.argument("ssl_ids", nargs=-1, type=int)
+@input_option
+@input_format_option
+@click.option("--format", "format_type", default="x509", show_default=True,
+              help="Certificate format, e.g. x509, x509CO, x509IO, base64, bin, pem")
+@click.option("--wait", default=0.0, show_default=True,
+              help="Seconds to keep polling certificates which aren't issued yet, 0 to collect once")
+@click.option("--interval", default=10.0, show_default=True, help="Initial seconds between two polls of an order")
+@concurrency_option
+@click.pass_obj
+def ssl_collect(settings: Settings, ssl_ids, input_file, input_format, format_type, wait, interval, concurrency):
+    """ Collect SSL certificates given as arguments or in the ssl_id column of --input. """
+
+    import asyncio
+
+    from poller import CollectPoller
+    from ssl_certificates import SSLCertificates
+
+    ids = [int(ssl_id) for ssl_id in _items(ssl_ids, input_file, input_format, "ssl_id")]
+
+    async def collect():
+        async with settings.async_client(concurrency) as client:
+            ssl_certs = SSLCertificates(client, version=settings.version)
+            poller = CollectPoller(lambda ssl_id: ssl_certs.collect_ssl_certificate(ssl_id, format_type),
+                                   initial_delay=interval, timeout=wait)
+            for ssl_id in ids:
+                poller.add(ssl_id, delay=0)
+            async for result in poller.apoll(concurrency=concurrency):
+                record = {"ssl_id": result.order_id}
+                if result.response is not None:
+                    record["status_code"] = result.response.status_code
+                    if result.error is None:
+                        record["certificate"] = result.response.text
+                settings.emit(record, result.error)
+
+    asyncio.run(collect())
+    _finish(settings)
+
+
+@main.group()
+def dcv():
+    """ Domain control validation. """
+
+
+@dcv.command("status")
+@click.argument("domains", nargs=-1)
+@input_option
+@input_format_option
+@concurrency_option
+@click.pass_obj
+def dcv_status(settings: Settings, domains, input_file, input_format, concurrency):
+    """ Validation status of the domains given as arguments or in the domain column of --input. """
+
+    from concurrency import map_unordered
+    from domain_control_validation_resource import DomainControlValidationResource
+
+    with settings.client(concurrency) as client:
+        resource = DomainControlValidationResource(client, version=settings.version)
+        results = map_unordered(resource.get_validation_status, _items(domains, input_file, input_format, "domain"),
+                                concurrency)
+        _emit_results(settings, client, "domain", results)
+    _finish(settings)
+
+
+@main.group()
+def person():
+    """ Persons. """
+
+
+@person.command("list")
+@filter_option
+@click.option("--size", default=200, show_default=True, help="Entries per page")
+@click.pass_obj
+def person_list(settings: Settings, filters, size):
+    """ List persons, one JSON object per person. """
+
+    from person_resource import PersonResource
+
+    with settings.client() as client:
+        for record in PersonResource(client, version=settings.version).iter_persons(size, prefetch=True,
+                                                                                    **_filters(filters)):
+            _emit(record)
+
+
+@main.group()
+def smime():
+    """ Client (S/MIME) certificates. """
+
+
+@smime.command("types")
+@click.pass_obj
+def smime_types(settings: Settings):
+    """ List the Client certificate types. """
+
+    from client_certificates import ClientCertificates
+
+    with settings.client() as client:
+        response = ClientCertificates(client, version=settings.version).listing_client_certificate_types()
+        response.raise_for_status()
+        for record in client.json(response):
+            _emit(record)
+
+
+@smime.command("list")
+@click.argument("persons", nargs=-1)
+@input_option
+@input_format_option
+@click.option("--column", default="email", show_default=True,
+              help="Column of --input with the person, e.g. id or email to read the output of `person list`")
+@concurrency_option
+@click.pass_obj
+def smime_list(settings: Settings, persons, input_file, input_format, column, concurrency):
+    """ List the Client certificates of the persons (IDs or e-mails) given as arguments or in a column of --input,
+        one JSON object per certificate with the person it was listed for.
+    """
+
+    from client_certificates import ClientCertificates
+    from concurrency import map_unordered
+
+    with settings.client(concurrency) as client:
+        client_certs = ClientCertificates(client, version=settings.version)
+
+        def list_certificates(person):
+            if isinstance(person, int):
+                return client_certs.list_client_certificates_by_person_id(person)
+            return client_certs.list_client_certificates_by_person_email(person)
+
+        items = (_person(item) for item in _items(persons, input_file, input_format, column))
+        for person, response, error in map_unordered(list_certificates, items, concurrency):
+            if error is None and not response.is_error:
+                for record in client.json(response):
+                    _emit(dict(record, person=person))
+                continue
+            record = {"person": person}
+            if response is not None:
+                record.update(_response_record(client, response))
+                error = error or f"Request failed with status {response.status_code}"
+            settings.emit(record, error)
+    _finish(settings)
+
+
+@smime.command("collect")
+@click.argument("order_numbers", nargs=-1)
+@input_option
+@input_format_option
+@concurrency_option
+@click.pass_obj
+def smime_collect(settings: Settings, order_numbers, input_file, input_format, concurrency):
+    """ Collect the Client certificates given as arguments or in the order_number column of --input. """
+
+    from client_certificates import ClientCertificates
+    from concurrency import map_unordered
+
+    items = (_order_number(item) for item in _items(order_numbers, input_file, input_format, "order_number"))
+    with settings.client(concurrency) as client:
+        client_certs = ClientCertificates(client, version=settings.version)
+        results = map_unordered(client_certs.collect_client_certificate, items, concurrency)
+        _emit_results(settings, client, "order_number", results, certificate=True)
+    _finish(settings)
+
+
+@smime.command("revoke")
+@click.argument("order_numbers", nargs=-1)
+@input_option
+@input_format_option
+@click.option("--reason", required=True, help="Revocation reason")
+@concurrency_option
+@click.pass_obj
+def smime_revoke(settings: Settings, order_numbers, input_file, input_format, reason, concurrency):
+    """ Revoke the Client certificates given as arguments or in the order_number column of --input. """
+
+    from client_certificates import ClientCertificates
+    from concurrency import map_unordered
+
+    items = (_order_number(item) for item in _items(order_numbers, input_file, input_format, "order_number"))
+    with settings.client(concurrency) as client:
+        client_certs = ClientCertificates(client, version=settings.version)
+        results = map_unordered(lambda order_number: client_certs.revoke_client_certificate_by_order_number(
+            order_number, reason), items, concurrency)
+        _emit_results(settings, client, "order_number", results)
+    _finish(settings)
+
+
+@main.group()
+def device():
+    """ Device certificates. The API has no listing of them, `types` lists the certificate types. """
+
+
+@device.command("types")
+@click.pass_obj
+def device_types(settings: Settings):
+    """ List the Device certificate types. """
+
+    from device_certificates import DeviceCertificates
+
+    with settings.client() as client:
+        response = DeviceCertificates(client, version=settings.version).device_certificate_types()
+        response.raise_for_status()
+        for record in client.json(response):
+            _emit(record)
+
+
+@device.command("collect")
+@click.argument("order_numbers", nargs=-1)
+@input_option
+@input_format_option
+@click.option("--format", "format_type", default="x509", show_default=True,
+              help="Certificate format, e.g. x509, x509CO, x509IO, base64, bin, pem")
+@concurrency_option
+@click.pass_obj
+def device_collect(settings: Settings, order_numbers, input_file, input_format, format_type, concurrency):
+    """ Collect the Device certificates given as arguments or in the order_number column of --input. """
+
+    from concurrency import map_unordered
+    from device_certificates import DeviceCertificates
+
+    items = (_order_number(item) for item in _items(order_numbers, input_file, input_format, "order_number"))
+    with settings.client(concurrency) as client:
+        device_certs = DeviceCertificates(client, version=settings.version)
+        results = map_unordered(lambda order_number: device_certs.collect_device_certificate(
+            order_number, format_type), items, concurrency)
+        _emit_results(settings, client, "order_number", results, certificate=True)
+    _finish(settings)
+
+
+@device.command("revoke")
+@click.argument("order_numbers", nargs=-1)
+@input_option
+@input_format_option
+@click.option("--reason", required=True, help="Revocation reason")
+@concurrency_option
+@click.pass_obj
+def device_revoke(settings: Settings, order_numbers, input_file, input_format, reason, concurrency):
+    """ Revoke the Device certificates given as arguments or in the order_number column of --input. """
+
+    from concurrency import map_unordered
+    from device_certificates import DeviceCertificates
+
+    items = (_order_number(item) for item in _items(order_numbers, input_file, input_format, "order_number"))
+    with settings.client(concurrency) as client:
+        device_certs = DeviceCertificates(client, version=settings.version)
+        results = map_unordered(lambda order_number: device_certs.revoke_device_certificate_by_order_number(
+            order_number, reason), items, concurrency)
+        _emit_results(settings, client, "order_number", results)
+    _finish(settings)
+
+
+@main.group()
+def acme():
+    """ ACME accounts. """
+
+
+@acme.command("list")
+@filter_option
+@click.option("--size", default=200, show_default=True, help="Entries per page")
+@click.pass_obj
+def acme_list(settings: Settings, filters, size):
+    """ List ACME accounts, one JSON object per account. Filters are the arguments of list_acme_accounts, e.g.
+        organization_id or cert_validation_type.
+    """
+
+    from acme_account_resource import ACMEAccountResource
+
+    with settings.client() as client:
+        for record in ACMEAccountResource(client, version=settings.version).iter_acme_accounts(
+                size, prefetch=True, **_filters(filters)):
+            _emit(record)
+
+
+@main.group()
+def admin():
+    """ Client administrators. """
+
+
+@admin.command("list")
+@filter_option
+@click.option("--size", default=200, show_default=True, help="Entries per page")
+@click.pass_obj
+def admin_list(settings: Settings, filters, size):
+    """ List client administrators, one JSON object per administrator. Filters are login, email, status and org_id. """
+
+    from client_administrator_resource import ClientAdministratorResource
+
+    with settings.client() as client:
+        for record in ClientAdministratorResource(client, version=settings.version).iter_client_admins(
+                size, prefetch=True, **_filters(filters)):
+            _emit(record)
+
+
+@main.group()
+def inventory():
+    """ Local SQLite index of the certificates and domains. """
+
+
+@inventory.command("sync")
+@database_option
+@click.option("--full/--incremental", default=None,
+              help="List every SSL status or only the volatile ones [default: full for the first sync]")
+@click.option("--expiry/--no-expiry", default=False, show_default=True,
+              help="Fetch the expiry of the issued SSL certificates which have none yet, one request each")
+@click.option("--domains/--no-domains", default=False, show_default=True, help="Also index the DCV domains")
+@filter_option
+@click.option("--size", default=500, show_default=True, help="Entries per page")
+@concurrency_option
+@click.pass_obj
+def inventory_sync(settings: Settings, database, full, expiry, domains, filters, size, concurrency):
+    """ Index the SSL certificates (and optionally the DCV domains) in the inventory database. Outputs the count of
+        indexed entries.
+    """
+
+    from inventory import Inventory
+    from ssl_certificates import SSLCertificates
+
+    with settings.client(concurrency) as client, Inventory(database) as index:
+        ssl_certs = SSLCertificates(client, version=settings.version)
+        record = {"ssl_certificates": index.sync_ssl_certificates(ssl_certs, full, size, concurrency,
+                                                                  **_filters(filters))}
+        if expiry:
+            record["ssl_expiry"] = index.sync_ssl_expiry(ssl_certs, concurrency=concurrency)
+        if domains:
+            from domain_control_validation_resource import DomainControlValidationResource
+
+            record["dcv_domains"] = index.sync_domains(DomainControlValidationResource(client,
+                                                                                       version=settings.version), size)
+    _emit(record)
+
+
+@main.group()
+def export():
+    """ Export listings to CSV, JSON lines or Parquet files. """
+
+
+@export.command("ssl")
+@click.argument("path")
+@format_option
+@click.option("--details/--no-details", default=False, show_default=True,
+              help="Fetch the details of every certificate for the expiry, one request each")
+@filter_option
+@click.option("--size", default=500, show_default=True, help="Entries per page")
+@concurrency_option
+@click.pass_obj
+def export_ssl(settings: Settings, path, format_type, details, filters, size, concurrency):
+    """ Export the SSL certificates to PATH, see export.SSL_CERTIFICATE_SCHEMA for the columns. """
+
+    from export import export_ssl_certificates
+    from ssl_certificates import SSLCertificates
+
+    with settings.client(concurrency) as client:
+        count = export_ssl_certificates(SSLCertificates(client, version=settings.version), path, format_type, size,
+                                        details, concurrency, **_filters(filters))
+    _emit({"path": path, "count": count})
+
+
+@export.command("person")
+@click.argument("path")
+@format_option
+@filter_option
+@click.option("--size", default=500, show_default=True, help="Entries per page")
+@click.pass_obj
+def export_person(settings: Settings, path, format_type, filters, size):
+    """ Export the persons to PATH, see export.PERSON_SCHEMA for the columns. """
+
+    from export import export_persons
+    from person_resource import PersonResource
 
-    pass
+    with settings.client() as client:
+        count = export_persons(PersonResource(client, version=settings.version), path, format_type, size,
+                               **_filters(filters))
+    _emit({"path": path, "count": count})
 
 
 if __name__ == '__main__':
@@ -0,0 +1,267 @@
+
+import bisect
+import threading
+import time
+
+import httpx
+
+import routes
+from optional import require
+
+# Upper bounds in seconds of the latency histogram buckets, +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Label of requests whose URL matches no route, so unknown URLs can't add label values without bound
+OTHER = "other"
+
+
+def route_label(method: str, url) -> str:
+    """ URL template of a request like '/ssl/{version}/collect/{ssl_id}/{format_type}', used as metric label and span
+        name instead of the URL itself to keep their cardinality bounded.
+
+    Args:
+        method (str): HTTP method
+        url (str): Resource URL like '/ssl/v1/collect/2417/x509', a query and an absolute URL are accepted
+    """
+
+    path = str(url).split("?", 1)[0]
+    if not path.startswith("/"):
+        path = httpx.URL(path).path
+    template, _ = routes.match(method, path)
+    if template is None and path.startswith("/api/"):
+        template, _ = routes.match(method, path[len("/api"):])
+    return template or OTHER
+
+
+def _body_size(kwargs: dict) -> int:
+    content = kwargs.get("content")
+    return len(content) if isinstance(content, (bytes, str)) else 0
+
+
+def _received_size(response: httpx.Response) -> int:
+    if response.num_bytes_downloaded:
+        return response.num_bytes_downloaded
+    try:
+        return len(response.content)
+    except httpx.ResponseNotRead:
+        return 0
+
+
+class _Histogram:
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Request:
+    """ Request in flight, handed from start() to finish(). """
+
+    __slots__ = ("method", "route", "started", "sent", "span")
+
+    def __init__(self, method: str, route: str, sent: int, span=None):
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        self.sent = sent
+        self.span = span
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+class Metrics:
+    """ Per endpoint request metrics of a client: latency histograms, counts by status code, bytes sent and received,
+        retries, errors and the requests in flight relative to the connection pool. Requests are labelled with the
+        method and the URL template of their route (see route_label).
+
+        Every request which goes to the network is recorded once, including all its retries. Responses served by the
+        cache or shared by SingleFlight are not. One instance can be shared by several clients and threads.
+
+    Example:
+        metrics = Metrics()
+        client = GEANTTCSClient(credentials, instruments=[metrics])
+        ...
+        print(metrics.prometheus())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._responses = {}
+        self._errors = {}
+        self._retries = {}
+        self._sent = {}
+        self._received = {}
+        self._in_flight = 0
+        self._in_flight_peak = 0
+        self._max_connections = 0
+
+    def start(self, client, method: str, url: str, kwargs: dict) -> _Request:
+        """ Called by the client before a request is sent the first time. """
+
+        with self._lock:
+            self._in_flight += 1
+            self._in_flight_peak = max(self._in_flight_peak, self._in_flight)
+            self._max_connections = max(self._max_connections, getattr(client, "max_connections", 0) or 0)
+        return _Request(method, route_label(method, url), _body_size(kwargs))
+
+    def finish(self, request: _Request, response: httpx.Response = None, error: BaseException = None,
+               retries: int = 0):
+        """ Called by the client with the final response or error of a request started with start(). """
+
+        seconds = time.perf_counter() - request.started
+        key = (request.method, request.route)
+        with self._lock:
+            self._in_flight -= 1
+            self._latency.setdefault(key, _Histogram()).observe(seconds)
+            if response is not None:
+                status = key + (response.status_code,)
+                self._responses[status] = self._responses.get(status, 0) + 1
+                self._received[key] = self._received.get(key, 0) + _received_size(response)
+            if error is not None:
+                failure = key + (type(error).__name__,)
+                self._errors[failure] = self._errors.get(failure, 0) + 1
+            self._sent[key] = self._sent.get(key, 0) + request.sent * (retries + 1)
+            self._retries[key] = self._retries.get(key, 0) + retries
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def saturation(self) -> float:
+        """ Share of the connection pool taken by the requests in flight, above 1 when requests queue for a
+            connection.
+        """
+
+        return self._in_flight / self._max_connections if self._max_connections else 0.0
+
+    def snapshot(self) -> dict:
+        """ Plain copy of the metrics, keyed by (method, route) and additionally status code or error type. """
+
+        with self._lock:
+            return {"latency": {key: {"buckets": dict(zip(LATENCY_BUCKETS + (float("inf"),), histogram.counts)),
+                                      "sum": histogram.sum, "count": histogram.count}
+                                for key, histogram in self._latency.items()},
+                    "responses": dict(self._responses), "errors": dict(self._errors),
+                    "retries": dict(self._retries), "bytes_sent": dict(self._sent),
+                    "bytes_received": dict(self._received), "in_flight": self._in_flight,
+                    "in_flight_peak": self._in_flight_peak, "max_connections": self._max_connections}
+
+    def reset(self):
+        with self._lock:
+            for values in (self._latency, self._responses, self._errors, self._retries, self._sent, self._received):
+                values.clear()
+            self._in_flight_peak = self._in_flight
+
+    def prometheus(self, prefix: str = "geant_tcs") -> str:
+        """ The metrics in the Prometheus text exposition format, e.g. for a textfile collector or a /metrics
+            handler.
+
+        Args:
+            prefix (str): Prefix of the metric names
+        """
+
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        family("request_duration_seconds", "histogram", "Duration of requests including retries")
+        for (method, route), histogram in sorted(snapshot["latency"].items()):
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{prefix}_request_duration_seconds_bucket"
+                             f"{_labels(method=method, route=route, le=le)} {cumulative}")
+            lines.append(f"{prefix}_request_duration_seconds_sum{_labels(method=method, route=route)} "
+                         f"{histogram['sum']!r}")
+            lines.append(f"{prefix}_request_duration_seconds_count{_labels(method=method, route=route)} "
+                         f"{histogram['count']}")
+
+        family("responses_total", "counter", "Responses by status code")
+        for (method, route, status), count in sorted(snapshot["responses"].items()):
+            lines.append(f"{prefix}_responses_total{_labels(method=method, route=route, code=status)} {count}")
+
+        family("errors_total", "counter", "Requests failed without a response, by error type")
+        for (method, route, error), count in sorted(snapshot["errors"].items()):
+            lines.append(f"{prefix}_errors_total{_labels(method=method, route=route, error=error)} {count}")
+
+        for name, help_text in (("retries", "Retried attempts"), ("bytes_sent", "Request body bytes sent"),
+                                ("bytes_received", "Response body bytes received")):
+            family(f"{name}_total", "counter", help_text)
+            for (method, route), count in sorted(snapshot[name].items()):
+                lines.append(f"{prefix}_{name}_total{_labels(method=method, route=route)} {count}")
+
+        family("requests_in_flight", "gauge", "Requests currently in flight")
+        lines.append(f"{prefix}_requests_in_flight {snapshot['in_flight']}")
+        family("requests_in_flight_peak", "gauge", "Highest count of requests in flight since the last reset")
+        lines.append(f"{prefix}_requests_in_flight_peak {snapshot['in_flight_peak']}")
+        family("pool_max_connections", "gauge", "Connection pool size of the instrumented clients")
+        lines.append(f"{prefix}_pool_max_connections {snapshot['max_connections']}")
+        return "\n".join(lines) + "\n"
+
+
+def _full_url(client, url: str) -> str:
+    url = str(url)
+    return url if "://" in url else str(client.client.base_url).rstrip("/") + url
+
+
+class OpenTelemetryTracer:
+    """ Records every request as an OpenTelemetry client span named after its method and URL template, with the
+        HTTP semantic convention attributes. Requires the 'opentelemetry-api' package
+        (pip install geant-tcs-client[opentelemetry]); the exporter is whatever the application configured.
+
+    Args:
+        tracer (opentelemetry.trace.Tracer): Tracer to use, defaults to the one of the global tracer provider
+
+    Example:
+        client = AsyncGEANTTCSClient(credentials, instruments=[Metrics(), OpenTelemetryTracer()])
+    """
+
+    def __init__(self, tracer=None):
+        self.trace = require("opentelemetry.trace", "OpenTelemetryTracer requires the 'opentelemetry-api' package")
+        self.tracer = tracer if tracer is not None else self.trace.get_tracer("geant-tcs-client")
+
+    def start(self, client, method: str, url: str, kwargs: dict) -> _Request:
+        route = route_label(method, url)
+        span = self.tracer.start_span(f"{method} {route}", kind=self.trace.SpanKind.CLIENT,
+                                      attributes={"http.request.method": method, "url.template": route,
+                                                  "url.full": _full_url(client, url)})
+        return _Request(method, route, _body_size(kwargs), span)
+
+    def finish(self, request: _Request, response: httpx.Response = None, error: BaseException = None,
+               retries: int = 0):
+        span = request.span
+        if retries:
+            span.set_attribute("http.request.resend_count", retries)
+        if request.sent:
+            span.set_attribute("http.request.body.size", request.sent)
+        if response is not None:
+            span.set_attribute("http.response.status_code", response.status_code)
+            span.set_attribute("http.response.body.size", _received_size(response))
+            if response.status_code >= 400:
+                span.set_attribute("error.type", str(response.status_code))
+                span.set_status(self.trace.Status(self.trace.StatusCode.ERROR))
+        if error is not None:
+            span.set_attribute("error.type", type(error).__name__)
+            span.record_exception(error)
+            span.set_status(self.trace.Status(self.trace.StatusCode.ERROR, str(error)))
+        span.end()
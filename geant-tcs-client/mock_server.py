@@ -0,0 +1,655 @@
+
+import asyncio
+import base64
+import json
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+import zlib
+
+import httpx
+
+import routes
+
+SAMPLE_PEM = ("-----BEGIN CERTIFICATE-----\nMIIFfzCCBGegAwIBAgIRAK5/3ROC1b6j2R8qDGF8ahUwDQYJKoZIhvcNAQELBQAw\n"
+              "-----END CERTIFICATE-----\n")
+SAMPLE_CSR = ("-----BEGIN CERTIFICATE REQUEST-----\nMIIC4jCCAc73.....LWcttIxyWnYgxvwaWX4lfx9A==\n"
+              "-----END CERTIFICATE REQUEST-----")
+
+SSL_TYPES = [{"id": 17973, "name": "EV", "terms": [365]}, {"id": 17945, "name": "OV Multi-Domain", "terms": [365]}]
+SMIME_TYPES = [{"id": 17926, "name": "GÉANT Personal Certificate", "terms": [365, 730]}]
+DEVICE_TYPES = [{"id": 17931, "name": "Device Cert", "terms": [365]}]
+CUSTOM_FIELDS = [{"id": 161, "name": "testName", "mandatory": True}]
+ADMIN_ROLES = ["MRAO", "RAO_SSL", "RAO_SMIME", "DRAO_SSL", "DRAO_SMIME"]
+ADMIN_PRIVILEGES = ["allowSslAutoApprove", "allowSmimeAutoApprove", "allowRevoke", "allowDcv"]
+ACME_SERVERS = [{"active": True, "url": "https://acme.sectigo.com/v2/OV", "caId": 12, "name": "Sectigo OV",
+                 "singleProductId": 17951, "multiProductId": 17945, "wcProductId": 17949, "certValidationType": "OV"}]
+
+NOT_ISSUED = {"code": -1400, "description": "The certificate has not been issued yet"}
+
+# Fields of the rows of the SSL listing, the details have more
+SSL_LISTING_FIELDS = ("sslId", "commonName", "subjectAlternativeNames", "serialNumber")
+# Origin and path of the keystore download links, which are served besides the API
+DOWNLOAD_ORIGIN = "https://cert-manager.com"
+DOWNLOAD_PATH = "/download"
+
+
+class MockTCS:
+    """ In-process fake of the TCS API for tests and benchmarks without the real service.
+
+        It serves the endpoints in routes.ROUTES from a generated dataset shaped like the sample payloads of the
+        resource docstrings: listings page with position/size and send X-Total-Count, enrolled certificates become
+        collectable after `issue_delay` seconds, revocations and renewals change the dataset. Requests without the
+        login/password/customerUri headers get 401. The keystore download links point to DOWNLOAD_ORIGIN, which the
+        transports serve as well.
+
+    Args:
+        ssl_certificates (int): Count of generated SSL certificates
+        persons (int): Count of generated persons, each with one Client certificate
+        domains (int): Count of generated DCV domains
+        acme_accounts (int): Count of generated ACME accounts
+        latency (float): Seconds every request takes
+        jitter (float): Relative random spread of the latency
+        error_rate (float): Share of requests answered with `error_status` instead
+        error_status (int): Status code of the injected errors
+        retry_after (int): Retry-After header of the injected errors, None for none
+        issue_delay (float): Seconds after enrollment an order can be collected
+        base_path (str): Path of the API root in the request URLs
+        seed (int): Seed of the dataset and of the injected latency and errors
+
+    Example:
+        mock = MockTCS(ssl_certificates=10000, latency=0.02, error_rate=0.01)
+        client = GEANTTCSClient(credentials, transport=mock.transport())
+        async_client = AsyncGEANTTCSClient(credentials, transport=mock.async_transport())
+    """
+
+    def __init__(self, ssl_certificates: int = 1000, persons: int = 200, domains: int = 200, acme_accounts: int = 50,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 retry_after: int = None, issue_delay: float = 0.0, base_path: str = "/api", seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.issue_delay = issue_delay
+        self.base_path = base_path.rstrip("/")
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.downloads = {}
+        self._lock = threading.Lock()
+        self._generate(ssl_certificates, persons, domains, acme_accounts)
+
+    def _generate(self, ssl_certificates: int, persons: int, domains: int, acme_accounts: int):
+        statuses = ("Issued",) * 8 + ("Applied", "Revoked", "Expired")
+        self.ssl = {}
+        for ssl_id in range(1, ssl_certificates + 1):
+            common_name = f"host{ssl_id}.example.org"
+            self.ssl[ssl_id] = {
+                "sslId": ssl_id, "commonName": common_name, "subjectAlternativeNames": [common_name],
+                "serialNumber": ":".join(f"{self.random.randrange(256):02x}" for _ in range(16)),
+                "status": statuses[ssl_id % len(statuses)], "renewId": f"renew{ssl_id:015d}",
+                "expires": f"20{22 + ssl_id % 3}-{1 + ssl_id % 12:02d}-{1 + ssl_id % 28:02d}",
+                "orgId": 10557, "certType": 17945, "term": 365, "issuer": "GEANT OV RSA CA 4",
+                "keyAlgorithm": "RSA", "keySize": 2048, "issued": 0.0}
+        self.persons = {}
+        self.smime = {}
+        for person_id in range(1, persons + 1):
+            email = f"person{person_id}@example.org"
+            self.persons[person_id] = {
+                "id": person_id, "firstName": "Tester", "middleName": "", "lastName": f"No{person_id}",
+                "email": email, "organizationId": 10406, "validationType": "STANDARD", "phone": "123456789",
+                "secondaryEmails": [], "commonName": f"Tester No{person_id}"}
+            self.smime[16000 + person_id] = {
+                "id": person_id, "personId": person_id, "email": email, "subject": f"CN=Tester No{person_id}",
+                "state": "issued", "serialNumber": ":".join(f"{self.random.randrange(256):02X}" for _ in range(16)),
+                "orderNumber": 16000 + person_id, "issued": 0.0}
+        self.device = {}
+        self.domains = {}
+        for index in range(1, domains + 1):
+            domain = f"domain{index}.example.org"
+            self.domains[domain] = {"domain": domain, "dcvStatus": "VALIDATED" if index % 4 else "NOT_VALIDATED",
+                                    "dcvOrderStatus": "NOT_INITIATED", "dcvMethod": None,
+                                    "expirationDate": f"2023-{1 + index % 12:02d}-01"}
+        self.acme = {}
+        for account_id in range(1, acme_accounts + 1):
+            self.acme[account_id] = {
+                "id": account_id, "name": f"account{account_id}", "status": "Valid", "macKey": "mac-key",
+                "macId": f"mac{account_id}", "acmeServer": "https://acme.sectigo.com/v2/OV", "organizationId": 10406,
+                "certValidationType": "OV", "accountID": "", "ovOrderNumber": 0, "contacts": "",
+                "evDetails": {}, "domains": [{"name": f"domain{account_id}.example.org"}]}
+        self.admins = {1: {"id": 1, "login": "admin_customer14378", "forename": "Admin", "surname": "Adminovich",
+                           "email": "admin@example.org", "credentials": [{"role": "MRAO", "orgId": 10406}]}}
+
+    # transport
+
+    def _fault(self):
+        """ Latency to add and whether to inject an error, drawn under the lock so the run is reproducible. """
+
+        with self._lock:
+            self.requests += 1
+            delay = self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter) if self.latency else 0.0
+            failed = self.error_rate and self.random.random() < self.error_rate
+        return delay, failed
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """ Response to one request, without latency. """
+
+        path = request.url.path
+        if request.method == "GET" and path == DOWNLOAD_PATH:
+            with self._lock:
+                return self._download(dict(request.url.params))
+        if path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+        template, parameters = routes.match(request.method, path)
+        if template is None:
+            return self._json(404, {"code": -404, "description": "Unknown resource"})
+        if not all(request.headers.get(name) for name in ("login", "password", "customerUri")):
+            return self._json(401, {"code": -16, "description": "Unknown user"})
+
+        body = json.loads(request.content) if request.content else {}
+        query = dict(request.url.params)
+        parameters = {name: urllib.parse.unquote(value) for name, value in parameters.items()}
+        handler = getattr(self, HANDLERS[request.method, template])
+        with self._lock:
+            return handler(body=body, query=query, **parameters)
+
+    def _injected_error(self) -> httpx.Response:
+        headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+        return self._json(self.error_status, {"code": -1, "description": "Injected error"}, headers)
+
+    def _sync_handler(self, request: httpx.Request) -> httpx.Response:
+        delay, failed = self._fault()
+        if delay:
+            time.sleep(delay)
+        return self._injected_error() if failed else self.handle(request)
+
+    async def _async_handler(self, request: httpx.Request) -> httpx.Response:
+        delay, failed = self._fault()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._injected_error() if failed else self.handle(request)
+
+    def transport(self) -> httpx.MockTransport:
+        """ Transport for GEANTTCSClient; latency blocks the calling thread. """
+
+        return httpx.MockTransport(self._sync_handler)
+
+    def async_transport(self) -> httpx.MockTransport:
+        """ Transport for AsyncGEANTTCSClient; latency is awaited, so concurrent requests overlap. """
+
+        return httpx.MockTransport(self._async_handler)
+
+    def asgi_app(self):
+        """ ASGI application serving the mock over real HTTP, e.g. uvicorn.run(mock.asgi_app(), port=8000) with
+            base_url 'http://127.0.0.1:8000/api'.
+        """
+
+        async def app(scope, receive, send):
+            if scope["type"] != "http":
+                return
+            body = b""
+            more = True
+            while more:
+                message = await receive()
+                body += message.get("body", b"")
+                more = message.get("more_body", False)
+            headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]]
+            url = f"http://mock{scope['path']}"
+            if scope.get("query_string"):
+                url = f"{url}?{scope['query_string'].decode('latin-1')}"
+            response = await self._async_handler(httpx.Request(scope["method"], url, headers=headers, content=body))
+            await send({"type": "http.response.start", "status": response.status_code,
+                        "headers": [(name.encode("latin-1"), value.encode("latin-1"))
+                                    for name, value in response.headers.items()]})
+            await send({"type": "http.response.body", "body": response.content})
+
+        return app
+
+    # helpers
+
+    @staticmethod
+    def _json(status_code: int, data=None, headers: dict = None) -> httpx.Response:
+        if data is None:
+            return httpx.Response(status_code, headers=headers)
+        return httpx.Response(status_code, headers={**(headers or {}), "Content-Type": "application/json"},
+                              content=json.dumps(data).encode("utf-8"))
+
+    def _page(self, records: list, query: dict, transform=None) -> httpx.Response:
+        position = int(query.get("position", 0))
+        size = int(query.get("size", 10))
+        page = records[position:position + size]
+        if transform is not None:
+            page = [transform(record) for record in page]
+        return self._json(200, page, {"X-Total-Count": str(len(records))})
+
+    @staticmethod
+    def _public(record: dict) -> dict:
+        return {key: value for key, value in record.items() if key not in ("issued", "personId")}
+
+    @staticmethod
+    def _ssl_listing(record: dict) -> dict:
+        return {key: record[key] for key in SSL_LISTING_FIELDS}
+
+    @staticmethod
+    def _not_found(kind: str) -> httpx.Response:
+        return MockTCS._json(404, {"code": -105, "description": f"The {kind} was not found"})
+
+    def _issued(self, record: dict) -> bool:
+        return time.time() >= record["issued"]
+
+    # SSL
+
+    def _list_ssl(self, body, query, version):
+        filters = [(key, value) for key, value in query.items() if key not in ("position", "size")]
+        records = list(self.ssl.values())
+        if filters:
+            records = [record for record in records if all(str(record.get(key)) == value for key, value in filters)]
+        return self._page(records, query, self._ssl_listing)
+
+    def _ssl_details(self, body, query, version, ssl_id):
+        record = self.ssl.get(int(ssl_id)) if ssl_id.isdigit() else None
+        return self._json(200, self._public(record)) if record else self._not_found("certificate")
+
+    def _enroll_ssl(self, body, query, version):
+        ssl_id = max(self.ssl, default=0) + 1
+        common_name = body.get("commonName") or (body.get("subjAltNames") or f"host{ssl_id}.example.org").split(",")[0]
+        self.ssl[ssl_id] = {
+            "sslId": ssl_id, "commonName": common_name, "subjectAlternativeNames": [common_name],
+            "serialNumber": ":".join(f"{self.random.randrange(256):02x}" for _ in range(16)), "status": "Applied",
+            "renewId": f"renew{ssl_id:015d}", "expires": "2025-01-01", "orgId": body.get("orgId"),
+            "certType": body.get("certType"), "term": body.get("term"), "issuer": "GEANT OV RSA CA 4",
+            "keyAlgorithm": body.get("algorithm", "RSA"), "keySize": body.get("keySize", 2048),
+            "issued": time.time() + self.issue_delay}
+        return self._json(200, {"renewId": self.ssl[ssl_id]["renewId"], "sslId": ssl_id})
+
+    def _collect_ssl(self, body, query, version, ssl_id, format_type):
+        record = self.ssl.get(int(ssl_id)) if ssl_id.isdigit() else None
+        if record is None:
+            return self._not_found("certificate")
+        if not self._issued(record):
+            return self._json(400, NOT_ISSUED)
+        record["status"] = "Issued" if record["status"] == "Applied" else record["status"]
+        return httpx.Response(200, content=SAMPLE_PEM.encode("ascii"))
+
+    def _keystore_ssl(self, body, query, version, ssl_id, format_type):
+        if not ssl_id.isdigit() or int(ssl_id) not in self.ssl:
+            return self._not_found("certificate")
+        token = uuid.uuid4().hex.upper()
+        self.downloads[token] = (int(ssl_id), format_type)
+        return self._json(200, {"link": f"{DOWNLOAD_ORIGIN}{DOWNLOAD_PATH}?token={token}"
+                                         f"&keyformat={format_type.upper()}"})
+
+    def _download(self, query) -> httpx.Response:
+        """ Target of a keystore download link: the Base64 encoded private key or PKCS#12 of the certificate. """
+
+        if query.get("token") not in self.downloads:
+            return self._not_found("download")
+        ssl_id, format_type = self.downloads[query["token"]]
+        content = f"{format_type} of certificate {ssl_id}".encode("ascii")
+        return httpx.Response(200, content=base64.b64encode(content))
+
+    def _revoke_ssl(self, body, query, version, ssl_id):
+        record = self.ssl.get(int(ssl_id)) if ssl_id.isdigit() else None
+        if record is None:
+            return self._not_found("certificate")
+        record["status"] = "Revoked"
+        return self._json(204)
+
+    def _revoke_ssl_serial(self, body, query, version, serial_number):
+        for record in self.ssl.values():
+            if record["serialNumber"] == serial_number:
+                record["status"] = "Revoked"
+                return self._json(204)
+        return self._not_found("certificate")
+
+    def _renew_ssl(self, body, query, version, renew_id):
+        for record in list(self.ssl.values()):
+            if record["renewId"] == renew_id:
+                return self._enroll_ssl({"commonName": record["commonName"], "orgId": record["orgId"],
+                                         "certType": record["certType"], "term": record["term"]}, query, version)
+        return self._not_found("certificate")
+
+    def _replace_ssl(self, body, query, version, ssl_id):
+        record = self.ssl.get(int(ssl_id)) if ssl_id.isdigit() else None
+        if record is None:
+            return self._not_found("certificate")
+        record["status"] = "Replaced"
+        return self._json(204)
+
+    # Client (S/MIME) and Device certificates
+
+    def _enroll_smime(self, body, query, version):
+        order_number = max((record["orderNumber"] for record in self.smime.values()), default=16000) + 1
+        self.smime[order_number] = {
+            "id": order_number, "personId": None, "email": body.get("email"), "subject": f"CN={body.get('email')}",
+            "state": "requested", "serialNumber": ":".join(f"{self.random.randrange(256):02X}" for _ in range(16)),
+            "orderNumber": order_number, "issued": time.time() + self.issue_delay}
+        return self._json(200, {"orderNumber": order_number, "backendCertId": str(order_number)})
+
+    def _smime_by(self, key: str, value):
+        for record in self.smime.values():
+            if str(record[key]) == str(value):
+                return record
+        return None
+
+    def _collect_smime(self, body, query, version, order_number):
+        record = self._smime_by("orderNumber", order_number)
+        if record is None:
+            return self._not_found("certificate")
+        if not self._issued(record):
+            return self._json(400, NOT_ISSUED)
+        record["state"] = "issued" if record["state"] == "requested" else record["state"]
+        return httpx.Response(200, content=SAMPLE_PEM.encode("ascii"))
+
+    def _renew_smime(self, body, query, version, order_number=None, serial_number=None):
+        record = self._smime_by("orderNumber", order_number) if order_number else \
+            self._smime_by("serialNumber", serial_number)
+        if record is None:
+            return self._not_found("certificate")
+        return self._enroll_smime({"email": record["email"]}, query, version)
+
+    def _replace_smime(self, body, query, version, order_number):
+        if self._smime_by("orderNumber", order_number) is None:
+            return self._not_found("certificate")
+        return self._json(204)
+
+    def _revoke_smime(self, body, query, version, order_number=None, serial_number=None):
+        if order_number is None and serial_number is None:
+            records = [record for record in self.smime.values() if record["email"] == body.get("email")]
+        else:
+            record = self._smime_by("orderNumber", order_number) if order_number else \
+                self._smime_by("serialNumber", serial_number)
+            records = [record] if record else []
+        if not records:
+            return self._not_found("certificate")
+        for record in records:
+            record["state"] = "revoked"
+        return self._json(204)
+
+    def _smime_by_person(self, body, query, version, person_id=None, email=None):
+        return self._json(200, [self._public(record) for record in self.smime.values()
+                                if (person_id is not None and str(record["personId"]) == person_id) or
+                                (email is not None and record["email"] == email)])
+
+    def _enroll_device(self, body, query, version):
+        order_number = max(self.device, default=15400) + 1
+        self.device[order_number] = {"orderNumber": order_number, "status": "Applied",
+                                     "serialNumber": ":".join(f"{self.random.randrange(256):02X}" for _ in range(16)),
+                                     "issued": time.time() + self.issue_delay}
+        return self._json(200, {"orderNumber": order_number, "backendCertId": str(order_number)})
+
+    def _device_by(self, order_number=None, serial_number=None):
+        if order_number is not None:
+            return self.device.get(int(order_number)) if order_number.isdigit() else None
+        return next((record for record in self.device.values() if record["serialNumber"] == serial_number), None)
+
+    def _collect_device(self, body, query, version, order_number, format_type):
+        record = self._device_by(order_number)
+        if record is None:
+            return self._not_found("certificate")
+        if not self._issued(record):
+            return self._json(400, NOT_ISSUED)
+        return httpx.Response(200, content=SAMPLE_PEM.encode("ascii"))
+
+    def _renew_device(self, body, query, version, order_number=None, serial_number=None):
+        if self._device_by(order_number, serial_number) is None:
+            return self._not_found("certificate")
+        return self._enroll_device(body, query, version)
+
+    def _replace_device(self, body, query, version, order_number):
+        return self._json(204) if self._device_by(order_number) else self._not_found("certificate")
+
+    def _revoke_device(self, body, query, version, order_number=None, serial_number=None):
+        record = self._device_by(order_number, serial_number)
+        if record is None:
+            return self._not_found("certificate")
+        record["status"] = "Revoked"
+        return self._json(204)
+
+    # DCV
+
+    def _search_domains(self, body, query, version):
+        filters = {"domain": "domain", "dcvStatus": "dcvStatus", "orderStatus": "dcvOrderStatus"}
+        records = [record for record in self.domains.values()
+                   if all(record[key] == query[name] for name, key in filters.items() if name in query)]
+        return self._page(records, query)
+
+    def _start_validation(self, body, query, version, method):
+        domain = body.get("domain")
+        if domain not in self.domains:
+            return self._not_found("domain")
+        record = self.domains[domain]
+        record.update(dcvMethod=method.upper(), dcvOrderStatus="AWAITING_SUBMIT")
+        token = f"{zlib.crc32(domain.encode('utf-8')):08x}"
+        if method == "cname":
+            return self._json(200, {"host": f"_{token}.{domain}.", "point": f"{token}.sectigo.com."})
+        return self._json(200, {"url": f"{method}://{domain}/.well-known/pki-validation/{token}.txt",
+                                "firstLine": token, "secondLine": "sectigo.com"})
+
+    def _submit_validation(self, body, query, version, method):
+        domain = body.get("domain")
+        if domain not in self.domains:
+            return self._not_found("domain")
+        record = self.domains[domain]
+        record.update(dcvStatus="VALIDATED", dcvOrderStatus="SUBMITTED")
+        return self._json(200, {"status": "NOT_VALIDATED", "orderStatus": "SUBMITTED", "message": "DCV submitted"})
+
+    def _validation_status(self, body, query, version):
+        record = self.domains.get(body.get("domain"))
+        if record is None:
+            return self._not_found("domain")
+        return self._json(200, {"status": record["dcvStatus"], "orderStatus": record["dcvOrderStatus"],
+                                "expirationDate": record["expirationDate"]})
+
+    # Persons
+
+    def _list_persons(self, body, query, version):
+        return self._page(list(self.persons.values()), query)
+
+    def _create_person(self, body, query, version):
+        person_id = max(self.persons, default=0) + 1
+        self.persons[person_id] = {"id": person_id, "firstName": body.get("firstName"),
+                                   "middleName": body.get("middleName"), "lastName": body.get("lastName"),
+                                   "email": body.get("email"), "organizationId": body.get("organizationId"),
+                                   "validationType": body.get("validationType"), "phone": body.get("phone"),
+                                   "secondaryEmails": body.get("secondaryEmails") or [],
+                                   "commonName": body.get("commonName")}
+        return self._json(201, headers={"Location": f"{self.base_path}/person/{version}/{person_id}"})
+
+    def _person_id_by_email(self, body, query, version, email):
+        for person in self.persons.values():
+            if person["email"] == email:
+                return self._json(200, {"personId": person["id"]})
+        return self._not_found("person")
+
+    def _person(self, person_id: str):
+        return self.persons.get(int(person_id)) if person_id.isdigit() else None
+
+    def _get_person(self, body, query, version, person_id):
+        person = self._person(person_id)
+        return self._json(200, person) if person else self._not_found("person")
+
+    def _update_person(self, body, query, version, person_id):
+        person = self._person(person_id)
+        if person is None:
+            return self._not_found("person")
+        person.update({key: value for key, value in body.items() if key in person})
+        return self._json(200)
+
+    def _delete_person(self, body, query, version, person_id):
+        if self._person(person_id) is None:
+            return self._not_found("person")
+        del self.persons[int(person_id)]
+        return self._json(204)
+
+    def _import_key(self, body, query, version, person_id):
+        if self._person(person_id) is None:
+            return self._not_found("person")
+        return self._json(201, {"id": max(self.smime, default=0) + 1})
+
+    # ACME
+
+    def _list_acme_accounts(self, body, query, version):
+        return self._page(list(self.acme.values()), query)
+
+    def _create_acme_account(self, body, query, version):
+        account_id = max(self.acme, default=0) + 1
+        self.acme[account_id] = {"id": account_id, "name": body.get("name"), "status": "Pending",
+                                 "macKey": "mac-key", "macId": f"mac{account_id}",
+                                 "acmeServer": body.get("acmeServer"), "organizationId": body.get("organizationId"),
+                                 "certValidationType": "OV", "accountID": "", "ovOrderNumber": 0, "contacts": "",
+                                 "evDetails": body.get("evDetails") or {}, "domains": []}
+        return self._json(201, headers={"Location": f"{self.base_path}/acme/{version}/account/{account_id}"})
+
+    def _acme_account(self, account_id: str):
+        return self.acme.get(int(account_id)) if account_id.isdigit() else None
+
+    def _get_acme_account(self, body, query, version, id):
+        account = self._acme_account(id)
+        return self._json(200, account) if account else self._not_found("ACME account")
+
+    def _update_acme_account(self, body, query, version, id):
+        account = self._acme_account(id)
+        if account is None:
+            return self._not_found("ACME account")
+        account["name"] = body.get("name", account["name"])
+        return self._json(200)
+
+    def _delete_acme_account(self, body, query, version, id):
+        if self._acme_account(id) is None:
+            return self._not_found("ACME account")
+        del self.acme[int(id)]
+        return self._json(204)
+
+    def _add_acme_domains(self, body, query, version, id):
+        account = self._acme_account(id)
+        if account is None:
+            return self._not_found("ACME account")
+        added = [domain for domain in body.get("domains", []) if domain not in account["domains"]]
+        account["domains"].extend(added)
+        return self._json(200, {"notAddedDomains": []})
+
+    def _remove_acme_domains(self, body, query, version, id):
+        account = self._acme_account(id)
+        if account is None:
+            return self._not_found("ACME account")
+        account["domains"] = [domain for domain in account["domains"] if domain not in body.get("domains", [])]
+        return self._json(200, {"notRemovedDomains": []})
+
+    def _list_acme_servers(self, body, query, version):
+        return self._page(ACME_SERVERS, query)
+
+    # Client administrators
+
+    def _list_admins(self, body, query, version):
+        return self._page(list(self.admins.values()), query)
+
+    def _admin(self, admin_id: str):
+        return self.admins.get(int(admin_id)) if admin_id.isdigit() else None
+
+    def _get_admin(self, body, query, version, id):
+        admin = self._admin(id)
+        return self._json(200, admin) if admin else self._not_found("admin")
+
+    def _update_admin(self, body, query, version, id):
+        admin = self._admin(id)
+        if admin is None:
+            return self._not_found("admin")
+        admin.update({key: value for key, value in body.items() if key in admin})
+        return self._json(200)
+
+    def _delete_admin(self, body, query, version, id):
+        if self._admin(id) is None:
+            return self._not_found("admin")
+        del self.admins[int(id)]
+        return self._json(204)
+
+    def _change_password(self, body, query, version):
+        return self._json(204)
+
+    # Catalogs
+
+    def _ssl_types(self, body, query, version):
+        return self._json(200, SSL_TYPES)
+
+    def _smime_types(self, body, query, version):
+        return self._json(200, SMIME_TYPES)
+
+    def _device_types(self, body, query, version):
+        return self._json(200, DEVICE_TYPES)
+
+    def _custom_fields(self, body, query, version):
+        return self._json(200, CUSTOM_FIELDS)
+
+    def _admin_roles(self, body, query, version):
+        return self._json(200, ADMIN_ROLES)
+
+    def _admin_privileges(self, body, query, version):
+        return self._json(200, ADMIN_PRIVILEGES)
+
+
+# (method, URL template of routes.ROUTES) -> handler method of MockTCS
+HANDLERS = {
+    ("GET", "/ssl/{version}/"): "_list_ssl",
+    ("GET", "/ssl/{version}/types"): "_ssl_types",
+    ("GET", "/ssl/{version}/customFields"): "_custom_fields",
+    ("POST", "/ssl/{version}/enroll"): "_enroll_ssl",
+    ("POST", "/ssl/{version}/enroll-keygen"): "_enroll_ssl",
+    ("GET", "/ssl/{version}/keystore/{ssl_id}/{format_type}"): "_keystore_ssl",
+    ("GET", "/ssl/{version}/collect/{ssl_id}/{format_type}"): "_collect_ssl",
+    ("POST", "/ssl/{version}/revoke/serial/{serial_number}"): "_revoke_ssl_serial",
+    ("POST", "/ssl/{version}/revoke/{ssl_id}"): "_revoke_ssl",
+    ("POST", "/ssl/{version}/renew/{renew_id}"): "_renew_ssl",
+    ("POST", "/ssl/{version}/replace/{ssl_id}"): "_replace_ssl",
+    ("GET", "/ssl/{version}/{ssl_id}"): "_ssl_details",
+    ("GET", "/smime/{version}/types"): "_smime_types",
+    ("GET", "/smime/{version}/customFields"): "_custom_fields",
+    ("POST", "/smime/{version}/enroll"): "_enroll_smime",
+    ("GET", "/smime/{version}/collect/{order_number}"): "_collect_smime",
+    ("POST", "/smime/{version}/renew/order/{order_number}"): "_renew_smime",
+    ("POST", "/smime/{version}/renew/serial/{serial_number}"): "_renew_smime",
+    ("POST", "/smime/{version}/replace/order/{order_number}"): "_replace_smime",
+    ("POST", "/smime/{version}/revoke/order/{order_number}"): "_revoke_smime",
+    ("POST", "/smime/{version}/revoke/serial/{serial_number}"): "_revoke_smime",
+    ("POST", "/smime/{version}/revoke"): "_revoke_smime",
+    ("GET", "/smime/{version}/byPersonId/{person_id}"): "_smime_by_person",
+    ("GET", "/smime/{version}/byPersonEmail/{email}"): "_smime_by_person",
+    ("GET", "/device/{version}/types"): "_device_types",
+    ("GET", "/device/{version}/customFields"): "_custom_fields",
+    ("POST", "/device/{version}/enroll"): "_enroll_device",
+    ("POST", "/device/{version}/collect/{order_number}/{format_type}"): "_collect_device",
+    ("POST", "/device/{version}/renew/order/{order_number}"): "_renew_device",
+    ("POST", "/device/{version}/renew/serial/{serial_number}"): "_renew_device",
+    ("POST", "/device/{version}/replace/order/{order_number}"): "_replace_device",
+    ("POST", "/device/{version}/revoke/order/{order_number}"): "_revoke_device",
+    ("POST", "/device/{version}/revoke/serial/{serial_number}"): "_revoke_device",
+    ("GET", "/dcv/{version}/validation"): "_search_domains",
+    ("POST", "/dcv/{version}/validation/start/domain/{method}"): "_start_validation",
+    ("POST", "/dcv/{version}/validation/submit/domain/{method}"): "_submit_validation",
+    ("POST", "/dcv/{version}/validation/status"): "_validation_status",
+    ("GET", "/person/{version}/"): "_list_persons",
+    ("POST", "/person/{version}"): "_create_person",
+    ("GET", "/person/{version}/id/byEmail/{email}"): "_person_id_by_email",
+    ("POST", "/person/{version}/{person_id}/import-key"): "_import_key",
+    ("GET", "/person/{version}/{person_id}"): "_get_person",
+    ("PUT", "/person/{version}/{person_id}"): "_update_person",
+    ("DELETE", "/person/{version}/{person_id}"): "_delete_person",
+    ("GET", "/acme/{version}/account"): "_list_acme_accounts",
+    ("POST", "/acme/{version}/account/"): "_create_acme_account",
+    ("POST", "/acme/{version}/account/{id}/domains"): "_add_acme_domains",
+    ("DELETE", "/acme/{version}/account/{id}/domains"): "_remove_acme_domains",
+    ("GET", "/acme/{version}/account/{id}"): "_get_acme_account",
+    ("PUT", "/acme/{version}/account/{id}"): "_update_acme_account",
+    ("DELETE", "/acme/{version}/account/{id}"): "_delete_acme_account",
+    ("GET", "/acme/{version}/server"): "_list_acme_servers",
+    ("GET", "/admin/{version}/"): "_list_admins",
+    ("GET", "/admin/{version}/roles"): "_admin_roles",
+    ("GET", "/admin/{version}/privileges"): "_admin_privileges",
+    ("POST", "/admin/{version}/changepassword"): "_change_password",
+    ("GET", "/admin/{version}/{id}"): "_get_admin",
+    ("GET", "/admin/{version}/{id}/"): "_get_admin",
+    ("PUT", "/admin/{version}/{id}"): "_update_admin",
+    ("DELETE", "/admin/{version}/{id}"): "_delete_admin",
+}
@@ -0,0 +1,247 @@
+
+import json
+import re
+
+# A JSON string or an object brace; braces inside strings are skipped with the string
+_TOKENS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}]', re.DOTALL)
+_OPEN = ord("{")
+_CLOSE = ord("}")
+
+
+def row_spans(content: bytes):
+    """ Yield the (start, end) offsets of the objects in the JSON array `content` without decoding them. """
+
+    depth = 0
+    start = 0
+    for match in _TOKENS.finditer(content):
+        char = content[match.start()]
+        if char == _OPEN:
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif char == _CLOSE:
+            depth -= 1
+            if depth == 0:
+                yield start, match.end()
+
+
+class Model:
+    """ Base of the typed response models.
+
+        A model keeps a reference to the page it came from and the offsets of its row. The row is decoded on the
+        first attribute access, its values are stored in slots and the page reference is dropped, so a listing of
+        many rows costs little more than the raw page until rows are used, and no per-row dict afterwards.
+
+        Subclasses map attribute names to API keys in `_fields` and use them as `__slots__`. Nested objects are
+        converted with the model classes in `_nested`. Keys of a row which are not in `_fields` are ignored.
+    """
+
+    __slots__ = ("_buffer", "_start", "_end", "_loads")
+    _fields = {}
+    _nested = {}
+
+    def __init__(self, buffer: bytes, start: int = 0, end: int = None, loads=None):
+        self._buffer = buffer
+        self._start = start
+        self._end = len(buffer) if end is None else end
+        self._loads = loads or json.loads
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """ Model of an already decoded row. """
+
+        model = cls.__new__(cls)
+        model._buffer = None
+        model._set(data)
+        return model
+
+    @classmethod
+    def rows(cls, content: bytes, loads=None) -> list:
+        """ Models of the rows of a JSON array of objects, e.g. the content of a list response. Nothing is decoded
+            until a row is used.
+        """
+
+        return [cls(content, start, end, loads) for start, end in row_spans(content)]
+
+    def _set(self, data: dict):
+        for attribute, key in self._fields.items():
+            value = data.get(key)
+            if value is not None and attribute in self._nested:
+                nested = self._nested[attribute]
+                value = [nested.from_dict(item) for item in value] if isinstance(value, list) \
+                    else nested.from_dict(value)
+            setattr(self, attribute, value)
+
+    def _decode(self):
+        buffer, self._buffer = self._buffer, None
+        self._set(self._loads(buffer[self._start:self._end]))
+
+    def __getattr__(self, name: str):
+        # only called for unset slots, i.e. before the row is decoded
+        if name in self._fields and self._buffer is not None:
+            self._decode()
+            return getattr(self, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def to_dict(self) -> dict:
+        """ Row in the API format, nested models included. """
+
+        data = {}
+        for attribute, key in self._fields.items():
+            value = getattr(self, attribute)
+            if isinstance(value, Model):
+                value = value.to_dict()
+            elif isinstance(value, list) and attribute in self._nested:
+                value = [item.to_dict() for item in value]
+            data[key] = value
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        values = ", ".join(f"{attribute}={getattr(self, attribute)!r}" for attribute in self._fields)
+        return f"{type(self).__name__}({values})"
+
+
+class SSLCertificate(Model):
+    """ Row of listing_ssl_certificates, also covers ssl_certificate_details.
+
+    Attributes:
+        ssl_id (int): SSL ID
+        common_name (str): SSL Common Name
+        subject_alternative_names (List[str]): SSL Subject Alternative Names
+        serial_number (str): SSL Serial Number
+        status (str): SSL status (details only)
+        renew_id (str): Renew ID (details only)
+        expires (str): Expiration date (details only)
+    """
+
+    _fields = {"ssl_id": "sslId", "common_name": "commonName", "subject_alternative_names": "subjectAlternativeNames",
+               "serial_number": "serialNumber", "status": "status", "renew_id": "renewId", "expires": "expires"}
+    __slots__ = tuple(_fields)
+
+
+class Person(Model):
+    """ Row of list_persons, also covers get_person_details.
+
+    Attributes:
+        id (int): Person ID
+        organization_id (int): Organization ID
+        email (str): Person e-mail
+        first_name (str): Person firstname
+        middle_name (str): Person middlename
+        last_name (str): Person lastname
+        validation_type (str): Person validation type. Values: [STANDARD, HIGH]
+        phone (str): Person Phone
+        common_name (str): Person CommonName
+        secondary_emails (List[str]): Person Secondary Emails
+    """
+
+    _fields = {"id": "id", "organization_id": "organizationId", "email": "email", "first_name": "firstName",
+               "middle_name": "middleName", "last_name": "lastName", "validation_type": "validationType",
+               "phone": "phone", "common_name": "commonName", "secondary_emails": "secondaryEmails"}
+    __slots__ = tuple(_fields)
+
+
+class EVDetails(Model):
+    """ EV details of an ACME account.
+
+    Attributes:
+        org_name (str): EV organization name
+        org_country (str): EV organization country
+        post_office_box (str): EV organization post office box
+        org_address1 (str): EV organization address 1
+        org_address2 (str): EV organization address 2
+        org_address3 (str): EV organization address 3
+        org_locality (str): EV organization city
+        org_state_or_province (str): EV organization state/province
+        org_postal_code (str): EV organization postal code
+        org_joi_state (str): EV organization state or province of incorporation
+        org_joi_country (str): EV organization country of incorporation
+        org_joi_locality (str): EV organization jurisdiction of incorporation city or town
+        assumed_name (str): EV organization assumed name
+        business_category (str): EV organization business category
+        date_of_incorporation (str): EV organization date of incorporation
+        company_number (str): EV organization registration number
+    """
+
+    _fields = {"org_name": "orgName", "org_country": "orgCountry", "post_office_box": "postOfficeBox",
+               "org_address1": "orgAddress1", "org_address2": "orgAddress2", "org_address3": "orgAddress3",
+               "org_locality": "orgLocality", "org_state_or_province": "orgStateOrProvince",
+               "org_postal_code": "orgPostalCode", "org_joi_state": "orgJoiState", "org_joi_country": "orgJoiCountry",
+               "org_joi_locality": "orgJoiLocality", "assumed_name": "assumedName",
+               "business_category": "businessCategory", "date_of_incorporation": "dateOfIncorporation",
+               "company_number": "companyNumber"}
+    __slots__ = tuple(_fields)
+
+
+class ACMEDomain(Model):
+    """ Domain of an ACME account.
+
+    Attributes:
+        name (str): ACME account domain name
+    """
+
+    _fields = {"name": "name"}
+    __slots__ = tuple(_fields)
+
+
+class ACMEAccount(Model):
+    """ Row of list_acme_accounts, also covers get_acme_account.
+
+    Attributes:
+        id (int): ACME account entity ID
+        name (str): ACME account name
+        status (str): ACME account status
+        mac_key (str): ACME account HMAC key
+        mac_id (str): ACME account key ID
+        acme_server (str): ACME account server name
+        organization_id (int): ACME account organization ID
+        cert_validation_type (str): ACME account server validation type. Values: [DV, OV, EV]
+        account_id (str): ACME account ID
+        ov_order_number (int): OV order number
+        contacts (str): ACME account contacts
+        ev_details (EVDetails): ACME account EV details
+        domains (List[ACMEDomain]): ACME account domains
+    """
+
+    _fields = {"id": "id", "name": "name", "status": "status", "mac_key": "macKey", "mac_id": "macId",
+               "acme_server": "acmeServer", "organization_id": "organizationId",
+               "cert_validation_type": "certValidationType", "account_id": "accountID",
+               "ov_order_number": "ovOrderNumber", "contacts": "contacts", "ev_details": "evDetails",
+               "domains": "domains"}
+    _nested = {"ev_details": EVDetails, "domains": ACMEDomain}
+    __slots__ = tuple(_fields)
+
+
+class DCVDomain(Model):
+    """ Row of search_domains.
+
+    Attributes:
+        domain (str): Domain
+        dcv_status (str): DCV Status
+        dcv_order_status (str): DCV Order status
+        dcv_method (str): DCV Method
+        expiration_date (str): Expiration date of the validation
+    """
+
+    _fields = {"domain": "domain", "dcv_status": "dcvStatus", "dcv_order_status": "dcvOrderStatus",
+               "dcv_method": "dcvMethod", "expiration_date": "expirationDate"}
+    __slots__ = tuple(_fields)
+
+
+class ClientCertificate(Model):
+    """ Row of list_client_certificates_by_person_id and list_client_certificates_by_person_email.
+
+    Attributes:
+        id (int): Certificate ID
+        subject (str): Certificate subject
+        state (str): Certificate state
+        serial_number (str): Certificate serial number (v2)
+        order_number (int): Certificate order number (v2)
+    """
+
+    _fields = {"id": "id", "subject": "subject", "state": "state", "serial_number": "serialNumber",
+               "order_number": "orderNumber"}
+    __slots__ = tuple(_fields)
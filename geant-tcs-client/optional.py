@@ -0,0 +1,26 @@
+
+import importlib
+import importlib.util
+
+
+def available(name: str) -> bool:
+    """ True if the module can be imported, without importing it. """
+
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def require(name: str, message: str):
+    """ Import an optional dependency on first use. Later calls only look it up in sys.modules.
+
+    Args:
+        name (str): Module name like 'pyarrow.parquet'
+        message (str): Message of the ImportError raised if the module is not installed
+    """
+
+    try:
+        return importlib.import_module(name)
+    except ImportError as error:
+        raise ImportError(message) from error
@@ -0,0 +1,185 @@
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def query(**params) -> dict:
+    """ Query parameters of a list endpoint without the filters that are not set (None). """
+
+    return {key: value for key, value in params.items() if value is not None}
+
+
+def page_records(response, loads=None, model=None) -> list:
+    """ Records of one page of a list endpoint, decoded with `loads` (the serializer of the client) if given. With a
+        `model` (see models.py) the page is split into lazily decoded model rows instead.
+
+    Raises:
+        httpx.HTTPStatusError: The page could not be fetched
+    """
+
+    response.raise_for_status()
+    if model is not None:
+        return model.rows(response.content, loads)
+    return loads(response.content) if loads is not None else response.json()
+
+
+def total_count(response):
+    """ Total count of entries announced by a list endpoint, None if the server does not send it. """
+
+    value = response.headers.get(TOTAL_COUNT_HEADER)
+    return int(value) if value and value.isdigit() else None
+
+
+def _window(total, records: list, size: int, concurrency: int) -> int:
+    """ Count of pages to request in the next round: every remaining page if the total is known, otherwise one page
+        per worker until a short page marks the end.
+    """
+
+    if total is None:
+        return concurrency
+    return max(-(-(total - len(records)) // size), 1)
+
+
+def _complete(page: list, records: list, size: int, total) -> bool:
+    return len(page) < size or (total is not None and len(records) >= total)
+
+
+def iter_records(fetch_page, size: int = 100, position: int = 0, prefetch: bool = False, loads=None, model=None):
+    """ Fetch the pages of a list endpoint lazily and yield one record at a time. Only one page is held in memory.
+
+    Args:
+        fetch_page (Callable[[int, int], httpx.Response]): Requests the page at the given position and size
+        size (int): Count of entries per page
+        position (int): Position shift of the first page
+        prefetch (bool): Request page N+1 in a background thread while page N is being consumed
+        loads (Callable): Decodes the JSON of a page, defaults to httpx's json()
+        model (type): Model class to yield lazily decoded rows of instead of dicts
+    """
+
+    if not prefetch:
+        while True:
+            records = page_records(fetch_page(position, size), loads, model)
+            position += size
+            yield from records
+            if len(records) < size:
+                return
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch_page, position, size)
+        while True:
+            records = page_records(future.result(), loads, model)
+            position += size
+            if len(records) >= size:
+                future = executor.submit(fetch_page, position, size)
+            yield from records
+            if len(records) < size:
+                return
+
+
+async def aiter_records(fetch_page, size: int = 100, position: int = 0, prefetch: bool = False, loads=None,
+                        model=None):
+    """ Async twin of iter_records. fetch_page returns an awaitable, with prefetch page N+1 is requested as a task
+        while page N is being consumed.
+    """
+
+    if not prefetch:
+        while True:
+            records = page_records(await fetch_page(position, size), loads, model)
+            position += size
+            for record in records:
+                yield record
+            if len(records) < size:
+                return
+
+    task = asyncio.ensure_future(fetch_page(position, size))
+    try:
+        while True:
+            records = page_records(await task, loads, model)
+            position += size
+            if len(records) >= size:
+                task = asyncio.ensure_future(fetch_page(position, size))
+            for record in records:
+                yield record
+            if len(records) < size:
+                return
+    finally:
+        task.cancel()
+
+
+def fetch_all_records(fetch_page, size: int = 500, concurrency: int = 8, loads=None, model=None) -> list:
+    """ Fetch every page of a list endpoint with up to `concurrency` requests in flight and merge the records in
+        order. The size of the listing is taken from the X-Total-Count header if the server sends one, otherwise
+        pages are requested in rounds of `concurrency` until a short page is returned.
+
+    Args:
+        fetch_page (Callable[[int, int], httpx.Response]): Requests the page at the given position and size
+        size (int): Count of entries per page
+        concurrency (int): Count of pages fetched in parallel. Keep it below the max_connections of the client.
+        loads (Callable): Decodes the JSON of a page, defaults to httpx's json()
+        model (type): Model class to return lazily decoded rows of instead of dicts
+    """
+
+    first = fetch_page(0, size)
+    records = page_records(first, loads, model)
+    total = total_count(first)
+    if _complete(records, records, size, total):
+        return records
+
+    position = size
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            window = _window(total, records, size, concurrency)
+            positions = range(position, position + window * size, size)
+            for page in executor.map(lambda pos: page_records(fetch_page(pos, size), loads, model), positions):
+                records.extend(page)
+                if _complete(page, records, size, total):
+                    return records
+            position += window * size
+
+
+async def afetch_all_records(fetch_page, size: int = 500, concurrency: int = 8, loads=None, model=None) -> list:
+    """ Async twin of fetch_all_records. fetch_page returns an awaitable. """
+
+    first = await fetch_page(0, size)
+    records = page_records(first, loads, model)
+    total = total_count(first)
+    if _complete(records, records, size, total):
+        return records
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(pos: int) -> list:
+        async with semaphore:
+            return page_records(await fetch_page(pos, size), loads, model)
+
+    position = size
+    while True:
+        window = _window(total, records, size, concurrency)
+        pages = await asyncio.gather(*(fetch(pos) for pos in range(position, position + window * size, size)))
+        for page in pages:
+            records.extend(page)
+            if _complete(page, records, size, total):
+                return records
+        position += window * size
+
+
+def fetch_all(client, fetch_page, size: int = 500, concurrency: int = 8, model=None):
+    """ fetch_all_records for GEANTTCSClient, afetch_all_records (awaitable) for AsyncGEANTTCSClient. """
+
+    loads = client.serializer.loads
+    if client.is_async:
+        return afetch_all_records(fetch_page, size, concurrency, loads, model)
+    return fetch_all_records(fetch_page, size, concurrency, loads, model)
+
+
+def paginate(client, fetch_page, size: int = 100, position: int = 0, prefetch: bool = False, model=None):
+    """ Record iterator over a list endpoint: a generator for GEANTTCSClient and an async generator for
+        AsyncGEANTTCSClient.
+    """
+
+    loads = client.serializer.loads
+    if client.is_async:
+        return aiter_records(fetch_page, size, position, prefetch, loads, model)
+    return iter_records(fetch_page, size, position, prefetch, loads, model)
@@ -1,15 +1,12 @@
 
 import urllib.parse
 
+from models import Person
+from pagination import fetch_all, paginate, query
+from resource import Resource
 
-class PersonResource:
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.login = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
+class PersonResource(Resource):
 
     def find_person_id_by_email(self, email: str):
         """ Find person ID by email
@@ -31,9 +28,7 @@ class PersonResource:
         email = email.replace("-", "%2D").replace(".", "%2E").replace("_", "%5F").replace("~", "%7E")
 
         url = f"/person/{self.version}/id/byEmail/{email}"
-        headers = {"Accept": "application/json", "login": self.username, "customerUri": self.custom_uri,
-                   "password": self.password}
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def find_person_id(self, person_id: int):
@@ -61,9 +56,7 @@ class PersonResource:
         """
 
         url = f"/person/{self.version}/{person_id}"
-        headers = {"Accept": "application/json;charset=UTF-8", "customerUri": self.custom_uri, "login": self.username,
-                   "password": self.password}
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def create_new_person(self, first_name: str, middle_name: str, last_name: str, email: str, validation_type: str,
@@ -91,9 +84,7 @@ class PersonResource:
                 "secondaryEmails": secondary_emails, "commonName": common_name}
 
         url = f"/person/{self.version}"
-        headers = {"login": self.username, "customerUri": self.custom_uri,
-                   "Content-Type": "application/json;charset=UTF-8", "password": self.password}
-        response = self.client.post(url, data=data, headers=headers)
+        response = self.client.post(url, json=data, headers=self.json_headers)
         return response
 
     def update_person(self, person_id: int, first_name: str, middle_name: str, last_name: str, email: str,
@@ -123,10 +114,8 @@ class PersonResource:
         data = {"firstName": first_name, "middleName": middle_name, "lastName": last_name, "email": email,
                 "organizationId": organization_id, "validationType": validation_type, "phone": phone,
                 "secondaryEmails": secondary_emails, "commonName": common_name}
-        headers = {"login": self.username, "customerUri": self.custom_uri,
-                   "Content-Type": "application/json;charset=UTF-8", "password": self.password}
 
-        response = self.client.put(url, data=data, headers=headers)
+        response = self.client.put(url, json=data, headers=self.json_headers)
         return response
 
     def delete_person(self, person_id):
@@ -138,9 +127,8 @@ class PersonResource:
         """
 
         url = f"/person/{self.version}/{person_id}"
-        headers = {"login": self.username, "customerUri": self.custom_uri, "password": self.password}
 
-        response = self.client.delete(url, headers=headers)
+        response = self.client.delete(url, headers=self.headers)
         return response
 
     def list_persons(self, **parameter):
@@ -176,17 +164,44 @@ class PersonResource:
         """
 
         url = f"/person/{self.version}/"
-        if parameter:
-            key, value = parameter.popitem()
-            url = f"{url}?{key}={value}"
-            for para in parameter:
-                url = f"{url}&{para}={parameter[para]}"
 
-        headers = {"customerUri": self.custom_uri, "login": self.username, "password": self.password}
-
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.headers, params=query(**parameter))
         return response
 
+    def iter_persons(self, size: int = 200, prefetch: bool = False, typed: bool = False, **filters):
+        """ Iterate over all persons matching the filters, fetching the pages lazily.
+
+        Args:
+            size (int): Count of entries per page
+            prefetch (bool): Request the next page while the current one is being consumed
+            typed (bool): Yield lazily decoded Person models instead of dicts
+            **filters: Filters of list_persons, e.g. organization_id=10406
+
+        Returns:
+            Iterator of person records (async iterator with AsyncGEANTTCSClient)
+        """
+
+        return paginate(self.client, lambda position, page_size: self.list_persons(
+            position=position, size=page_size, **filters), size, prefetch=prefetch,
+            model=Person if typed else None)
+
+    def fetch_all_persons(self, size: int = 500, concurrency: int = 8, typed: bool = False, **filters):
+        """ Fetch all persons matching the filters with `concurrency` pages requested in parallel.
+
+        Args:
+            size (int): Count of entries per page
+            concurrency (int): Count of pages fetched in parallel, bounded by the connection pool of the client
+            typed (bool): Return lazily decoded Person models instead of dicts
+            **filters: Filters of list_persons
+
+        Returns:
+            List of person records in listing order (awaitable with AsyncGEANTTCSClient)
+        """
+
+        return fetch_all(self.client, lambda position, page_size: self.list_persons(
+            position=position, size=page_size, **filters), size, concurrency,
+            model=Person if typed else None)
+
     def import_client_certificate_with_private_key(self, person_id: int, p12: str, password: str, custom_fields: [str]):
         """ Import client certificate with private key for person
 
@@ -205,8 +220,6 @@ class PersonResource:
 
         url = f"/person/{self.version}/{person_id}/import-key "
         data = {"p12": p12, "password": password, "customFields": custom_fields}
-        headers = {"customerUri": self.custom_uri, "Content-Type": "application/json;charset=UTF-8",
-                   "login": self.username, "password": self.password}
 
-        response = self.client.post(url, data=data, headers=headers)
+        response = self.client.post(url, json=data, headers=self.json_headers)
         return response
@@ -0,0 +1,154 @@
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import NamedTuple
+
+import httpx
+
+from retry import retry_after
+
+# HTTP status codes meaning "ask again later". Server errors are not among them: the client's RetryPolicy already
+# retried those, one that still gets through fails the order instead of being polled until the timeout.
+PENDING_STATUS_CODES = (202, 204, 429)
+# Seconds after which an order is given up by default
+DEFAULT_TIMEOUT = 24 * 3600.0
+# Error code of the collect endpoints while the CA has not issued the certificate yet
+NOT_ISSUED_CODE = -1400
+
+
+class CollectResult(NamedTuple):
+    """ Outcome of polling one certificate: the collect response once it is ready, otherwise the error. """
+
+    order_id: object
+    response: httpx.Response = None
+    error: Exception = None
+
+
+def is_pending(response: httpx.Response) -> bool:
+    """ True if the collect response means the certificate has not been issued yet. """
+
+    if response.status_code in PENDING_STATUS_CODES:
+        return True
+    if response.status_code == 400:
+        try:
+            return response.json().get("code") == NOT_ISSUED_CODE
+        except (ValueError, AttributeError):
+            return False
+    return False
+
+
+class CollectPoller:
+    """ Polls the collect endpoint for many pending certificates and hands each one over as soon as it is issued.
+        All outstanding orders share a single timer heap; every order backs off exponentially with jitter and a
+        Retry-After sent by the server takes precedence.
+
+    Args:
+        collect (Callable): Called with an order ID, returns the collect response (an awaitable for apoll)
+        initial_delay (float): Seconds before the first poll of an order and base of its backoff
+        max_delay (float): Upper bound of the delay between two polls of an order
+        factor (float): Growth of the delay with each poll that finds the certificate pending
+        jitter (float): Relative random spread of every delay, so orders enrolled together don't poll together
+        timeout (float): Seconds after which an order is given up with a TimeoutError, None to poll forever
+        pending (Callable): Tells whether a collect response means "not issued yet", defaults to is_pending
+
+    Example:
+        poller = CollectPoller(lambda ssl_id: ssl_certs.collect_ssl_certificate(ssl_id, "x509"), timeout=3600)
+        for result in poller.poll(ssl_ids):
+            print(result.order_id, result.response.text if result.error is None else result.error)
+    """
+
+    def __init__(self, collect, initial_delay: float = 10.0, max_delay: float = 600.0, factor: float = 2.0,
+                 jitter: float = 0.2, timeout: float = DEFAULT_TIMEOUT, pending=is_pending):
+        self.collect = collect
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.timeout = timeout
+        self.pending = pending
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def _delay(self, attempt: int, response=None) -> float:
+        server_delay = retry_after(response)
+        if server_delay is not None:
+            return server_delay
+        delay = min(self.initial_delay * self.factor ** attempt, self.max_delay)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _schedule(self, order_id, attempt: int, started: float, response=None):
+        due = time.monotonic() + self._delay(attempt, response)
+        heapq.heappush(self._heap, (due, next(self._sequence), order_id, attempt, started))
+
+    def add(self, order_id, delay: float = None):
+        """ Start tracking an order. The first poll happens after `delay` seconds, default initial_delay. """
+
+        due = time.monotonic() + (self.initial_delay if delay is None else delay)
+        heapq.heappush(self._heap, (due, next(self._sequence), order_id, 0, time.monotonic()))
+
+    def _handle(self, order_id, attempt: int, started: float, response, error):
+        """ CollectResult for a finished order, None if it was put back on the heap. """
+
+        if error is None and not self.pending(response):
+            if response.is_error:
+                return CollectResult(order_id, response, httpx.HTTPStatusError(
+                    f"Collecting {order_id} failed with status {response.status_code}", request=response.request,
+                    response=response))
+            return CollectResult(order_id, response)
+        if error is not None and not isinstance(error, httpx.TransportError):
+            return CollectResult(order_id, error=error)
+        if self.timeout is not None and time.monotonic() - started > self.timeout:
+            return CollectResult(order_id, response, TimeoutError(f"{order_id} not collectable after "
+                                                                  f"{self.timeout} seconds"))
+        self._schedule(order_id, attempt + 1, started, response)
+        return None
+
+    def poll(self, order_ids=()):
+        """ Poll until every tracked order is collected, failed or timed out and yield a CollectResult for each as
+            soon as it is done. Polls run one after another in the calling thread.
+        """
+
+        for order_id in order_ids:
+            self.add(order_id)
+        while self._heap:
+            due, _, order_id, attempt, started = heapq.heappop(self._heap)
+            time.sleep(max(due - time.monotonic(), 0.0))
+            response, error = None, None
+            try:
+                response = self.collect(order_id)
+            except Exception as exception:
+                error = exception
+            result = self._handle(order_id, attempt, started, response, error)
+            if result is not None:
+                yield result
+
+    async def apoll(self, order_ids=(), concurrency: int = 20):
+        """ Async twin of poll. Due orders are polled concurrently, at most `concurrency` at a time. """
+
+        for order_id in order_ids:
+            self.add(order_id)
+        running = {}
+        try:
+            while self._heap or running:
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now and len(running) < concurrency:
+                    _, _, order_id, attempt, started = heapq.heappop(self._heap)
+                    running[asyncio.ensure_future(self.collect(order_id))] = (order_id, attempt, started)
+
+                wake_up = self._heap[0][0] - now if self._heap and len(running) < concurrency else None
+                if not running:
+                    await asyncio.sleep(max(wake_up, 0.0))
+                    continue
+                done, _ = await asyncio.wait(running, timeout=wake_up, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    order_id, attempt, started = running.pop(task)
+                    error = task.exception()
+                    result = self._handle(order_id, attempt, started, None if error else task.result(), error)
+                    if result is not None:
+                        yield result
+        finally:
+            for task in running:
+                task.cancel()
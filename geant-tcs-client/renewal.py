@@ -0,0 +1,304 @@
+
+import asyncio
+import datetime
+import functools
+import heapq
+import itertools
+import json
+import os
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, NamedTuple
+
+import httpx
+
+from concurrency import map_unordered
+
+DAY = 86400.0
+
+# States recorded in the checkpoint file
+STARTED = "started"
+RENEWED = "renewed"
+FAILED = "failed"
+
+
+class RenewalCandidate(NamedTuple):
+    """ A certificate the scheduler may renew.
+
+        `key` identifies the certificate in the checkpoint, e.g. 'ssl:2417' or 'smime:16190'. `renew` is called
+        without arguments and returns the renew response (an awaitable for arun), e.g.
+        functools.partial(client_certs.renew_client_certificate_by_order_number, 16190). A candidate whose lookup
+        failed carries the `error` instead and is reported as failed without being scheduled.
+    """
+
+    key: str
+    expires: float = None
+    renew: Callable = None
+    error: Exception = None
+
+
+class RenewalResult(NamedTuple):
+    """ Outcome of one renewal: the renew response on success, otherwise the error. """
+
+    key: str
+    response: httpx.Response = None
+    error: Exception = None
+
+
+def expiry_timestamp(value: str) -> float:
+    """ POSIX timestamp of an expiry date of the API ('YYYY-MM-DD', optionally followed by a time). """
+
+    date = datetime.date.fromisoformat(value[:10])
+    return datetime.datetime(date.year, date.month, date.day, tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _expiry(value) -> float:
+    return expiry_timestamp(value) if isinstance(value, str) else float(value)
+
+
+def ssl_candidates(ssl_certs, inventory=None, horizon: float = 60 * DAY, reason: str = "Renewal before expiry",
+                   concurrency: int = 10, **filters):
+    """ Yield a RenewalCandidate for the issued SSL certificates.
+
+        The listing doesn't carry expiry and renew ID, so the details of the certificates are fetched with up to
+        `concurrency` requests in parallel. With an inventory whose expiries are synced (see
+        Inventory.sync_ssl_expiry) only the certificates expiring within `horizon` seconds are looked up; without
+        one every listed certificate is, one request per certificate. Certificates without an expiry or renew ID are
+        skipped, those whose details could not be fetched are yielded with the error.
+
+    Args:
+        ssl_certs (SSLCertificates): Resource on a GEANTTCSClient
+        inventory (Inventory): Index to take the certificates expiring soon from instead of listing all
+        horizon (float): Seconds ahead the inventory is searched, at least the lead time plus the window of the
+                         scheduler
+        reason (str): Reason sent with the renew requests
+        concurrency (int): Count of detail requests in flight
+        **filters: Additional filters of listing_ssl_certificates, only the status applies with an inventory
+    """
+
+    filters.setdefault("status", "Issued")
+    if inventory is not None:
+        before = datetime.datetime.fromtimestamp(time.time() + horizon, datetime.timezone.utc).date().isoformat()
+        ssl_ids = [record["sslId"] for record in inventory.ssl_expiring(before, filters["status"])]
+    else:
+        ssl_ids = (record["sslId"] for record in ssl_certs.iter_ssl_certificates(size=500, prefetch=True, **filters))
+    for ssl_id, response, error in map_unordered(ssl_certs.ssl_certificate_details, ssl_ids, concurrency):
+        if error is None and response.is_error:
+            error = httpx.HTTPStatusError(f"Fetching the details of SSL {ssl_id} failed with status "
+                                          f"{response.status_code}", request=response.request, response=response)
+        if error is not None:
+            yield RenewalCandidate(f"ssl:{ssl_id}", error=error)
+            continue
+        details = ssl_certs.client.json(response)
+        if details.get("expires") and details.get("renewId"):
+            yield RenewalCandidate(f"ssl:{ssl_id}", expiry_timestamp(details["expires"]),
+                                   functools.partial(ssl_certs.renew_ssl_certificate_by_renew_id,
+                                                     details["renewId"], reason))
+
+
+def client_candidates(client_certs, orders):
+    """ Yield a RenewalCandidate for every Client certificate, renewed with renew_client_certificate_by_order_number.
+        The API lists no expiry of Client certificates, so it comes with the order numbers, e.g. from the collected
+        certificates.
+
+    Args:
+        client_certs (ClientCertificates): Resource of the renew requests
+        orders (Iterable): (order number, expiry) pairs, the expiry as 'YYYY-MM-DD' or POSIX timestamp
+    """
+
+    for order_number, expires in orders:
+        yield RenewalCandidate(f"smime:{order_number}", _expiry(expires),
+                               functools.partial(client_certs.renew_client_certificate_by_order_number, order_number))
+
+
+def device_candidates(device_certs, orders):
+    """ Yield a RenewalCandidate for every Device certificate, renewed with renew_device_certificate_by_order_number.
+        As for client_candidates, the expiry comes with the order numbers.
+
+    Args:
+        device_certs (DeviceCertificates): Resource of the renew requests
+        orders (Iterable): (order number, expiry) pairs, the expiry as 'YYYY-MM-DD' or POSIX timestamp
+    """
+
+    for order_number, expires in orders:
+        yield RenewalCandidate(f"device:{order_number}", _expiry(expires),
+                               functools.partial(device_certs.renew_device_certificate_by_order_number, order_number))
+
+
+class _Checkpoint:
+    """ Append-only JSON lines file of renewal states, the last line of a key wins. Every state is recorded with the
+        expiry of the certificate it applies to, so it no longer applies once the certificate got a new expiry.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.states = {}
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.states[entry["key"]] = (entry["state"], entry.get("expires"))
+
+    def state(self, candidate: RenewalCandidate):
+        """ Recorded state of the candidate with its current expiry, None if there is none. """
+
+        state, expires = self.states.get(candidate.key, (None, None))
+        return state if expires == candidate.expires else None
+
+    def record(self, candidate: RenewalCandidate, state: str, error: Exception = None):
+        self.states[candidate.key] = (state, candidate.expires)
+        if self.path is None:
+            return
+        entry = {"key": candidate.key, "state": state, "expires": candidate.expires, "at": time.time()}
+        if error is not None:
+            entry["error"] = repr(error)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class RenewalScheduler:
+    """ Renews certificates ahead of their expiry.
+
+        The candidates are kept in a min-heap ordered by renewal time. A certificate is due `lead_time` seconds
+        before it expires, shifted by a stable per-certificate offset of up to `window` seconds, so certificates
+        expiring on the same day are renewed spread over the window instead of all at once. Due renewals run on a
+        worker pool of `concurrency` workers.
+
+        With a checkpoint file every renewal is recorded before and after its request, together with the expiry of
+        the certificate. A run started again with the same file skips certificates renewed for that expiry and
+        retries failed ones; a later cycle renews them again once their expiry changed. A renewal that was started
+        but never finished (the process died during the request) is not repeated, since it may have gone through;
+        it is reported with an error until it is removed from the file.
+
+    Args:
+        lead_time (float): Seconds before the expiry a certificate is renewed at the latest
+        window (float): Seconds over which the renewals are spread
+        concurrency (int): Count of renew requests in flight
+        checkpoint (str): Path of the checkpoint file, None to keep no checkpoint
+
+    Example:
+        scheduler = RenewalScheduler(lead_time=30 * DAY, window=7 * DAY, checkpoint="renewals.jsonl")
+        for result in scheduler.run(ssl_candidates(ssl_certs, inventory)):
+            print(result.key, result.error or result.response.json())
+    """
+
+    def __init__(self, lead_time: float = 30 * DAY, window: float = 7 * DAY, concurrency: int = 10,
+                 checkpoint: str = None):
+        self.lead_time = lead_time
+        self.window = window
+        self.concurrency = concurrency
+        self.checkpoint = _Checkpoint(checkpoint)
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def renew_at(self, candidate: RenewalCandidate) -> float:
+        """ POSIX time at which the candidate is due. """
+
+        spread = zlib.crc32(candidate.key.encode("utf-8")) / 2 ** 32
+        return candidate.expires - self.lead_time - self.window * spread
+
+    def add(self, candidate: RenewalCandidate):
+        heapq.heappush(self._heap, (self.renew_at(candidate), next(self._sequence), candidate))
+
+    def schedule(self) -> list:
+        """ (renewal time, key) of the waiting candidates, soonest first. """
+
+        return [(renew_at, candidate.key) for renew_at, _, candidate in sorted(self._heap)]
+
+    def _prepare(self, candidates):
+        """ Push the candidates which still need a renewal and yield results for failed lookups and interrupted
+            renewals.
+        """
+
+        for candidate in candidates:
+            if candidate.error is not None:
+                yield RenewalResult(candidate.key, error=candidate.error)
+                continue
+            state = self.checkpoint.state(candidate)
+            if state == STARTED:
+                yield RenewalResult(candidate.key, error=RuntimeError(
+                    f"Renewal of {candidate.key} was interrupted, check it and remove it from the checkpoint"))
+            elif state != RENEWED:
+                self.add(candidate)
+
+    def _pop_due(self) -> RenewalCandidate:
+        _, _, candidate = heapq.heappop(self._heap)
+        self.checkpoint.record(candidate, STARTED)
+        return candidate
+
+    def _wake_up(self, until: float, running: int):
+        """ Seconds until the next candidate is due, None if none is due before `until` or all workers are busy. """
+
+        if not self._heap or self._heap[0][0] > until or running >= self.concurrency:
+            return None
+        return max(self._heap[0][0] - time.time(), 0.0)
+
+    def _finish(self, candidate: RenewalCandidate, response, error) -> RenewalResult:
+        if error is None and response.is_error:
+            error = httpx.HTTPStatusError(f"Renewing {candidate.key} failed with status {response.status_code}",
+                                          request=response.request, response=response)
+        self.checkpoint.record(candidate, FAILED if error else RENEWED, error)
+        return RenewalResult(candidate.key, response, error)
+
+    def run(self, candidates=(), until: float = None):
+        """ Renew the candidates due before `until` and yield a RenewalResult for each as it finishes.
+
+        Args:
+            candidates (Iterable[RenewalCandidate]): Certificates to schedule in addition to those added before
+            until (float): POSIX time up to which due renewals are run, waiting for them if needed. The default
+                           (now) only runs what is due already, which suits a periodic job; float('inf') keeps
+                           running until every candidate is renewed.
+        """
+
+        until = time.time() if until is None else until
+        yield from self._prepare(candidates)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                while self._heap and self._heap[0][0] <= min(time.time(), until) and len(running) < self.concurrency:
+                    candidate = self._pop_due()
+                    running[executor.submit(candidate.renew)] = candidate
+
+                wake_up = self._wake_up(until, len(running))
+                if not running:
+                    if wake_up is None:
+                        return
+                    time.sleep(wake_up)
+                    continue
+                done, _ = wait(running, timeout=wake_up, return_when=FIRST_COMPLETED)
+                for future in done:
+                    candidate = running.pop(future)
+                    error = future.exception()
+                    yield self._finish(candidate, None if error else future.result(), error)
+
+    async def arun(self, candidates=(), until: float = None):
+        """ Async twin of run for candidates whose renew returns an awaitable. """
+
+        until = time.time() if until is None else until
+        for result in self._prepare(candidates):
+            yield result
+        running = {}
+        try:
+            while True:
+                while self._heap and self._heap[0][0] <= min(time.time(), until) and len(running) < self.concurrency:
+                    candidate = self._pop_due()
+                    running[asyncio.ensure_future(candidate.renew())] = candidate
+
+                wake_up = self._wake_up(until, len(running))
+                if not running:
+                    if wake_up is None:
+                        return
+                    await asyncio.sleep(wake_up)
+                    continue
+                done, _ = await asyncio.wait(running, timeout=wake_up, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    candidate = running.pop(task)
+                    error = task.exception()
+                    yield self._finish(candidate, None if error else task.result(), error)
+        finally:
+            for task in running:
+                task.cancel()
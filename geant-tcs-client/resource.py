@@ -0,0 +1,32 @@
+
+from credentials import Credentials
+
+
+class Resource:
+    """ Base class of the API resources.
+
+        The authentication headers are normally default headers of the shared client. A resource only sends its own
+        when it was given credentials different from the client's. The header sets are built once here instead of on
+        every call.
+
+    Args:
+        client (GEANTTCSClient): Shared client, also accepts an AsyncGEANTTCSClient
+        credentials (Credentials): Credentials for this resource if they differ from the client's. A config dict with
+                                   the keys 'username', 'password' and 'custom_uri' is accepted as well.
+        version (str): API version
+    """
+
+    def __init__(self, client, credentials=None, version: str = "v1"):
+        if isinstance(credentials, dict):
+            credentials = Credentials.from_config(credentials)
+
+        self.client = client
+        self.version = version
+        self.credentials = credentials
+
+        if credentials is None or credentials == getattr(client, "credentials", None):
+            self.headers = {}
+        else:
+            self.headers = credentials.headers()
+        self.json_headers = {**self.headers, "Accept": "application/json",
+                             "Content-Type": "application/json;charset=utf-8"}
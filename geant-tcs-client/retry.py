@@ -0,0 +1,118 @@
+
+import asyncio
+import fnmatch
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# POST endpoints which only read data and are therefore safe to repeat
+IDEMPOTENT_POST_URLS = ("/dcv/*/validation/status", "/device/*/collect/*/*")
+
+
+def retry_after(response):
+    """ Seconds to wait according to the Retry-After header of the response, None if there is none. """
+
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """ Decides whether a failed request is repeated and how long to wait before.
+
+        Idempotent requests are retried on transient connection errors and on the status codes in `status_codes`.
+        A POST like enroll or revoke is only repeated when it cannot have reached the server: the connection could
+        not be established or the server rejected it with 429. Read-only POST endpoints can be declared in
+        `idempotent_urls`.
+
+    Args:
+        max_retries (int): Retries after the first attempt, 0 disables retrying
+        backoff (float): Delay in seconds before the first retry, doubled for every further one
+        max_backoff (float): Upper bound of the delay
+        jitter (float): Relative random spread of the delay
+        status_codes (tuple): Response status codes worth a retry
+        idempotent_urls (tuple): Globs of POST resource URLs which are safe to repeat
+    """
+
+    def __init__(self, max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 30.0, jitter: float = 0.5,
+                 status_codes: tuple = RETRY_STATUS_CODES, idempotent_urls: tuple = IDEMPOTENT_POST_URLS):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = status_codes
+        self.idempotent_urls = idempotent_urls
+
+    def idempotent(self, method: str, url: str) -> bool:
+        path = url.split("?", 1)[0]
+        return method in IDEMPOTENT_METHODS or any(fnmatch.fnmatchcase(path, glob) for glob in self.idempotent_urls)
+
+    def should_retry(self, method: str, url: str, attempt: int, response=None, error: Exception = None) -> bool:
+        """ True if the request which ended with the response or the error is worth another attempt. """
+
+        if attempt >= self.max_retries:
+            return False
+        if error is not None:
+            if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+                return True
+            return isinstance(error, httpx.TransportError) and self.idempotent(method, url)
+        if response.status_code == 429:
+            return True
+        return response.status_code in self.status_codes and self.idempotent(method, url)
+
+    def delay(self, attempt: int, response=None) -> float:
+        """ Seconds to wait before retry number attempt + 1. A Retry-After of the server takes precedence. """
+
+        server_delay = retry_after(response)
+        if server_delay is not None:
+            return server_delay
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class TokenBucket:
+    """ Client side rate limiter. Requests take one token each; tokens refill at `rate` per second up to `burst`.
+        Pass one instance to a client (or several clients) to keep all resources sharing it below the API quota.
+
+    Args:
+        rate (float): Sustained requests per second
+        burst (int): Requests which may be sent at once after an idle period
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """ Take a token and return the seconds to wait until it is actually available. """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
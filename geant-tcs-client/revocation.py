@@ -0,0 +1,163 @@
+
+import json
+import os
+import time
+from typing import NamedTuple
+
+import httpx
+
+from client_certificates import ClientCertificates
+from concurrency import run_unordered
+from device_certificates import DeviceCertificates
+from retry import TokenBucket
+from ssl_certificates import SSLCertificates
+
+# Kind of target -> (resource, revoke method taking the target ID and the reason)
+KINDS = {
+    "ssl": ("ssl", "revoke_ssl_certificate_by_id"),
+    "ssl-serial": ("ssl", "revoke_ssl_certificate_by_serial_number"),
+    "smime-order": ("smime", "revoke_client_certificate_by_order_number"),
+    "smime-serial": ("smime", "revoke_client_certificate_by_serial_number"),
+    "smime-email": ("smime", None),
+    "device-order": ("device", "revoke_device_certificate_by_order_number"),
+    "device-serial": ("device", "revoke_device_certificate_by_serial_number"),
+}
+
+# Outcomes written to the audit log
+REVOKED = "revoked"
+FAILED = "failed"
+DRY_RUN = "dry-run"
+
+
+class RevocationTarget(NamedTuple):
+    """ Certificate(s) to revoke: `kind` is one of KINDS, `id` the SSL ID, order number, serial number or e-mail. """
+
+    kind: str
+    id: object
+
+
+class RevocationResult(NamedTuple):
+    """ Outcome of one revocation: the response on success, otherwise the error. Both are None in a dry run. """
+
+    target: RevocationTarget
+    response: httpx.Response = None
+    error: Exception = None
+
+
+class BulkRevocation:
+    """ Revokes many certificates across the SSL, Client (S/MIME) and Device families, e.g. after a key compromise.
+
+        All targets are checked before the first request is sent, so a bad one fails the whole call instead of
+        stopping it halfway. Revocations run concurrently, at most `concurrency` in flight and optionally at most
+        `rate` per second. Every outcome is appended to a JSON lines audit log as soon as it is known, one line per
+        target with time, kind, ID, reason and result. A dry run checks the targets and writes the audit log without
+        sending any request.
+
+    Args:
+        client (GEANTTCSClient): Shared client, also accepts an AsyncGEANTTCSClient
+        reason (str): Reason sent with every revocation
+        audit (str): Path of the audit log, appended to; None to keep no log
+        concurrency (int): Maximum count of revocations in flight
+        rate (float): Maximum revocations per second, None for no cap besides the client's rate limit
+        dry_run (bool): Only validate and log the targets
+
+    Example:
+        revocation = BulkRevocation(client, "Key compromise", audit="revocations.jsonl", rate=20)
+        for result in revocation.revoke(("ssl-serial", serial) for serial in serials):
+            print(result.target.id, result.error or "revoked")
+    """
+
+    def __init__(self, client, reason: str, audit: str = "revocations.jsonl", concurrency: int = 20,
+                 rate: float = None, dry_run: bool = False):
+        self.client = client
+        self.reason = reason
+        self.audit = audit
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate) if rate else None
+        self.dry_run = dry_run
+        self.resources = {"ssl": SSLCertificates(client), "smime": ClientCertificates(client),
+                          "device": DeviceCertificates(client)}
+
+    @staticmethod
+    def target(target) -> RevocationTarget:
+        """ RevocationTarget of a (kind, id) pair, checking the kind. """
+
+        target = RevocationTarget(*target)
+        if target.kind not in KINDS:
+            raise ValueError(f"Unknown revocation kind {target.kind!r}, expected one of {tuple(KINDS)}")
+        return target
+
+    def _call(self, target: RevocationTarget):
+        resource, method = KINDS[target.kind]
+        resource = self.resources[resource]
+        if method is None:
+            return resource.revoke_all_client_certificate_related_to_email(self.reason, target.id)
+        return getattr(resource, method)(target.id, self.reason)
+
+    def _revoke(self, target: RevocationTarget):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        return self._call(target)
+
+    async def _arevoke(self, target: RevocationTarget):
+        if self.bucket is not None:
+            await self.bucket.aacquire()
+        return await self._call(target)
+
+    def _log(self, result: RevocationResult, outcome: str):
+        if self.audit is None:
+            return
+        entry = {"at": time.time(), "kind": result.target.kind, "id": result.target.id, "reason": self.reason,
+                 "outcome": outcome}
+        if result.response is not None:
+            entry["status_code"] = result.response.status_code
+        if result.error is not None:
+            entry["error"] = repr(result.error)
+        with open(self.audit, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _result(self, target: RevocationTarget, response, error: Exception) -> RevocationResult:
+        if error is None and response.is_error:
+            error = httpx.HTTPStatusError(f"Revoking {target.kind} {target.id} failed with status "
+                                          f"{response.status_code}", request=response.request, response=response)
+        result = RevocationResult(target, response, error)
+        self._log(result, FAILED if error else REVOKED)
+        return result
+
+    def _dry_run(self, targets):
+        for target in targets:
+            result = RevocationResult(target)
+            self._log(result, DRY_RUN)
+            yield result
+
+    async def _adry_run(self, targets):
+        for result in self._dry_run(targets):
+            yield result
+
+    async def _aresults(self, results):
+        async for target, response, error in results:
+            yield self._result(target, response, error)
+
+    def revoke(self, targets):
+        """ Revoke the targets.
+
+        Args:
+            targets (Iterable): RevocationTarget or (kind, id) pairs, all read and checked before the first request
+
+        Returns:
+            Iterator of RevocationResult in order of completion (async iterator with AsyncGEANTTCSClient). A failed
+            revocation is reported with its error and does not stop the others.
+
+        Raises:
+            ValueError: A target has an unknown kind, nothing was revoked or logged
+        """
+
+        targets = [self.target(target) for target in targets]
+        if self.dry_run:
+            return self._adry_run(targets) if self.client.is_async else self._dry_run(targets)
+        if self.client.is_async:
+            return self._aresults(run_unordered(self.client, self._arevoke, targets, self.concurrency))
+        return (self._result(target, response, error)
+                for target, response, error in run_unordered(self.client, self._revoke, targets, self.concurrency))
@@ -0,0 +1,92 @@
+
+import re
+
+# (method, URL template) of the API endpoints used by the resources. Literal segments come before placeholders of
+# the same position, the first matching template wins.
+ROUTES = (
+    ("GET", "/ssl/{version}/"),
+    ("GET", "/ssl/{version}/types"),
+    ("GET", "/ssl/{version}/customFields"),
+    ("POST", "/ssl/{version}/enroll"),
+    ("POST", "/ssl/{version}/enroll-keygen"),
+    ("GET", "/ssl/{version}/keystore/{ssl_id}/{format_type}"),
+    ("GET", "/ssl/{version}/collect/{ssl_id}/{format_type}"),
+    ("POST", "/ssl/{version}/revoke/serial/{serial_number}"),
+    ("POST", "/ssl/{version}/revoke/{ssl_id}"),
+    ("POST", "/ssl/{version}/renew/{renew_id}"),
+    ("POST", "/ssl/{version}/replace/{ssl_id}"),
+    ("GET", "/ssl/{version}/{ssl_id}"),
+    ("GET", "/smime/{version}/types"),
+    ("GET", "/smime/{version}/customFields"),
+    ("POST", "/smime/{version}/enroll"),
+    ("GET", "/smime/{version}/collect/{order_number}"),
+    ("POST", "/smime/{version}/renew/order/{order_number}"),
+    ("POST", "/smime/{version}/renew/serial/{serial_number}"),
+    ("POST", "/smime/{version}/replace/order/{order_number}"),
+    ("POST", "/smime/{version}/revoke/order/{order_number}"),
+    ("POST", "/smime/{version}/revoke/serial/{serial_number}"),
+    ("POST", "/smime/{version}/revoke"),
+    ("GET", "/smime/{version}/byPersonId/{person_id}"),
+    ("GET", "/smime/{version}/byPersonEmail/{email}"),
+    ("GET", "/device/{version}/types"),
+    ("GET", "/device/{version}/customFields"),
+    ("POST", "/device/{version}/enroll"),
+    ("POST", "/device/{version}/collect/{order_number}/{format_type}"),
+    ("POST", "/device/{version}/renew/order/{order_number}"),
+    ("POST", "/device/{version}/renew/serial/{serial_number}"),
+    ("POST", "/device/{version}/replace/order/{order_number}"),
+    ("POST", "/device/{version}/revoke/order/{order_number}"),
+    ("POST", "/device/{version}/revoke/serial/{serial_number}"),
+    ("GET", "/dcv/{version}/validation"),
+    ("POST", "/dcv/{version}/validation/start/domain/{method}"),
+    ("POST", "/dcv/{version}/validation/submit/domain/{method}"),
+    ("POST", "/dcv/{version}/validation/status"),
+    ("GET", "/person/{version}/"),
+    ("POST", "/person/{version}"),
+    ("GET", "/person/{version}/id/byEmail/{email}"),
+    ("POST", "/person/{version}/{person_id}/import-key"),
+    ("GET", "/person/{version}/{person_id}"),
+    ("PUT", "/person/{version}/{person_id}"),
+    ("DELETE", "/person/{version}/{person_id}"),
+    ("GET", "/acme/{version}/account"),
+    ("POST", "/acme/{version}/account/"),
+    ("POST", "/acme/{version}/account/{id}/domains"),
+    ("DELETE", "/acme/{version}/account/{id}/domains"),
+    ("GET", "/acme/{version}/account/{id}"),
+    ("PUT", "/acme/{version}/account/{id}"),
+    ("DELETE", "/acme/{version}/account/{id}"),
+    ("GET", "/acme/{version}/server"),
+    ("GET", "/admin/{version}/"),
+    ("GET", "/admin/{version}/roles"),
+    ("GET", "/admin/{version}/privileges"),
+    ("POST", "/admin/{version}/changepassword"),
+    ("GET", "/admin/{version}/{id}"),
+    ("GET", "/admin/{version}/{id}/"),
+    ("PUT", "/admin/{version}/{id}"),
+    ("DELETE", "/admin/{version}/{id}"),
+)
+
+
+def _compile(template: str):
+    pattern = re.sub(r"\\{(\w+)\\}", r"(?P<\1>[^/]+)", re.escape(template))
+    return re.compile(pattern + "$")
+
+
+_COMPILED = [(method, template, _compile(template)) for method, template in ROUTES]
+
+
+def match(method: str, path: str):
+    """ (template, path parameters) of the route of a request, (None, {}) if no route matches.
+
+    Args:
+        method (str): HTTP method
+        path (str): Resource path like '/ssl/v1/collect/2417/x509', without base path and query
+    """
+
+    for route_method, template, pattern in _COMPILED:
+        if route_method == method:
+            found = pattern.match(path)
+            if found:
+                return template, found.groupdict()
+    return None, {}
+
@@ -1,16 +1,59 @@
 
+from typing import NamedTuple
 
-class SSLCertificates:
+import httpx
 
-    def __init__(self, client, config: dict, version: str = "v1"):
-        self.client = client
-        self.version = version
-        self.login = config.get("username")
-        self.password = config.get("password")
-        self.custom_uri = config.get("custom_uri")
+from concurrency import run_unordered
+from downloads import CHUNK_SIZE, download, keystore_link
+from models import SSLCertificate
+from pagination import fetch_all, paginate
+from resource import Resource
 
-    def listing_ssl_certificates(self, **parameter):  # TODO
-        """ Create client admin’s account.
+
+class SSLEnrollmentSpec(NamedTuple):
+    """ Arguments of one enroll_ssl_certificate call in a bulk enrollment. """
+
+    org_id: int
+    csr: str
+    cert_type: int
+    term: int
+    subj_alt_names: str = ""
+    custom_fields: list = None
+    number_servers: int = 0
+    server_type: int = -1
+    comments: str = ""
+    external_requester: str = ""
+
+
+class SSLEnrollmentResult(NamedTuple):
+    """ Outcome of one bulk enrollment: renew_id and ssl_id on success, otherwise the error. """
+
+    spec: SSLEnrollmentSpec
+    renew_id: str = None
+    ssl_id: int = None
+    error: Exception = None
+
+
+def _enrollment_result(spec: SSLEnrollmentSpec, response, error: Exception, loads) -> SSLEnrollmentResult:
+    if error is not None:
+        return SSLEnrollmentResult(spec, error=error)
+    try:
+        response.raise_for_status()
+        data = loads(response.content)
+    except (httpx.HTTPError, ValueError) as error:
+        return SSLEnrollmentResult(spec, error=error)
+    return SSLEnrollmentResult(spec, data.get("renewId"), data.get("sslId"))
+
+
+async def _aenrollment_results(results, loads):
+    async for spec, response, error in results:
+        yield _enrollment_result(spec, response, error, loads)
+
+
+class SSLCertificates(Resource):
+
+    def listing_ssl_certificates(self, **parameter):
+        """ List SSL certificates.
 
         Args:
             size (int): Count of returned entries
@@ -52,10 +95,65 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/"
-        headers = {"login": self.username, "Content-Type": "application/json",  "customerUri": self.custom_uri,
-                   "password": self.password}
-        # TODO data ?
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers, params=parameter)
+        return response
+
+    def iter_ssl_certificates(self, size: int = 200, prefetch: bool = False, typed: bool = False, **filters):
+        """ Iterate over all SSL certificates matching the filters, fetching the pages lazily.
+
+        Args:
+            size (int): Count of entries per page
+            prefetch (bool): Request the next page while the current one is being consumed
+            typed (bool): Yield lazily decoded SSLCertificate models instead of dicts
+            **filters: Filters of listing_ssl_certificates, e.g. status='Issued'
+
+        Returns:
+            Iterator of SSL certificate records (async iterator with AsyncGEANTTCSClient)
+        """
+
+        return paginate(self.client, lambda position, page_size: self.listing_ssl_certificates(
+            position=position, size=page_size, **filters), size, prefetch=prefetch,
+            model=SSLCertificate if typed else None)
+
+    def fetch_all_ssl_certificates(self, size: int = 500, concurrency: int = 8, typed: bool = False, **filters):
+        """ Fetch all SSL certificates matching the filters with `concurrency` pages requested in parallel.
+
+        Args:
+            size (int): Count of entries per page
+            concurrency (int): Count of pages fetched in parallel, bounded by the connection pool of the client
+            typed (bool): Return lazily decoded SSLCertificate models instead of dicts
+            **filters: Filters of listing_ssl_certificates
+
+        Returns:
+            List of SSL certificate records in listing order (awaitable with AsyncGEANTTCSClient)
+        """
+
+        return fetch_all(self.client, lambda position, page_size: self.listing_ssl_certificates(
+            position=position, size=page_size, **filters), size, concurrency,
+            model=SSLCertificate if typed else None)
+
+    def ssl_certificate_details(self, ssl_id: int):
+        """ Details of one SSL certificate.
+
+        Args:
+            ssl_id (int): Certificate ID
+
+        Returns:
+            sslId (int): SSL ID
+            commonName (str): SSL Common Name
+            status (str): SSL status
+            renewId (str): Renew ID for renew_ssl_certificate_by_renew_id
+            expires (str): Expiration date (YYYY-MM-DD)
+            serialNumber (str): SSL Serial Number
+            subjectAlternativeNames (List): SSL Subject Alternative Names
+
+        Example:
+            {"sslId":2417,"commonName":"ccmqa.com","status":"Issued","renewId":"_y4pPZvtUGqE40zEMe0F",
+            "expires":"2022-05-04","serialNumber":"00:b6:8e:b4:3b:39:e6:f3:6e:6c:b5:4b:cd:b7:a4:29:0f"}
+        """
+
+        url = f"/ssl/{self.version}/{ssl_id}"
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def listing_ssl_types(self):
@@ -72,9 +170,7 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/types"
-        headers = {"customerUri": self.custom_uri, "Content-Type": "application/json", "login": self.username,
-                   "password": self.password}
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
     def listing_of_custom_fields_for_ssl(self):
@@ -91,13 +187,11 @@ class SSLCertificates:
         """
 
         url =f"/ssl/{self.version}/customFields"
-        headers = {"Accept": "application/json", "login": self.username, "customerUri": self.custom_uri,
-                   "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
-    def enroll_ssl_certificate(self, org_id: int, csr, str, subj_alt_names: str, cert_type, number_servers,
+    def enroll_ssl_certificate(self, org_id: int, csr: str, subj_alt_names: str, cert_type, number_servers,
                                server_type: int, term: int, comments: str, custom_fields: list,external_requester: str):
         """ Creation and submission of a request for a new SSL certificate.
 
@@ -132,16 +226,42 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/enroll"
-        headers = {"login": self.username, "Content-Type": "application/json", "password": self.password,
-                   "customerUri": self.custom_uri}
 
         data = {"orgId": org_id, "csr": csr, "subjAltNames": subj_alt_names, "certType": cert_type,
                 "numberServers": number_servers, "serverType": server_type, "term": term, "comments": comments,
                 "customFields": custom_fields, "externalRequester": external_requester}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
+    def bulk_enroll_ssl_certificates(self, specs, concurrency: int = 20):
+        """ Submit many SSL enrollments with up to `concurrency` requests in flight.
+
+        Args:
+            specs (Iterable[SSLEnrollmentSpec]): Enrollments to submit, consumed lazily
+            concurrency (int): Maximum count of enrollments submitted at the same time
+
+        Returns:
+            Iterator of SSLEnrollmentResult in order of completion (async iterator with AsyncGEANTTCSClient). A failed
+            enrollment is reported with its error and does not stop the others.
+
+        Example:
+            specs = (SSLEnrollmentSpec(10557, csr, 17945, 365, subj_alt_names=name) for name, csr in csrs)
+            for result in ssl_certs.bulk_enroll_ssl_certificates(specs, concurrency=50):
+                print(result.spec.subj_alt_names, result.ssl_id or result.error)
+        """
+
+        results = run_unordered(self.client, self._enroll_spec, specs, concurrency)
+        loads = self.client.serializer.loads
+        if self.client.is_async:
+            return _aenrollment_results(results, loads)
+        return (_enrollment_result(spec, response, error, loads) for spec, response, error in results)
+
+    def _enroll_spec(self, spec: SSLEnrollmentSpec):
+        return self.enroll_ssl_certificate(spec.org_id, spec.csr, spec.subj_alt_names, spec.cert_type,
+                                           spec.number_servers, spec.server_type, spec.term, spec.comments,
+                                           spec.custom_fields or [], spec.external_requester)
+
     def enroll_ssl_certificate_with_key_generation(self, org_id: str, common_name: str, subj_alt_names: str,
                                                    cert_type: int, number_servers: int, server_type: int,
                                                    term: int, comments: str, algorithm: str, key_size: int,
@@ -184,15 +304,13 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/enroll-keygen"
-        headers = {"customerUri": self.custom_uri, "login": self.username, "Content-Type": "application/json",
-                   "password": self.password}
 
         data = {"orgId": org_id, "commonName": common_name, "subjAltNames": subj_alt_names, "certType": cert_type,
                 "numberServers": number_servers, "serverType": server_type, "term": term, "comments": comments,
                 "algorithm": algorithm, "keySize": key_size, "passPhrase": pass_phrase, "customFields": custom_fields,
                 "externalRequester": external_requester}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def link_to_download_private_key_or_whole_certificate(self, ssl_id: int, format_type: str):
@@ -215,12 +333,36 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/keystore/{ssl_id}/{format_type}"
-        headers = {"customerUri": self.custom_uri, "login": self.username, "Content-Type": "application/json",
-                   "password": self.password}
 
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.json_headers)
         return response
 
+    def download_private_key_or_whole_certificate(self, ssl_id: int, format_type: str, destination,
+                                                  chunk_size: int = CHUNK_SIZE):
+        """ Generate the download link of link_to_download_private_key_or_whole_certificate and stream its target
+            into a file or sink.
+
+        Args:
+            ssl_id (int): SSL id
+            format_type (str): 'key' for the private key or 'p12' for PKCS#12, both Base64 encoded
+            destination: Path of the file, replaced atomically once complete, or an object with a write(bytes) method
+            chunk_size (int): Bytes written at a time
+
+        Returns:
+            Count of bytes written (awaitable with AsyncGEANTTCSClient)
+        """
+
+        if self.client.is_async:
+            return self._adownload_private_key_or_whole_certificate(ssl_id, format_type, destination, chunk_size)
+        link = keystore_link(self.client, self.link_to_download_private_key_or_whole_certificate(ssl_id, format_type))
+        return download(self.client, "GET", link, destination, chunk_size, headers=self.headers)
+
+    async def _adownload_private_key_or_whole_certificate(self, ssl_id: int, format_type: str, destination,
+                                                          chunk_size: int):
+        response = await self.link_to_download_private_key_or_whole_certificate(ssl_id, format_type)
+        link = keystore_link(self.client, response)
+        return await download(self.client, "GET", link, destination, chunk_size, headers=self.headers)
+
     def collect_ssl_certificate(self, ssl_id: int, format_type: str):
         """ Delivering the newly issued SSL certificate from CA to the administrator for download.
 
@@ -234,10 +376,25 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/collect/{ssl_id}/{format_type}"
-        headers = {"customerUri": self.custom_uri, "login": self.username, "password": self.password}
-        response = self.client.get(url, headers=headers)
+        response = self.client.get(url, headers=self.headers)
         return response
 
+    def download_ssl_certificate(self, ssl_id: int, format_type: str, destination, chunk_size: int = CHUNK_SIZE):
+        """ Collect an SSL certificate like collect_ssl_certificate, streaming it into a file or sink.
+
+        Args:
+            ssl_id (int): Certificate ID
+            format_type (str): Format type for certificate, see collect_ssl_certificate
+            destination: Path of the file, replaced atomically once complete, or an object with a write(bytes) method
+            chunk_size (int): Bytes written at a time
+
+        Returns:
+            Count of bytes written (awaitable with AsyncGEANTTCSClient)
+        """
+
+        url = f"/ssl/{self.version}/collect/{ssl_id}/{format_type}"
+        return download(self.client, "GET", url, destination, chunk_size, headers=self.headers)
+
     def revoke_ssl_certificate_by_id(self, ssl_id: int, reason: str):
         """ Sending a request to CA to add the particular SSL certificate in certificate revocation list.
 
@@ -248,10 +405,8 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/revoke/{ssl_id}"
-        headers = {"customerUri": self.custom_uri, "Content-Type": "application/json", "login": self.username,
-                   "password": self.password}
         data = {"reason": reason}
-        response = self.client.get(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def revoke_ssl_certificate_by_serial_number(self, serial_number: int, reason: str):
@@ -264,11 +419,9 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/revoke/serial/{serial_number}"
-        headers = {"login": self.username, "Content-Type": "application/json", "customerUri": self.custom_uri,
-                   "password": self.password}
         data = {"reason": reason}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def renew_ssl_certificate_by_renew_id(self, renew_id: int, reason: str):
@@ -279,11 +432,9 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/renew/{renew_id}"
-        headers = {"login": self.username, "Content-Type": "application/json", "customerUri": self.custom_uri,
-                   "password": self.password}
         data = {"reason": reason}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response
 
     def renew_ssl_certificate_by_id(self, ssl_id: int, csr: str, reason: str, common_name: str,
@@ -302,10 +453,8 @@ class SSLCertificates:
         """
 
         url = f"/ssl/{self.version}/replace/{ssl_id}"
-        headers = {"login": self.username, "Content-Type": "application/json", "password": self.password,
-                   "customerUri": self.custom_uri}
         data = {"csr": csr, "reason": reason, "commonName": common_name,
                 "subjectAlternativeNames": subject_alternative_names}
 
-        response = self.client.post(url, headers=headers, data=data)
+        response = self.client.post(url, headers=self.json_headers, json=data)
         return response